@@ -0,0 +1,206 @@
+import os
+import shutil
+import threading
+import time
+
+from limits import CK_MIN_HEAP_MB, CK_MAX_HEAP_MB
+
+
+# --- CONFIGURAÇÕES GLOBAIS ---
+MIN_FREE_DISK_MB = int(os.getenv('ADMISSION_MIN_FREE_DISK_MB', '2048'))  # Disco que nunca é usado pela coleta
+MIN_FREE_RAM_MB = int(os.getenv('ADMISSION_MIN_FREE_RAM_MB', '1024'))  # RAM que nunca é usada pela coleta
+DISK_FACTOR = float(os.getenv('ADMISSION_DISK_FACTOR', '3.0'))  # Clone (checkout + .git) + saídas do CK, em múltiplos do 'size'
+CK_BASE_RAM_MB = int(os.getenv('CK_BASE_RAM_MB', '512'))  # Heap do CK num repositório pequeno
+CK_RAM_PER_MB = float(os.getenv('CK_RAM_PER_MB', '3.0'))  # Heap adicional do CK por MB de repositório
+MAX_BYPASS = int(os.getenv('ADMISSION_MAX_BYPASS', '8'))  # Jobs menores que podem passar à frente de um adiado
+POLL_SECONDS = 2.0  # Intervalo para reavaliar o disco e a RAM livres enquanto há jobs adiados
+
+
+def free_disk_bytes(path):
+    return shutil.disk_usage(path).free
+
+
+def available_ram_bytes():
+    """Memória disponível (MemAvailable no Linux); None se não der para medir nesta plataforma."""
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def ck_heap_mb(repo, heap_scale=1.0):
+    """
+    Heap (-Xmx) da JVM do CK para um repositório, proporcional ao código
+    (bytes de Java, se conhecidos, ou o 'size' da API) e multiplicado por
+    heap_scale (ex.: 2 ao repetir repositórios que esgotaram a memória).
+    """
+    code_mb = repo['java_bytes'] / 1024 / 1024 if repo.get('java_bytes') is not None else repo.get('size', 0) / 1024
+    heap = (CK_BASE_RAM_MB + code_mb * CK_RAM_PER_MB) * heap_scale
+    return int(min(max(heap, CK_MIN_HEAP_MB), CK_MAX_HEAP_MB))
+
+
+def server_heap_mb(workers, min_free_ram_mb=MIN_FREE_RAM_MB):
+    """
+    Heap da JVM persistente de cada worker no modo 'server': CK_MAX_HEAP_MB
+    ou, se for menor, a fatia de cada worker na RAM disponível além da
+    margem, para que as JVMs de todos os workers caibam juntas.
+    """
+    ram = available_ram_bytes()
+    if ram is None:
+        return CK_MAX_HEAP_MB
+    share = (ram // 1024 // 1024 - min_free_ram_mb) // max(workers, 1)
+    return int(min(max(share, CK_MIN_HEAP_MB), CK_MAX_HEAP_MB))
+
+
+def estimate_footprint(repo, heap_scale=1.0, server_heap_mb=None):
+    """
+    (disco, RAM) em bytes estimados para clonar e analisar um repositório;
+    a RAM é o heap do CK: o do repositório ou, com server_heap_mb (CK no
+    modo 'server'), o heap fixo da JVM persistente do worker.
+    """
+    disk = int(repo.get('size', 0) / 1024 * DISK_FACTOR * 1024 * 1024)
+    ram = (server_heap_mb or ck_heap_mb(repo, heap_scale)) * 1024 * 1024
+    return disk, ram
+
+
+class AdmissionController:
+    """
+    Decide quando cada repositório pode começar, pelos recursos da máquina.
+
+    Cada job reserva o disco e a RAM estimados (estimate_footprint) até
+    terminar. A capacidade é medida no início (disco livre em clone_dir
+    mais reclaimable_bytes, o que ainda vai ser liberado, como a lixeira
+    sendo apagada e os espelhos que podem ser despejados, e RAM
+    disponível, menos as margens mínimas); um job só começa se a soma
+    das reservas em andamento couber nela e se o disco e a RAM livres
+    agora ainda estiverem acima das margens (outros processos também usam
+    a máquina). Um job que não cabe é adiado, e jobs menores podem passar à
+    frente dele até MAX_BYPASS vezes; depois disso nada mais começa até ele
+    caber. Com a máquina ociosa, qualquer job que caiba na capacidade total
+    é admitido: só é pulado (rejection) o que não caberia nem assim.
+    """
+
+    def __init__(self, path, min_free_disk_mb=MIN_FREE_DISK_MB, min_free_ram_mb=MIN_FREE_RAM_MB, heap_scale=1.0,
+                 reclaimable_bytes=0, server_heap_mb=None):
+        self.path = path
+        self.heap_scale = heap_scale
+        self.server_heap_mb = server_heap_mb
+        self.min_free_disk = min_free_disk_mb * 1024 * 1024
+        self.min_free_ram = min_free_ram_mb * 1024 * 1024
+        self.disk_capacity = free_disk_bytes(path) + reclaimable_bytes - self.min_free_disk
+        ram = available_ram_bytes()
+        self.ram_capacity = ram - self.min_free_ram if ram is not None else None
+        self.disk_reserved = 0
+        self.ram_reserved = 0
+        self.in_flight = {}  # full_name -> (disco, RAM)
+        self._cond = threading.Condition()
+        self._blocked = None  # Job adiado na frente da fila e quantos passaram à frente dele
+        self._bypasses = 0
+        self._deferred_since = {}
+        # Contadores para o relatório final
+        self.deferred = 0
+        self.deferred_seconds = 0.0
+        self.peak_disk_reserved = 0
+        self.peak_ram_reserved = 0
+
+    def rejection(self, repo):
+        """Motivo para pular o repositório se ele não couber nem na máquina ociosa; senão None."""
+        disk, ram = estimate_footprint(repo, self.heap_scale, self.server_heap_mb)
+        if disk > self.disk_capacity:
+            return (f"Precisa de ~{disk / 1024 / 1024:.0f}MB de disco; há {self.disk_capacity / 1024 / 1024:.0f}MB "
+                    f"livres em '{self.path}' além da margem")
+        if self.ram_capacity is not None and ram > self.ram_capacity:
+            return (f"Precisa de ~{ram / 1024 / 1024:.0f}MB de RAM para o CK; há {self.ram_capacity / 1024 / 1024:.0f}MB "
+                    f"disponíveis além da margem")
+        return None
+
+    def _fits(self, disk, ram):
+        if not self.in_flight:
+            return True
+        if self.disk_reserved + disk > self.disk_capacity:
+            return False
+        if free_disk_bytes(self.path) < self.min_free_disk + disk:
+            return False
+        if self.ram_capacity is not None:
+            if self.ram_reserved + ram > self.ram_capacity:
+                return False
+            available = available_ram_bytes()
+            if available is not None and available < self.min_free_ram + ram:
+                return False
+        return True
+
+    def _reserve(self, repo, disk, ram):
+        self.in_flight[repo['full_name']] = (disk, ram)
+        self.disk_reserved += disk
+        self.ram_reserved += ram
+        self.peak_disk_reserved = max(self.peak_disk_reserved, self.disk_reserved)
+        self.peak_ram_reserved = max(self.peak_ram_reserved, self.ram_reserved)
+        since = self._deferred_since.pop(repo['full_name'], None)
+        if since is not None:
+            self.deferred_seconds += time.monotonic() - since
+
+    def _defer(self, repo, disk, ram):
+        if repo['full_name'] not in self._deferred_since:
+            self._deferred_since[repo['full_name']] = time.monotonic()
+            self.deferred += 1
+            print(f"⏳ Adiando {repo['full_name']} até haver recursos "
+                  f"(~{disk / 1024 / 1024:.0f}MB de disco, ~{ram / 1024 / 1024:.0f}MB de RAM)")
+
+    def try_acquire(self, repo):
+        """Reserva os recursos do repositório se ele couber agora; senão o marca como adiado."""
+        disk, ram = estimate_footprint(repo, self.heap_scale, self.server_heap_mb)
+        with self._cond:
+            if self._fits(disk, ram):
+                self._reserve(repo, disk, ram)
+                return True
+            self._defer(repo, disk, ram)
+            return False
+
+    def pick(self, pending):
+        """
+        Índice do próximo item (i, repo) de `pending` a iniciar, já com os
+        recursos reservados, ou None se nenhum puder começar agora.
+        """
+        if not pending:
+            return None
+        head = pending[0][1]['full_name']
+        if self.try_acquire(pending[0][1]):
+            if self._blocked == head:
+                self._blocked, self._bypasses = None, 0
+            return 0
+        if self._blocked != head:
+            self._blocked, self._bypasses = head, 0
+        if self._bypasses >= MAX_BYPASS:
+            return None  # Guarda os recursos que forem liberados para o job adiado
+        for k in range(1, len(pending)):
+            disk, ram = estimate_footprint(pending[k][1], self.heap_scale, self.server_heap_mb)
+            with self._cond:
+                if self._fits(disk, ram):
+                    self._reserve(pending[k][1], disk, ram)
+                    self._bypasses += 1
+                    return k
+        return None
+
+    def release(self, repo):
+        with self._cond:
+            disk, ram = self.in_flight.pop(repo['full_name'], (0, 0))
+            self.disk_reserved -= disk
+            self.ram_reserved -= ram
+            self._cond.notify_all()
+
+    def wait(self, timeout=POLL_SECONDS):
+        """Espera um job terminar (ou o intervalo de reavaliação dos recursos livres)."""
+        with self._cond:
+            self._cond.wait(timeout)
+
+    def report(self):
+        print(f"🚦 Admissão: {self.deferred} repositório(s) adiado(s) por falta de recursos "
+              f"({self.deferred_seconds:.1f}s no total); pico reservado: "
+              f"{self.peak_disk_reserved / 1024 / 1024:.0f}MB de disco, {self.peak_ram_reserved / 1024 / 1024:.0f}MB de RAM")
@@ -1,8 +1,34 @@
+import argparse
 import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
 from scipy.stats import spearmanr
 
+from figures import FigureJob, FIGURE_WORKERS, render_figures
+from results_table import load_results
+
+
+FIGURE_JOBS = None  # Lista de FigureJob no modo --headless (None = desenha e mostra cada figura na hora)
+
+
+def plot_regression(data, params, path):
+    """Gráfico de dispersão com linha de regressão (ver analyze_correlation)."""
+    x_col, y_col = params['x_col'], params['y_col']
+    fig = plt.figure(figsize=(10, 6))
+    sns.regplot(data=pd.DataFrame(data), x=x_col, y=y_col,
+                scatter_kws={'alpha': 0.3}, line_kws={'color': 'red'})
+    plt.title(params['title'])
+    plt.xlabel(params['x_label'])
+    plt.ylabel(params['y_label'])
+    # Usar escala de log para popularidade para melhor visualização
+    if x_col == 'stars':
+        plt.xscale('log')
+    plt.grid(True, which="both", ls="--", linewidth=0.5)
+
+    # Salva a figura em um arquivo
+    plt.savefig(path)
+    return fig
+
 
 def analyze_correlation(df, x_col, y_col, title, x_label, y_label):
     """
@@ -28,28 +54,36 @@ def analyze_correlation(df, x_col, y_col, title, x_label, y_label):
         print("A correlação não é estatisticamente significativa (p >= 0.05).")
 
     # Gerar o gráfico de dispersão com linha de regressão
-    plt.figure(figsize=(10, 6))
-    sns.regplot(data=df_clean, x=x_col, y=y_col,
-                scatter_kws={'alpha': 0.3}, line_kws={'color': 'red'})
-    plt.title(f'{title}\nCorrelação de Spearman: {corr:.3f} (p={p_value:.3f})')
-    plt.xlabel(x_label)
-    plt.ylabel(y_label)
-    # Usar escala de log para popularidade para melhor visualização
-    if x_col == 'stars':
-        plt.xscale('log')
-    plt.grid(True, which="both", ls="--", linewidth=0.5)
-
-    # Salva a figura em um arquivo
     filename = f"analise_{y_col}_vs_{x_col}.png"
-    plt.savefig(filename)
+    data = {x_col: df_clean[x_col].to_numpy(), y_col: df_clean[y_col].to_numpy()}
+    params = {'x_col': x_col, 'y_col': y_col, 'x_label': x_label, 'y_label': y_label,
+              'title': f'{title}\nCorrelação de Spearman: {corr:.3f} (p={p_value:.3f})'}
+    if FIGURE_JOBS is not None:
+        FIGURE_JOBS.append(FigureJob(filename, plot_regression, data, params))
+        return
+    plot_regression(data, params, filename)
     print(f"Gráfico salvo como '{filename}'")
     plt.show()
 
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Análise de correlação dos resultados de main.py.")
+    parser.add_argument('--headless', action='store_true',
+                        help="Gera as figuras sem janelas, em paralelo, pulando as que não mudaram")
+    parser.add_argument('--figures-dir', default='.', help="Diretório das figuras (padrão: diretório atual)")
+    parser.add_argument('--figure-workers', type=int, default=FIGURE_WORKERS,
+                        help=f"Processos que desenham as figuras no modo --headless (padrão: {FIGURE_WORKERS})")
+    parser.add_argument('--force-figures', action='store_true', help="Gera todas as figuras, mesmo as sem mudanças")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    global FIGURE_JOBS
+    args = parse_args(argv)
+    FIGURE_JOBS = [] if args.headless else None
     try:
         # Carrega os dados coletados pelo script main.py
-        df = pd.read_csv('resultados_finais.csv')
+        df = load_results('resultados_finais.csv', columns=['stars', 'cbo_mean', 'dit_mean', 'lcom_mean'])
     except FileNotFoundError:
         print("ERRO: O arquivo 'resultados_finais.csv' não foi encontrado.")
         print("Certifique-se de executar o 'main.py' primeiro para coletar os dados.")
@@ -77,6 +111,9 @@ def main():
     # if 'idade_anos' in df.columns:
     #     analyze_correlation(df, 'idade_anos', 'cbo_mean', 'Maturidade vs. Acoplamento (CBO)', 'Idade (anos)', 'CBO Médio')
 
+    if args.headless:
+        render_figures(FIGURE_JOBS, args.figures_dir, args.figure_workers, args.force_figures)
+
     print("\nAnálise concluída.")
 
 
@@ -1,17 +1,99 @@
+import argparse
 import pandas as pd
-import matplotlib.pyplot as plt
 import numpy as np
-from scipy.stats import spearmanr, pearsonr
+from correlation import correlation_table, BOOTSTRAP_RESAMPLES, PERMUTATIONS, RESAMPLE_SEED
+from figures import FigureJob, FIGURE_WORKERS, render_figures
+from analysis_memo import AnalysisMemo, ANALYSIS_MEMO_PATH
+from results_table import load_results
+from summary import column_stats, print_metric_stats, print_overview
 import warnings
 warnings.filterwarnings('ignore')
 
-# Configuração para melhor visualização
-plt.style.use('default')
+QUALITY_METRICS = ['cbo_mean', 'dit_mean', 'lcom_mean', 'wmc_mean', 'rfc_mean']
+# Variáveis independentes das RQs: popularidade, maturidade, tamanho e atividade
+FACTOR_COLUMNS = ['stars', 'age_years', 'size_kb', 'forks', 'watchers', 'open_issues']
+# Colunas com estatísticas descritivas no relatório
+STATS_COLUMNS = QUALITY_METRICS + ['noc_mean', 'stars', 'age_years']
+# Colunas lidas dos resultados (o arquivo tipado é lido só com elas)
+ANALYSIS_COLUMNS = FACTOR_COLUMNS + QUALITY_METRICS + ['noc_mean', 'updated_at']
+FIGURE_JOBS = None  # Lista de FigureJob no modo --headless (None = desenha e mostra cada figura na hora)
 
 
-def analyze_correlation(df, x_col, y_col, title, x_label, y_label, use_log_x=False):
+def _pyplot():
+    """matplotlib.pyplot, importado só quando uma figura é desenhada (importar o script não carrega o matplotlib)."""
+    import matplotlib.pyplot as plt
+    # Configuração para melhor visualização
+    plt.style.use('default')
+    return plt
+
+
+def plot_scatter(data, params, path):
+    """Gráfico de dispersão com linha de tendência (ver analyze_correlation)."""
+    plt = _pyplot()
+    fig = plt.figure(figsize=(10, 6))
+    plt.scatter(data['x'], data['y'], alpha=0.6, s=30)
+    # Adiciona linha de tendência
+    z = np.polyfit(data['x'], data['y'], 1)
+    p = np.poly1d(z)
+    plt.plot(data['x'], p(data['x']), "r--", alpha=0.8)
+    plt.xlabel(params['x_label'])
+    plt.ylabel(params['y_label'])
+    plt.title(params['title'])
+    plt.grid(True, alpha=0.3)
+    plt.savefig(path, dpi=300, bbox_inches='tight')
+    return fig
+
+
+def plot_correlation_matrix(data, params, path):
+    """Matriz de correlação com o valor em cada célula (ver analyze_quality_metrics)."""
+    matrix, labels = data['matrix'], params['labels']
+    plt = _pyplot()
+    fig = plt.figure(figsize=(10, 8))
+    im = plt.imshow(matrix, cmap='coolwarm', aspect='auto')
+    plt.colorbar(im)
+    
+    # Adiciona valores na matriz
+    for i in range(len(labels)):
+        for j in range(len(labels)):
+            plt.text(j, i, f'{matrix[i, j]:.2f}', 
+                    ha='center', va='center', fontsize=8)
+    
+    plt.xticks(range(len(labels)), labels, rotation=45)
+    plt.yticks(range(len(labels)), labels)
+    plt.title(params['title'])
+    plt.tight_layout()
+    plt.savefig(path, dpi=300, bbox_inches='tight')
+    return fig
+
+
+def _figure(filename, render, data, params):
+    """No modo --headless, só agenda a figura (FIGURE_JOBS); senão, desenha, salva e mostra na hora."""
+    if FIGURE_JOBS is not None:
+        FIGURE_JOBS.append(FigureJob(filename, render, data, params))
+        return
+    render(data, params, filename)
+    print(f"📊 Gráfico salvo: {filename}")
+    _pyplot().show()
+
+
+def _column_stats(df, columns, memo=None):
+    """Contagem, média, desvio padrão, mín., máx. e mediana de cada coluna (do memo, se informado)."""
+    if memo:
+        return memo.column_stats(df, columns)
+    return column_stats({col: df[col].to_numpy(dtype=float) for col in columns if col in df.columns}, columns)
+
+
+def _pair_stats(df, x_col, y_col, correlations=None):
+    """Linha de x_col vs y_col na tabela de correlation_table (calculada só para o par, se não for informada)."""
+    if correlations is None:
+        correlations = correlation_table(df, [x_col], [y_col])
+    return correlations[(correlations['x'] == x_col) & (correlations['y'] == y_col)].iloc[0]
+
+
+def analyze_correlation(df, x_col, y_col, title, x_label, y_label, use_log_x=False, correlations=None):
     """
     Função para calcular correlações e gerar gráficos de dispersão.
+    As correlações vêm de correlations (tabela de correlation_table com todos os pares), se informada.
     """
     # Remove linhas com valores infinitos ou ausentes
     df_clean = df.dropna(subset=[x_col, y_col]).copy()
@@ -21,53 +103,42 @@ def analyze_correlation(df, x_col, y_col, title, x_label, y_label, use_log_x=Fal
         return None, None, None
     
     # Calcula correlações
-    spearman_corr, spearman_p = spearmanr(df_clean[x_col], df_clean[y_col])
-    pearson_corr, pearson_p = pearsonr(df_clean[x_col], df_clean[y_col])
+    stats = _pair_stats(df, x_col, y_col, correlations)
+    spearman_corr, spearman_p = stats['spearman'], stats['spearman_p']
+    pearson_corr, pearson_p = stats['pearson'], stats['pearson_p']
     
     print(f"\n--- Análise: {title} ---")
     print(f"Correlação de Spearman: {spearman_corr:.3f} (p={spearman_p:.3f})")
     print(f"Correlação de Pearson: {pearson_corr:.3f} (p={pearson_p:.3f})")
     
+    if 'spearman_ci_low' in stats:
+        print(f"IC bootstrap: Spearman [{stats['spearman_ci_low']:.3f}, {stats['spearman_ci_high']:.3f}] | "
+              f"Pearson [{stats['pearson_ci_low']:.3f}, {stats['pearson_ci_high']:.3f}]")
+    if 'spearman_perm_p' in stats:
+        print(f"P-valor por permutação: Spearman {stats['spearman_perm_p']:.4f} | Pearson {stats['pearson_perm_p']:.4f}")
+    
     if spearman_p < 0.05:
         print("✅ Correlação Spearman é estatisticamente significativa (p < 0.05)")
     else:
         print("❌ Correlação Spearman não é significativa (p >= 0.05)")
     
     # Gera gráfico
-    plt.figure(figsize=(10, 6))
-    
+    x_values = df_clean[x_col].to_numpy()
     if use_log_x:
-        df_clean[f'{x_col}_log'] = np.log10(df_clean[x_col] + 1)
-        plt.scatter(df_clean[f'{x_col}_log'], df_clean[y_col], alpha=0.6, s=30)
-        # Adiciona linha de tendência
-        z = np.polyfit(df_clean[f'{x_col}_log'], df_clean[y_col], 1)
-        p = np.poly1d(z)
-        plt.plot(df_clean[f'{x_col}_log'], p(df_clean[f'{x_col}_log']), "r--", alpha=0.8)
-        plt.xlabel(f'{x_label} (log10)')
-    else:
-        plt.scatter(df_clean[x_col], df_clean[y_col], alpha=0.6, s=30)
-        # Adiciona linha de tendência
-        z = np.polyfit(df_clean[x_col], df_clean[y_col], 1)
-        p = np.poly1d(z)
-        plt.plot(df_clean[x_col], p(df_clean[x_col]), "r--", alpha=0.8)
-        plt.xlabel(x_label)
-    
-    plt.ylabel(y_label)
-    plt.title(f'{title}\nSpearman: {spearman_corr:.3f} | Pearson: {pearson_corr:.3f}')
-    plt.grid(True, alpha=0.3)
-    
-    # Salva o gráfico
+        x_values = np.log10(x_values + 1)
+        x_label = f'{x_label} (log10)'
     filename = f"analise_{y_col}_vs_{x_col}.png"
-    plt.savefig(filename, dpi=300, bbox_inches='tight')
-    print(f"📊 Gráfico salvo: {filename}")
-    plt.show()
+    _figure(filename, plot_scatter, {'x': x_values, 'y': df_clean[y_col].to_numpy()},
+            {'x_label': x_label, 'y_label': y_label,
+             'title': f'{title}\nSpearman: {spearman_corr:.3f} | Pearson: {pearson_corr:.3f}'})
     
     return spearman_corr, spearman_p, pearson_corr
 
 
-def analyze_quality_metrics(df):
+def analyze_quality_metrics(df, stats=None):
     """
     Análise das métricas de qualidade de código.
+    stats: estatísticas por coluna já calculadas (ver _column_stats).
     """
     print("\n" + "="*60)
     print("📊 ANÁLISE DAS MÉTRICAS DE QUALIDADE")
@@ -82,40 +153,18 @@ def analyze_quality_metrics(df):
         return
     
     print(f"\n📈 Estatísticas das métricas de qualidade:")
-    for metric in available_metrics:
-        if metric in df.columns:
-            values = df[metric].dropna()
-            if len(values) > 0:
-                print(f"\n{metric.upper()}:")
-                print(f"  Média: {values.mean():.2f}")
-                print(f"  Mediana: {values.median():.2f}")
-                print(f"  Desvio Padrão: {values.std():.2f}")
-                print(f"  Min: {values.min():.2f}")
-                print(f"  Max: {values.max():.2f}")
+    stats = stats or _column_stats(df, available_metrics)
+    print_metric_stats(stats, available_metrics)
     
     # Análise de correlações entre métricas
     print(f"\n🔗 Correlações entre métricas de qualidade:")
     correlation_matrix = df[available_metrics].corr()
     
-    plt.figure(figsize=(10, 8))
-    im = plt.imshow(correlation_matrix, cmap='coolwarm', aspect='auto')
-    plt.colorbar(im)
-    
-    # Adiciona valores na matriz
-    for i in range(len(available_metrics)):
-        for j in range(len(available_metrics)):
-            plt.text(j, i, f'{correlation_matrix.iloc[i, j]:.2f}', 
-                    ha='center', va='center', fontsize=8)
-    
-    plt.xticks(range(len(available_metrics)), available_metrics, rotation=45)
-    plt.yticks(range(len(available_metrics)), available_metrics)
-    plt.title('Matriz de Correlação das Métricas de Qualidade')
-    plt.tight_layout()
-    plt.savefig('correlacao_metricas_qualidade.png', dpi=300, bbox_inches='tight')
-    plt.show()
+    _figure('correlacao_metricas_qualidade.png', plot_correlation_matrix, {'matrix': correlation_matrix.to_numpy()},
+            {'labels': available_metrics, 'title': 'Matriz de Correlação das Métricas de Qualidade'})
 
 
-def analyze_popularity_vs_quality(df):
+def analyze_popularity_vs_quality(df, correlations=None):
     """
     RQ1: Relação entre Popularidade e Qualidade
     """
@@ -124,7 +173,9 @@ def analyze_popularity_vs_quality(df):
     print("="*60)
     
     # Análises de correlação
-    quality_metrics = ['cbo_mean', 'dit_mean', 'lcom_mean', 'wmc_mean', 'rfc_mean']
+    quality_metrics = QUALITY_METRICS
+    if correlations is None:
+        correlations = correlation_table(df, ['stars'], quality_metrics)
     
     for metric in quality_metrics:
         if metric in df.columns:
@@ -132,10 +183,10 @@ def analyze_popularity_vs_quality(df):
                                f'Popularidade vs {metric.upper()}', 
                                'Número de Estrelas (log)', 
                                f'{metric.upper()} Médio',
-                               use_log_x=True)
+                               use_log_x=True, correlations=correlations)
 
 
-def analyze_maturity_vs_quality(df):
+def analyze_maturity_vs_quality(df, correlations=None):
     """
     RQ2: Relação entre Maturidade e Qualidade
     """
@@ -147,17 +198,19 @@ def analyze_maturity_vs_quality(df):
         print("❌ Dados de idade não disponíveis!")
         return
     
-    quality_metrics = ['cbo_mean', 'dit_mean', 'lcom_mean', 'wmc_mean', 'rfc_mean']
+    quality_metrics = QUALITY_METRICS
+    if correlations is None:
+        correlations = correlation_table(df, ['age_years'], quality_metrics)
     
     for metric in quality_metrics:
         if metric in df.columns:
             analyze_correlation(df, 'age_years', metric,
                                f'Maturidade vs {metric.upper()}',
                                'Idade do Projeto (anos)',
-                               f'{metric.upper()} Médio')
+                               f'{metric.upper()} Médio', correlations=correlations)
 
 
-def analyze_size_vs_quality(df):
+def analyze_size_vs_quality(df, correlations=None):
     """
     RQ3: Relação entre Tamanho e Qualidade
     """
@@ -169,7 +222,9 @@ def analyze_size_vs_quality(df):
         print("❌ Dados de tamanho não disponíveis!")
         return
     
-    quality_metrics = ['cbo_mean', 'dit_mean', 'lcom_mean', 'wmc_mean', 'rfc_mean']
+    quality_metrics = QUALITY_METRICS
+    if correlations is None:
+        correlations = correlation_table(df, ['size_kb'], quality_metrics)
     
     for metric in quality_metrics:
         if metric in df.columns:
@@ -177,10 +232,10 @@ def analyze_size_vs_quality(df):
                                f'Tamanho vs {metric.upper()}',
                                'Tamanho do Projeto (KB)',
                                f'{metric.upper()} Médio',
-                               use_log_x=True)
+                               use_log_x=True, correlations=correlations)
 
 
-def analyze_activity_vs_quality(df):
+def analyze_activity_vs_quality(df, correlations=None):
     """
     RQ4: Relação entre Atividade e Qualidade
     """
@@ -190,11 +245,14 @@ def analyze_activity_vs_quality(df):
     
     # Calcula métricas de atividade
     if 'updated_at' in df.columns:
-        df['days_since_update'] = (pd.to_datetime('now') - pd.to_datetime(df['updated_at'])).dt.days
+        # load_results já entrega updated_at como data em UTC
+        df['days_since_update'] = (pd.Timestamp.now(tz='UTC') - df['updated_at']).dt.days
         df['is_active'] = df['days_since_update'] < 30  # Ativo se atualizado nos últimos 30 dias
     
     activity_metrics = ['forks', 'watchers', 'open_issues']
-    quality_metrics = ['cbo_mean', 'dit_mean', 'lcom_mean', 'wmc_mean', 'rfc_mean']
+    quality_metrics = QUALITY_METRICS
+    if correlations is None:
+        correlations = correlation_table(df, activity_metrics, quality_metrics)
     
     for activity in activity_metrics:
         if activity in df.columns:
@@ -204,28 +262,20 @@ def analyze_activity_vs_quality(df):
                                        f'{activity.upper()} vs {quality.upper()}',
                                        f'{activity.upper()}',
                                        f'{quality.upper()} Médio',
-                                       use_log_x=True)
+                                       use_log_x=True, correlations=correlations)
 
 
-def generate_summary_report(df):
+def generate_summary_report(df, stats=None):
     """
     Gera relatório resumo da análise.
+    stats: estatísticas por coluna já calculadas (ver _column_stats).
     """
+    stats = stats or _column_stats(df, ['stars', 'age_years', 'cbo_mean', 'dit_mean', 'lcom_mean'])
     print("\n" + "="*60)
     print("📋 RELATÓRIO RESUMO")
     print("="*60)
     
-    print(f"\n📊 Dados coletados:")
-    print(f"  Total de repositórios: {len(df)}")
-    print(f"  Repositórios com métricas válidas: {len(df.dropna(subset=['cbo_mean', 'dit_mean', 'lcom_mean']))}")
-    
-    if 'stars' in df.columns:
-        print(f"  Estrelas médias: {df['stars'].mean():.0f}")
-        print(f"  Estrelas mediana: {df['stars'].median():.0f}")
-    
-    if 'age_years' in df.columns:
-        print(f"  Idade média: {df['age_years'].mean():.1f} anos")
-        print(f"  Idade mediana: {df['age_years'].median():.1f} anos")
+    print_overview(len(df), len(df.dropna(subset=['cbo_mean', 'dit_mean', 'lcom_mean'])), stats)
     
     # Salva relatório em arquivo
     with open('relatorio_analise.txt', 'w', encoding='utf-8') as f:
@@ -238,21 +288,44 @@ def generate_summary_report(df):
         f.write("ESTATÍSTICAS BÁSICAS:\n")
         f.write("-" * 20 + "\n")
         for col in ['stars', 'age_years', 'cbo_mean', 'dit_mean', 'lcom_mean']:
-            if col in df.columns:
-                f.write(f"{col}: {df[col].mean():.2f} ± {df[col].std():.2f}\n")
+            if col in stats:
+                f.write(f"{col}: {stats[col]['mean']:.2f} ± {stats[col]['std']:.2f}\n")
     
     print("\n📄 Relatório salvo em 'relatorio_analise.txt'")
 
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Análise das métricas de qualidade coletadas pelo CK.")
+    parser.add_argument('--headless', action='store_true',
+                        help="Gera as figuras sem janelas, em paralelo, pulando as que não mudaram")
+    parser.add_argument('--figures-dir', default='.', help="Diretório das figuras (padrão: diretório atual)")
+    parser.add_argument('--figure-workers', type=int, default=FIGURE_WORKERS,
+                        help=f"Processos que desenham as figuras no modo --headless (padrão: {FIGURE_WORKERS})")
+    parser.add_argument('--force-figures', action='store_true', help="Gera todas as figuras, mesmo as sem mudanças")
+    parser.add_argument('--bootstrap', type=int, default=BOOTSTRAP_RESAMPLES,
+                        help=f"Reamostras bootstrap para o IC de cada correlação; 0 = sem IC (padrão: {BOOTSTRAP_RESAMPLES})")
+    parser.add_argument('--permutations', type=int, default=PERMUTATIONS,
+                        help=f"Permutações para o p-valor por permutação; 0 = sem (padrão: {PERMUTATIONS})")
+    parser.add_argument('--confidence', type=float, default=0.95, help="Nível de confiança dos ICs (padrão: 0.95)")
+    parser.add_argument('--memo', default=ANALYSIS_MEMO_PATH,
+                        help=f"Memo das estatísticas e correlações já calculadas (padrão: {ANALYSIS_MEMO_PATH})")
+    parser.add_argument('--no-memo', action='store_true', help="Recalcula tudo, sem ler nem gravar o memo")
+    parser.add_argument('--seed', type=int, default=RESAMPLE_SEED,
+                        help=f"Semente das reamostras, para resultados reprodutíveis (padrão: {RESAMPLE_SEED})")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    global FIGURE_JOBS
+    args = parse_args(argv)
     try:
         # Tenta carregar o arquivo completo primeiro
         try:
-            df = pd.read_csv('resultados_completos.csv')
+            df = load_results('resultados_completos.csv', columns=ANALYSIS_COLUMNS)
             print("✅ Carregando dados completos...")
         except FileNotFoundError:
             # Se não encontrar, tenta o arquivo básico
-            df = pd.read_csv('resultados_finais.csv')
+            df = load_results('resultados_finais.csv', columns=ANALYSIS_COLUMNS)
             print("⚠️ Carregando dados básicos (arquivo completo não encontrado)...")
     except FileNotFoundError:
         print("❌ ERRO: Nenhum arquivo de resultados encontrado!")
@@ -269,13 +342,31 @@ def main():
         print("❌ Nenhum dado válido para análise!")
         return
     
+    # Todas as correlações das RQs de uma vez (cada coluna é ranqueada uma única vez), com ICs bootstrap
+    # e p-valores por permutação, mais confiáveis que os assintóticos para estrelas e LCOM (caudas pesadas)
+    # Com o memo, só o que mudou desde a última análise é recalculado (as reamostras, por par de colunas)
+    memo = None if args.no_memo else AnalysisMemo(args.memo)
+    params = {'n_boot': args.bootstrap, 'n_perm': args.permutations, 'seed': args.seed, 'confidence': args.confidence}
+    if memo:
+        correlations = memo.correlations(df, FACTOR_COLUMNS, QUALITY_METRICS, **params)
+    else:
+        correlations = correlation_table(df, FACTOR_COLUMNS, QUALITY_METRICS, **params)
+    stats = _column_stats(df, STATS_COLUMNS, memo)
+    correlations.to_csv('correlacoes.csv', index=False)
+    print(f"🔗 {len(correlations)} correlações calculadas e salvas em 'correlacoes.csv'")
+    
     # Executa análises
-    analyze_quality_metrics(df)
-    analyze_popularity_vs_quality(df)
-    analyze_maturity_vs_quality(df)
-    analyze_size_vs_quality(df)
-    analyze_activity_vs_quality(df)
-    generate_summary_report(df)
+    FIGURE_JOBS = [] if args.headless else None
+    analyze_quality_metrics(df, stats)
+    analyze_popularity_vs_quality(df, correlations)
+    analyze_maturity_vs_quality(df, correlations)
+    analyze_size_vs_quality(df, correlations)
+    analyze_activity_vs_quality(df, correlations)
+    generate_summary_report(df, stats)
+    if args.headless:
+        render_figures(FIGURE_JOBS, args.figures_dir, args.figure_workers, args.force_figures)
+    if memo:
+        memo.report()
     
     print("\n🎉 Análise concluída com sucesso!")
     print("📁 Verifique os arquivos de gráficos e relatórios gerados.")
@@ -0,0 +1,181 @@
+import json
+import hashlib
+import sqlite3
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from correlation import correlation_table
+
+
+# --- CONFIGURAÇÕES GLOBAIS ---
+ANALYSIS_MEMO_PATH = "analysis_memo.sqlite"
+MEMO_VERSION = 1  # Incrementar sempre que o cálculo das estatísticas ou das correlações mudar (invalida o memo)
+
+
+def column_hash(values):
+    """Impressão digital do conteúdo de uma coluna numérica (float64)."""
+    return hashlib.sha256(np.ascontiguousarray(values, dtype=float).tobytes()).hexdigest()
+
+
+def _moments(values):
+    """(contagem, média, M2, mín., máx.) dos valores não nulos; M2 é a soma dos quadrados dos desvios."""
+    values = values[~np.isnan(values)]
+    if not len(values):
+        return 0, 0.0, 0.0, None, None
+    mean = values.mean()
+    return len(values), float(mean), float(((values - mean) ** 2).sum()), float(values.min()), float(values.max())
+
+
+def _merge_moments(a, b):
+    """Combina os momentos de duas partes dos dados (fórmula de Chan et al.)."""
+    count_a, mean_a, m2_a, min_a, max_a = a
+    count_b, mean_b, m2_b, min_b, max_b = b
+    if not count_b:
+        return a
+    if not count_a:
+        return b
+    count = count_a + count_b
+    delta = mean_b - mean_a
+    mean = mean_a + delta * count_b / count
+    m2 = m2_a + m2_b + delta * delta * count_a * count_b / count
+    return count, mean, m2, min(min_a, min_b), max(max_a, max_b)
+
+
+class AnalysisMemo:
+    """
+    Memo persistente (SQLite) das estatísticas de analise_simples.py.
+
+    Estatísticas por coluna (contagem, média, variância, mín., máx. e
+    mediana) ficam guardadas com o número de linhas e a impressão digital
+    da coluna. Se a coluna só ganhou linhas no fim (o prefixo tem a mesma
+    impressão digital), contagem, média, variância, mín. e máx. são
+    atualizados só com as linhas novas; a mediana é recalculada. Cada par
+    de correlation_table fica guardado com a chave (impressões digitais
+    das duas colunas, parâmetros das reamostras): só os pares cujas
+    colunas mudaram são recalculados.
+    """
+
+    def __init__(self, path=ANALYSIS_MEMO_PATH, version=MEMO_VERSION):
+        self.path = path
+        self.version = version
+        # Contadores para o relatório
+        self.hits = 0
+        self.incremental = 0
+        self.computed = 0
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS column_stats ("
+                    " name TEXT PRIMARY KEY, version INTEGER NOT NULL, rows INTEGER NOT NULL, hash TEXT NOT NULL,"
+                    " count INTEGER NOT NULL, mean REAL, m2 REAL, min REAL, max REAL, median REAL,"
+                    " updated_at TEXT NOT NULL)"
+                )
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS pair_results ("
+                    " key TEXT PRIMARY KEY, result TEXT NOT NULL, updated_at TEXT NOT NULL)"
+                )
+        finally:
+            conn.close()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def column_stats(self, df, columns):
+        """{coluna: {'count', 'mean', 'std', 'min', 'max', 'median'}} das colunas presentes em df."""
+        columns = [c for c in columns if c in df.columns]
+        stats = {}
+        conn = self._connect()
+        try:
+            with conn:
+                for name in columns:
+                    stats[name] = self._column(conn, name, df[name].to_numpy(dtype=float))
+        finally:
+            conn.close()
+        return stats
+
+    def _column(self, conn, name, values):
+        rows = len(values)
+        full_hash = column_hash(values)
+        stored = conn.execute(
+            "SELECT rows, hash, count, mean, m2, min, max, median FROM column_stats WHERE name = ? AND version = ?",
+            (name, self.version)
+        ).fetchone()
+
+        if stored and stored[0] == rows and stored[1] == full_hash:
+            self.hits += 1
+            count, mean, m2, minimum, maximum, median = stored[2:]
+        else:
+            if stored and stored[0] < rows and column_hash(values[:stored[0]]) == stored[1]:
+                # Só linhas novas no fim: os momentos guardados são combinados com os das novas
+                self.incremental += 1
+                moments = _merge_moments(tuple(stored[2:7]), _moments(values[stored[0]:]))
+            else:
+                self.computed += 1
+                moments = _moments(values)
+            count, mean, m2, minimum, maximum = moments
+            median = float(np.nanmedian(values)) if count else None
+            conn.execute(
+                "INSERT OR REPLACE INTO column_stats VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (name, self.version, rows, full_hash, count, mean, m2, minimum, maximum, median,
+                 datetime.now().isoformat(timespec='seconds'))
+            )
+
+        return {
+            'count': count,
+            'mean': mean if count else np.nan,
+            'std': float(np.sqrt(m2 / (count - 1))) if count > 1 else np.nan,  # ddof=1, como pandas
+            'min': minimum if count else np.nan,
+            'max': maximum if count else np.nan,
+            'median': median if count else np.nan,
+        }
+
+    def correlations(self, df, x_cols, y_cols, **params):
+        """correlation_table(df, x_cols, y_cols, **params), recalculando só os pares sem resultado guardado."""
+        x_cols = [c for c in x_cols if c in df.columns]
+        y_cols = [c for c in y_cols if c in df.columns]
+        hashes = {c: column_hash(df[c].to_numpy(dtype=float)) for c in dict.fromkeys(x_cols + y_cols)}
+        settings = json.dumps(params, sort_keys=True)
+
+        def key(x, y):
+            return hashlib.sha256(f"{self.version}|{x}|{hashes[x]}|{y}|{hashes[y]}|{settings}".encode()).hexdigest()
+
+        pairs = [(x, y) for x in x_cols for y in y_cols if x != y]
+        if not pairs:
+            return correlation_table(df, x_cols, y_cols, **params)
+        keys = {pair: key(*pair) for pair in pairs}
+        results = {}
+        conn = self._connect()
+        try:
+            for pair in pairs:
+                row = conn.execute("SELECT result FROM pair_results WHERE key = ?", (keys[pair],)).fetchone()
+                if row:
+                    results[pair] = json.loads(row[0])
+
+            missing = [pair for pair in pairs if pair not in results]
+            self.hits += len(results)
+            self.computed += len(missing)
+            if missing:
+                table = correlation_table(df, list(dict.fromkeys(x for x, _ in missing)),
+                                          list(dict.fromkeys(y for _, y in missing)), **params)
+                with conn:
+                    for record in table.to_dict('records'):
+                        pair = (record['x'], record['y'])
+                        results[pair] = {k: (None if isinstance(v, float) and np.isnan(v) else v)
+                                         for k, v in record.items()}
+                        conn.execute("INSERT OR REPLACE INTO pair_results VALUES (?, ?, ?)",
+                                     (keys[pair], json.dumps(results[pair], default=lambda v: v.item()),
+                                      datetime.now().isoformat(timespec='seconds')))
+        finally:
+            conn.close()
+
+        table = pd.DataFrame([results[pair] for pair in pairs])
+        numeric = table.columns.drop(['x', 'y', 'n'])
+        table[numeric] = table[numeric].astype(float)  # None (NaN guardado no JSON) volta a ser NaN
+        return table
+
+    def report(self):
+        print(f"🧠 Memo da análise: {self.hits} resultado(s) reaproveitado(s), {self.incremental} atualizado(s) "
+              f"com as linhas novas, {self.computed} calculado(s) do zero")
@@ -0,0 +1,96 @@
+"""
+Compara o carregamento antigo do class.csv (csv.DictReader + isdigit por
+célula) com o leitor vetorizado de ck_metrics, em um class.csv sintético.
+
+Uso: python bench_ck_loader.py [linhas] [--keep]
+"""
+import os
+import sys
+import csv
+import time
+import tempfile
+import tracemalloc
+
+import numpy as np
+
+from ck_metrics import CK_METRICS, summarize_class_csv, load_ck_columns
+
+
+# Cabeçalho parecido com o do CK (class.csv tem dezenas de colunas, só usamos 6)
+CK_HEADER = ['file', 'class', 'type', 'cbo', 'cboModified', 'fanin', 'fanout', 'wmc', 'dit', 'noc', 'rfc',
+             'lcom', 'lcom*', 'tcc', 'lcc', 'totalMethodsQty', 'staticMethodsQty', 'publicMethodsQty',
+             'privateMethodsQty', 'totalFieldsQty', 'loc', 'returnQty', 'loopQty', 'comparisonsQty',
+             'tryCatchQty', 'stringLiteralsQty', 'numbersQty', 'assignmentsQty', 'maxNestedBlocksQty']
+
+
+def write_synthetic_class_csv(path, rows, seed=42):
+    """Gera um class.csv com distribuições de cauda longa, como as métricas reais do CK."""
+    rng = np.random.default_rng(seed)
+    data = {name: rng.negative_binomial(1, 0.15, rows) for name in CK_HEADER[3:]}
+    data['dit'] = rng.integers(1, 6, rows)
+    data['lcom'] = rng.negative_binomial(1, 0.02, rows)
+    data['tcc'] = rng.random(rows).round(4)
+    data['lcc'] = rng.random(rows).round(4)
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(CK_HEADER)
+        columns = [data[name] for name in CK_HEADER[3:]]
+        for i in range(rows):
+            writer.writerow([f'/repo/src/main/java/pkg{i % 500}/Class{i}.java', f'pkg{i % 500}.Class{i}', 'class']
+                            + [column[i] for column in columns])
+
+
+def legacy_summary(path):
+    """Caminho antigo: lista de dicts, filtro com isdigit e uma lista por métrica."""
+    with open(path, 'r', encoding='utf-8') as f:
+        reader = list(csv.DictReader(f))
+    metrics = {}
+    for metric in CK_METRICS:
+        values = [float(row[metric]) for row in reader if row[metric].replace('.', '', 1).isdigit()]
+        if values:
+            metrics.update({
+                f'{metric}_mean': np.mean(values),
+                f'{metric}_median': np.median(values),
+                f'{metric}_std': np.std(values),
+                f'{metric}_max': np.max(values),
+                f'{metric}_min': np.min(values),
+            })
+    metrics['total_classes'] = len(reader)
+    return metrics
+
+
+def measure(label, func, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<28} {elapsed:8.2f}s   pico de memória: {peak / 1024 / 1024:8.1f} MB")
+    return result
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    rows = int(argv[0]) if argv and argv[0].isdigit() else 200000
+    path = os.path.join(tempfile.gettempdir(), f'ck_bench_class_{rows}.csv')
+    if not os.path.exists(path):
+        print(f"Gerando class.csv sintético com {rows} classes em {path}...")
+        write_synthetic_class_csv(path, rows)
+
+    print(f"\n📏 {rows} classes, {os.path.getsize(path) / 1024 / 1024:.1f} MB")
+    legacy = measure("DictReader + isdigit", legacy_summary, path)
+    vectorized, _ = measure("summarize_class_csv", summarize_class_csv, path)
+    measure("load_ck_columns", load_ck_columns, path)
+
+    # Os dois caminhos devem concordar (nos dados sintéticos não há valores inválidos)
+    for key, value in legacy.items():
+        assert np.isclose(value, vectorized[key]), (key, value, vectorized[key])
+    print("✅ Resultados idênticos entre os dois caminhos.")
+
+    if '--keep' not in argv:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Compara o CK executado com uma JVM por repositório (modo 'process') com o
+worker persistente (modo 'server', ck_runner.CKServer).
+
+Uso: python bench_ck_runner.py <repo1> [<repo2> ...] [--jar ck.jar] [--rounds 3]
+
+Os repositórios são diretórios locais já clonados; pequenos repositórios
+mostram melhor o custo de inicialização da JVM.
+"""
+import os
+import time
+import shutil
+import argparse
+import tempfile
+
+import ck_runner
+
+
+def time_mode(mode, jar_path, repos, rounds):
+    """
+    (duração de cada análise, segundos de inicialização) do modo. No modo
+    'server', a inicialização é a compilação do CKServer, a subida da JVM e
+    a análise de um projeto vazio, para que a JVM já esteja pronta quando
+    a primeira análise medida começar.
+    """
+    server = ck_runner.CKServer(jar_path) if mode == 'server' else None
+    durations, startup = [], 0.0
+    try:
+        if server:
+            empty_dir, job_dir = tempfile.mkdtemp(prefix='ck-bench-empty-'), tempfile.mkdtemp(prefix='ck-bench-')
+            start = time.perf_counter()
+            server.run(ck_runner.ck_args(empty_dir, job_dir))
+            startup = time.perf_counter() - start
+            shutil.rmtree(empty_dir, ignore_errors=True)
+            shutil.rmtree(job_dir, ignore_errors=True)
+        for _ in range(rounds):
+            for repo_path in repos:
+                job_dir = tempfile.mkdtemp(prefix='ck-bench-')
+                args = ck_runner.ck_args(os.path.abspath(repo_path), job_dir)
+                start = time.perf_counter()
+                if server:
+                    server.run(args)
+                else:
+                    ck_runner.run_ck_process(jar_path, args, cwd=job_dir)
+                durations.append(time.perf_counter() - start)
+                shutil.rmtree(job_dir, ignore_errors=True)
+    finally:
+        if server:
+            server.close()
+    return durations, startup
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do CK: JVM por repositório vs. JVM persistente.")
+    parser.add_argument('repos', nargs='+', help="Diretórios de repositórios Java já clonados")
+    parser.add_argument('--jar', default='ck.jar')
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.jar):
+        print(f"ERRO: Arquivo '{args.jar}' não encontrado.")
+        return
+
+    results = {}
+    for mode in ('process', 'server'):
+        durations, startup = time_mode(mode, args.jar, args.repos, args.rounds)
+        results[mode] = startup + sum(durations)  # O ganho conta a inicialização da JVM persistente
+        print(f"{mode:<8} total: {results[mode]:8.2f}s   média por repositório: "
+              f"{sum(durations) / len(durations):6.2f}s   primeira: {durations[0]:6.2f}s"
+              + (f"   inicialização: {startup:6.2f}s" if mode == 'server' else ''))
+    print(f"⚡ Ganho do modo 'server': {results['process'] / results['server']:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""
+Mede o tempo de importação de cada comando do cli.py (cli.load, em um
+interpretador novo, com python -X importtime e sem GITHUB_TOKEN) e
+verifica que os comandos não carregam o que não usam: a coleta não
+importa as bibliotecas de gráficos e o summarize não importa pandas,
+scipy nem matplotlib e fica abaixo de --budget-ms.
+
+Uso: python bench_imports.py [--rounds 5] [--budget-ms 500]
+     (ou python cli.py bench imports)
+
+Funciona como teste de regressão: sai com código 1 se alguma verificação
+falhar (as verificações de importação, sem o tempo, também rodam no
+pytest: tests/test_imports.py). Cada execução é acrescentada a
+bench_results.jsonl e comparada com a anterior, como em bench_pipeline.py.
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+import importlib.util
+from datetime import datetime
+
+from bench_pipeline import CODE_DIR, RESULTS_PATH, code_version, previous_result, print_comparison
+
+
+# --- CONFIGURAÇÕES GLOBAIS ---
+SUMMARIZE_BUDGET_MS = int(os.getenv('SUMMARIZE_BUDGET_MS', '500'))
+COMMANDS = [['collect'], ['resume'], ['summarize'], ['plot'], ['bench', 'pipeline'], ['bench', 'ck-loader'],
+            ['bench', 'ck-runner']]
+GRAPHICS_MODULES = ('matplotlib', 'seaborn', 'scipy')
+# Pacotes que cada comando não pode importar (sem o pyarrow, o summarize lê o CSV com o pandas)
+FORBIDDEN = {
+    'collect': GRAPHICS_MODULES,
+    'resume': GRAPHICS_MODULES,
+    'summarize': GRAPHICS_MODULES + (('pandas',) if importlib.util.find_spec('pyarrow') else ()),
+}
+MARKER = '--- cli.load ---'
+
+
+def measure_imports(command):
+    """
+    (milissegundos, pacotes) das importações feitas por cli.load(command)
+    em um interpretador novo: soma o tempo cumulativo das importações de
+    primeiro nível depois do marcador (a inicialização do Python fica de fora).
+    """
+    code = (f"import sys; sys.stderr.write({MARKER!r} + '\\n'); sys.stderr.flush(); "
+            f"import cli; cli.load({command[0]!r}, {command[1:]!r})")
+    env = {name: value for name, value in os.environ.items() if name != 'GITHUB_TOKEN'}
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=CODE_DIR, env=env,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"cli.load{tuple(command)} falhou:\n{result.stderr[-2000:]}")
+
+    lines = result.stderr.splitlines()
+    total_us, packages = 0, set()
+    for line in lines[lines.index(MARKER) + 1:]:
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line.split('|', 2)
+        if not cumulative.strip().isdigit():
+            continue  # Cabeçalho da tabela
+        packages.add(name.strip().split('.')[0])
+        if not name[1:].startswith(' '):  # Sem recuo: importação de primeiro nível
+            total_us += int(cumulative)
+    return total_us / 1000, packages
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tempo de importação de cada comando do cli.py.")
+    parser.add_argument('--rounds', type=int, default=5, help="Medições por comando; vale a menor (padrão: 5)")
+    parser.add_argument('--budget-ms', type=int, default=SUMMARIZE_BUDGET_MS,
+                        help=f"Limite do tempo de importação do summarize (padrão: {SUMMARIZE_BUDGET_MS} ms)")
+    parser.add_argument('--results', default=RESULTS_PATH, help=f"Histórico dos resultados (padrão: {RESULTS_PATH})")
+    args = parser.parse_args(argv)
+
+    results, failures = {}, []
+    print(f"⏱️ Importações de cada comando do cli.py (menor de {args.rounds} medições):")
+    for command in COMMANDS:
+        label = ' '.join(command)
+        timings, packages = [], set()
+        for _ in range(args.rounds):
+            elapsed, packages = measure_imports(command)
+            timings.append(elapsed)
+        results[f"import_{label.replace(' ', '_').replace('-', '_')}_ms"] = min(timings)
+        heavy = sorted(p for p in ('pandas', 'pyarrow', 'numpy') + GRAPHICS_MODULES if p in packages)
+        print(f"   {label:<20} {min(timings):8.1f} ms   {', '.join(heavy) or '-'}")
+
+        loaded = sorted(set(FORBIDDEN.get(command[0], ())) & packages)
+        if loaded:
+            failures.append(f"'{label}' importa {', '.join(loaded)}")
+    if results['import_summarize_ms'] > args.budget_ms:
+        failures.append(f"'summarize' leva {results['import_summarize_ms']:.0f} ms para importar "
+                        f"(limite: {args.budget_ms} ms)")
+
+    results_path = os.path.abspath(args.results)
+    params = {'bench': 'imports', 'rounds': args.rounds}
+    record = {'timestamp': datetime.now().isoformat(timespec='seconds'), 'version': code_version(),
+              'params': params, 'results': results}
+    previous = previous_result(results_path, params)
+    if previous:
+        print_comparison(record, previous)
+    with open(results_path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record) + '\n')
+    print(f"\n💾 Resultado acrescentado a '{results_path}'")
+
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        sys.exit(1)
+    print("✅ Nenhum comando importa o que não usa")
+
+
+if __name__ == '__main__':
+    main()
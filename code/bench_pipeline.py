@@ -0,0 +1,212 @@
+"""
+Benchmark offline do pipeline completo (clone + CK + sumarização + CSV),
+sem GitHub, rede ou ck.jar: repositórios git sintéticos, clonados por
+file://, e o CK falso de fake_ck.py.
+
+Uso: python bench_pipeline.py [--repos 12] [--classes 200,2000] [--workers 1,4]
+                              [--prefetch-mb 0] [--ck-mode process] [--csv-rows 200000]
+
+Cada execução é acrescentada a bench_results.jsonl (com o commit do
+código) e comparada com a última execução com os mesmos parâmetros, para
+que regressões de vazão ou de pico de memória fiquem visíveis.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import subprocess
+import tracemalloc
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows: sem o pico de memória dos subprocessos
+    resource = None
+
+import ck_runner
+import main_enhanced
+from bench_ck_loader import write_synthetic_class_csv
+
+
+CODE_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_PATH = 'bench_results.jsonl'
+
+
+def generate_java_repo(path, classes, seed):
+    """Cria um repositório git com `classes` arquivos .java (um commit), se ainda não existir."""
+    if os.path.isdir(os.path.join(path, '.git')):
+        return
+    rng = random.Random(seed)
+    for c in range(classes):
+        package = f'pkg{c % 50}'
+        os.makedirs(os.path.join(path, 'src', 'main', 'java', package), exist_ok=True)
+        methods = '\n'.join(
+            f'    public int method{m}(int x) {{\n'
+            f'        if (x > {m}) {{\n            return x * field{m % 3} + helper{c}.size();\n        }}\n'
+            f'        return x;\n    }}\n'
+            for m in range(rng.randint(1, 12))
+        )
+        source = (f'package {package};\n\nimport java.util.List;\nimport java.util.ArrayList;\n\n'
+                  f'public class Class{c} {{\n'
+                  f'    private int field0, field1, field2;\n'
+                  f'    private List<Integer> helper{c} = new ArrayList<>();\n\n{methods}}}\n')
+        with open(os.path.join(path, 'src', 'main', 'java', package, f'Class{c}.java'), 'w', encoding='utf-8') as f:
+            f.write(source)
+    with open(os.path.join(path, 'pom.xml'), 'w', encoding='utf-8') as f:
+        f.write('<project><modelVersion>4.0.0</modelVersion></project>\n')
+
+    git = ['git', '-C', path, '-c', 'user.name=bench', '-c', 'user.email=bench@example.com']
+    subprocess.run(['git', 'init', '-q', path], check=True)
+    subprocess.run([*git, 'add', '-A'], check=True)
+    subprocess.run([*git, 'commit', '-q', '-m', 'synthetic'], check=True)
+
+
+def synthetic_repos(workdir, count, class_sizes):
+    """Metadados no formato da API de busca para `count` repositórios com os tamanhos em class_sizes (em ciclo)."""
+    repos = []
+    for k in range(count):
+        classes = class_sizes[k % len(class_sizes)]
+        name = f'synthetic_{classes}_{k}'
+        path = os.path.join(workdir, 'sources', name)
+        generate_java_repo(path, classes, seed=k)
+        size_kb = main_enhanced._dir_size(path) // 1024
+        repos.append({
+            'full_name': f'bench/{name}',
+            'clone_url': 'file://' + path,
+            'created_at': '2020-01-01T00:00:00Z',
+            'stargazers_count': count - k,
+            'size': size_kb,
+        })
+    return repos
+
+
+def children_peak_rss_mb():
+    """Maior memória residente entre os subprocessos (git, CK) já terminados; None fora de POSIX."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+
+
+def measure(func, *args, **kwargs):
+    """(resultado, segundos, pico de memória Python em MB) de uma chamada."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 1024 / 1024
+
+
+def code_version():
+    """Commit do código (com '+dirty' se houver mudanças não commitadas)."""
+    try:
+        head = subprocess.run(['git', '-C', CODE_DIR, 'rev-parse', '--short', 'HEAD'],
+                              capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', '-C', CODE_DIR, 'status', '--porcelain', '--', '.'],
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return head + ('+dirty' if dirty else '')
+    except (subprocess.CalledProcessError, OSError):
+        return 'desconhecida'
+
+
+def previous_result(path, params):
+    """Última execução registrada com os mesmos parâmetros, ou None."""
+    if not os.path.exists(path):
+        return None
+    last = None
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get('params') == params:
+                last = record
+    return last
+
+
+def print_comparison(current, previous):
+    print(f"\n📈 Comparação com {previous['version']} ({previous['timestamp']}):")
+    for key, value in current['results'].items():
+        old = previous['results'].get(key)
+        if isinstance(value, (int, float)) and isinstance(old, (int, float)) and old:
+            print(f"   {key:<40} {old:10.2f} -> {value:10.2f} ({(value - old) / old * 100:+.1f}%)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark offline do pipeline de coleta do CK.")
+    parser.add_argument('--repos', type=int, default=12, help="Número de repositórios sintéticos")
+    parser.add_argument('--classes', default='200,2000', help="Classes por repositório, em ciclo (ex.: 200,2000)")
+    parser.add_argument('--workers', default='1,4', help="Valores de --workers a medir (ex.: 1,4)")
+    parser.add_argument('--prefetch-mb', type=int, default=0)
+    parser.add_argument('--ck-mode', choices=['process', 'server'], default='process')
+    parser.add_argument('--csv-rows', type=int, default=200000,
+                        help="Linhas do class.csv usado para medir calculate_additional_metrics sozinho")
+    parser.add_argument('--workdir', default=os.path.join(tempfile.gettempdir(), 'ck_bench_pipeline'),
+                        help="Diretório dos repositórios sintéticos (reaproveitados entre execuções)")
+    parser.add_argument('--results', default=RESULTS_PATH, help=f"Histórico dos resultados (padrão: {RESULTS_PATH})")
+    args = parser.parse_args(argv)
+
+    class_sizes = [int(n) for n in args.classes.split(',')]
+    worker_counts = [int(n) for n in args.workers.split(',')]
+    results_path = os.path.abspath(args.results)
+    params = {'repos': args.repos, 'classes': class_sizes, 'workers': worker_counts, 'prefetch_mb': args.prefetch_mb,
+              'ck_mode': args.ck_mode, 'csv_rows': args.csv_rows}
+
+    print(f"🧪 Gerando {args.repos} repositórios sintéticos em {args.workdir}...")
+    repos = synthetic_repos(os.path.abspath(args.workdir), args.repos, class_sizes)
+    total_classes = sum(class_sizes[k % len(class_sizes)] for k in range(args.repos))
+
+    run_dir = os.path.join(os.path.abspath(args.workdir), 'run')
+    os.makedirs(run_dir, exist_ok=True)
+    os.chdir(run_dir)  # CLONE_DIR, RESULTS_DIR e o CSV final são relativos ao diretório corrente
+    ck_runner.CK_COMMAND = [sys.executable, os.path.join(CODE_DIR, 'fake_ck.py')]
+    main_enhanced.CK_MODE = args.ck_mode
+    main_enhanced.WAREHOUSE_DIR = None
+    main_enhanced.SPANS = None
+
+    results = {}
+    summaries = []
+    for workers in worker_counts:
+        summaries, elapsed, peak = measure(main_enhanced.process_repositories, repos, workers=workers,
+                                           prefetch_mb=args.prefetch_mb)
+        results[f'process_repositories_w{workers}_s'] = elapsed
+        results[f'process_repositories_w{workers}_repos_per_s'] = len(repos) / elapsed
+        results[f'process_repositories_w{workers}_classes_per_s'] = total_classes / elapsed
+        results[f'process_repositories_w{workers}_peak_mb'] = peak
+
+    csv_path = os.path.join(run_dir, f'class_{args.csv_rows}.csv')
+    if not os.path.exists(csv_path):
+        write_synthetic_class_csv(csv_path, args.csv_rows)
+    _, elapsed, peak = measure(main_enhanced.calculate_additional_metrics, csv_path)
+    results['calculate_additional_metrics_s'] = elapsed
+    results['calculate_additional_metrics_rows_per_s'] = args.csv_rows / elapsed
+    results['calculate_additional_metrics_peak_mb'] = peak
+
+    _, elapsed, peak = measure(main_enhanced.save_results_to_csv, summaries)
+    results['save_results_to_csv_s'] = elapsed
+    results['save_results_to_csv_peak_mb'] = peak
+    results['children_peak_rss_mb'] = children_peak_rss_mb()
+
+    record = {'timestamp': datetime.now().isoformat(timespec='seconds'), 'version': code_version(),
+              'params': params, 'results': results}
+    print("\n" + "=" * 60)
+    print(f"📏 {args.repos} repositórios, {total_classes} classes, CK '{args.ck_mode}', prefetch {args.prefetch_mb}MB")
+    for key, value in results.items():
+        print(f"   {key:<40} {value:10.2f}" if value is not None else f"   {key:<40} {'N/A':>10}")
+
+    previous = previous_result(results_path, params)
+    if previous:
+        print_comparison(record, previous)
+    with open(results_path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record) + '\n')
+    print(f"\n💾 Resultado acrescentado a '{results_path}'")
+
+
+if __name__ == '__main__':
+    main()
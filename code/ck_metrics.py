@@ -0,0 +1,232 @@
+import time
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+
+# --- CONFIGURAÇÕES GLOBAIS ---
+CK_METRICS = ('wmc', 'rfc', 'cbo', 'dit', 'lcom', 'noc')  # Ordem das colunas no CSV de resultados
+RESERVOIR_SIZE = 10000  # Amostras guardadas por métrica no modo 'sketch'
+CHUNK_ROWS = 100000  # Linhas do class.csv lidas por vez
+
+
+def _to_float_array(column):
+    """Converte uma coluna do pandas em float64; células que não são números finitos viram NaN."""
+    values = pd.to_numeric(column, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+    return np.where(np.isfinite(values), values, np.nan)
+
+
+def iter_ck_chunks(path, columns=CK_METRICS, chunksize=CHUNK_ROWS):
+    """
+    Lê o class.csv do CK em blocos, apenas com as colunas pedidas.
+
+    O parser em C do pandas converte os números diretamente (inclusive
+    negativos e notação científica); só colunas com texto inválido passam
+    por pd.to_numeric. Cada bloco é um dict coluna -> array float64, todos
+    alinhados por classe, com NaN nas células inválidas (vazias, texto, NaN
+    ou infinito). Colunas ausentes no arquivo não aparecem no dict.
+    """
+    wanted = set(columns)
+    try:
+        reader = pd.read_csv(path, usecols=lambda name: name in wanted, chunksize=chunksize,
+                             encoding='utf-8', low_memory=False)
+    except pd.errors.EmptyDataError:
+        return  # class.csv sem nem o cabeçalho
+    for chunk in reader:
+        yield {column: _to_float_array(chunk[column]) for column in columns if column in chunk.columns}
+
+
+def load_ck_columns(path, columns=CK_METRICS):
+    """
+    Carrega as colunas pedidas do class.csv como arrays float64 tipados.
+
+    Retorna (valores, inválidos): valores mapeia coluna -> array só com os
+    números válidos, e inválidos mapeia coluna -> quantidade de células
+    descartadas.
+    """
+    parts = {column: [] for column in columns}
+    invalid = Counter()
+    for chunk in iter_ck_chunks(path, columns):
+        for column, array in chunk.items():
+            valid = array[~np.isnan(array)]
+            parts[column].append(valid)
+            invalid[column] += len(array) - len(valid)
+    values = {column: np.concatenate(arrays) for column, arrays in parts.items() if arrays}
+    return values, {column: count for column, count in invalid.items() if count}
+
+
+class StreamingStats:
+    """
+    Média, desvio padrão (populacional, como np.std), mínimo, máximo e
+    mediana de uma sequência de valores, atualizados bloco a bloco.
+
+    A média e a variância de cada bloco são combinadas com as acumuladas
+    pela fórmula de Chan et al. (versão em blocos do algoritmo de Welford).
+    Para a mediana:
+    - 'exact': conta as ocorrências de cada valor distinto; como as métricas
+      do CK são inteiras, a memória é limitada pelo número de valores
+      distintos, e não pelo número de classes;
+    - 'sketch': mantém uma amostra aleatória uniforme de até reservoir_size
+      valores (os de menor chave aleatória) e devolve a mediana da amostra;
+    - None: não calcula a mediana.
+    """
+
+    def __init__(self, median_mode='exact', reservoir_size=RESERVOIR_SIZE, seed=0):
+        if median_mode not in ('exact', 'sketch', None):
+            raise ValueError(f"Modo de mediana inválido: {median_mode}")
+        self.median_mode = median_mode
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self._counts = Counter()
+        self._reservoir_size = reservoir_size
+        self._sample = np.empty(0)
+        self._sample_keys = np.empty(0)
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values):
+        n = len(values)
+        if not n:
+            return
+        chunk_mean = values.mean()
+        chunk_m2 = ((values - chunk_mean) ** 2).sum()
+        delta = chunk_mean - self.mean
+        total = self.count + n
+        self.mean += delta * n / total
+        self._m2 += chunk_m2 + delta ** 2 * self.count * n / total
+        self.count = total
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+
+        if self.median_mode == 'exact':
+            distinct, counts = np.unique(values, return_counts=True)
+            self._counts.update(dict(zip(distinct.tolist(), counts.tolist())))
+        elif self.median_mode == 'sketch':
+            keys = np.concatenate([self._sample_keys, self._rng.random(n)])
+            sample = np.concatenate([self._sample, values])
+            if len(sample) > self._reservoir_size:
+                keep = np.argpartition(keys, self._reservoir_size)[:self._reservoir_size]
+                keys, sample = keys[keep], sample[keep]
+            self._sample_keys, self._sample = keys, sample
+
+    @property
+    def std(self):
+        return float(np.sqrt(self._m2 / self.count)) if self.count else 0.0
+
+    def median(self):
+        if self.median_mode == 'sketch':
+            return float(np.median(self._sample))
+        if self.median_mode is None:
+            return None
+
+        # Percorre os valores distintos em ordem até chegar às posições centrais
+        lower_pos, upper_pos = (self.count - 1) // 2, self.count // 2
+        lower = upper = None
+        seen = 0
+        for value in sorted(self._counts):
+            seen += self._counts[value]
+            if lower is None and seen > lower_pos:
+                lower = value
+            if seen > upper_pos:
+                upper = value
+                break
+        return (lower + upper) / 2
+
+    def summary(self, prefix):
+        return {
+            f'{prefix}_mean': float(self.mean),
+            f'{prefix}_median': self.median(),
+            f'{prefix}_std': self.std,
+            f'{prefix}_max': float(self.max),
+            f'{prefix}_min': float(self.min),
+        }
+
+
+def _timed_chunks(chunks, timings):
+    """Repassa os blocos somando em timings['parse'] o tempo gasto para lê-los."""
+    chunks = iter(chunks)
+    while True:
+        start = time.perf_counter()
+        try:
+            chunk = next(chunks)
+        except StopIteration:
+            return
+        finally:
+            timings['parse'] = timings.get('parse', 0.0) + time.perf_counter() - start
+        yield chunk
+
+
+def summarize_ck_chunks(chunks, median_mode='exact', timings=None):
+    """
+    Reduz blocos de métricas por classe às métricas agregadas do repositório.
+
+    Cada bloco é um dict coluna -> array float64 alinhado por classe, com
+    NaN nas células inválidas (o formato de iter_ck_chunks). Retorna
+    (métricas, inválidos). As métricas são os campos
+    <métrica>_mean/median/std/max/min de cada métrica do CK,
+    complexity_mean/std (WMC + CBO por classe), cohesion_mean/std
+    (1 / (LCOM + 1)) e total_classes; ou {} se não houver classes.
+    inválidos conta, por coluna, as células que não eram números.
+
+    Com um dict em timings, grava nele os segundos gastos lendo os blocos
+    ('parse') e agregando-os ('aggregate').
+    """
+    if timings is not None:
+        start = time.perf_counter()
+        chunks = _timed_chunks(chunks, timings)
+    stats = {metric: StreamingStats(median_mode) for metric in CK_METRICS}
+    complexity = StreamingStats(None)
+    cohesion = StreamingStats(None)
+    invalid = Counter()
+    total_classes = 0
+
+    for parsed in chunks:
+        total_classes += len(next(iter(parsed.values()), ()))
+        for metric, values in parsed.items():
+            valid = values[~np.isnan(values)]
+            invalid[metric] += len(values) - len(valid)
+            stats[metric].update(valid)
+
+        # Métricas de qualidade calculadas (NaN em qualquer termo descarta a classe)
+        if 'wmc' in parsed and 'cbo' in parsed:
+            scores = parsed['wmc'] + parsed['cbo']
+            complexity.update(scores[~np.isnan(scores)])
+        if 'lcom' in parsed:
+            lcom = parsed['lcom'][~np.isnan(parsed['lcom'])]
+            lcom = lcom[lcom != -1]  # 1 / (LCOM + 1) não é definido para LCOM = -1
+            cohesion.update(1.0 / (lcom + 1))
+
+    if timings is not None:
+        timings['aggregate'] = time.perf_counter() - start - timings.get('parse', 0.0)
+
+    if not total_classes:
+        return {}, dict(invalid)
+
+    metrics = {}
+    for metric in CK_METRICS:
+        if stats[metric].count:
+            metrics.update(stats[metric].summary(metric))
+
+    if complexity.count:
+        metrics['complexity_mean'] = float(complexity.mean)
+        metrics['complexity_std'] = complexity.std
+
+    if cohesion.count:
+        metrics['cohesion_mean'] = float(cohesion.mean)
+        metrics['cohesion_std'] = cohesion.std
+
+    metrics['total_classes'] = total_classes
+    return metrics, {column: count for column, count in invalid.items() if count}
+
+
+def summarize_class_csv(path, median_mode='exact', chunksize=CHUNK_ROWS, timings=None):
+    """
+    Reduz o class.csv do CK às métricas agregadas do repositório, lendo o
+    arquivo uma única vez, em blocos, com memória limitada.
+
+    Retorna (métricas, inválidos), como summarize_ck_chunks.
+    """
+    return summarize_ck_chunks(iter_ck_chunks(path, CK_METRICS, chunksize), median_mode, timings)
@@ -0,0 +1,203 @@
+import os
+import shlex
+import subprocess
+import threading
+
+from limits import (JobKilled, run_limited, start_process, forget_process, cancelled, classify_exit,
+                    CK_TIMEOUT_SECONDS, CK_CPU_LIMIT_SECONDS, CK_MAX_HEAP_MB, JVM_NATIVE_MB)
+
+
+# --- CONFIGURAÇÕES GLOBAIS ---
+CK_SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ck_server')
+CK_SERVER_CLASS = 'CKServer'
+MAX_JOBS_PER_JVM = int(os.getenv('CK_SERVER_MAX_JOBS', '50'))  # Reinicia a JVM depois de N repositórios
+# ... ou se a memória residente passar disso (0: o heap da JVM mais JVM_NATIVE_MB)
+MAX_JVM_RSS_MB = int(os.getenv('CK_SERVER_MAX_RSS_MB', '0'))
+PROTOCOL_PREFIX = '@@CK\t'
+# Substitui 'java -jar ck.jar' por outro executável com os mesmos argumentos (ex.: o CK falso do
+# benchmark, fake_ck.py); no modo 'server' ele é chamado com --server e deve falar o protocolo do CKServer
+CK_COMMAND = shlex.split(os.getenv('CK_COMMAND', ''))
+
+_compile_lock = threading.Lock()
+
+
+def ck_args(repo_path, job_dir, variables_and_fields=False):
+    """
+    Argumentos do Runner do CK: <projeto> <usar jars> <arquivos por partição
+    (0 = automático)> <métricas de variáveis e campos> <diretório de saída>.
+    O CK concatena o diretório de saída direto ao nome do arquivo, por isso
+    o separador no final.
+    """
+    return [repo_path, 'false', '0', 'true' if variables_and_fields else 'false', job_dir + os.sep]
+
+
+def jvm_options(heap_mb):
+    return [f'-Xmx{heap_mb}m'] if heap_mb else []
+
+
+def run_ck_process(jar_path, args, cwd, heap_mb=None, timeout=CK_TIMEOUT_SECONDS, cpu_seconds=CK_CPU_LIMIT_SECONDS):
+    """
+    Executa o CK em uma JVM nova (um processo por repositório), com heap
+    de heap_mb MB, tempo limite e limite de CPU. Com ExitOnOutOfMemoryError
+    a JVM termina logo no primeiro OutOfMemoryError, em vez de continuar com
+    o GC travado; lança limits.JobKilled nesses casos. A JVM não recebe
+    ulimit -v: ela reserva bem mais endereçamento do que usa (heap, CodeCache,
+    pilhas), e o -Xmx já limita a memória.
+    """
+    command = CK_COMMAND or ['java', *jvm_options(heap_mb), '-XX:+ExitOnOutOfMemoryError', '-jar',
+                             os.path.abspath(jar_path)]
+    run_limited(
+        [*command, *args],
+        timeout=timeout or None, cpu_seconds=cpu_seconds, cwd=cwd
+    )
+
+
+def ensure_server_compiled(jar_path):
+    """Compila o CKServer.java contra o ck.jar, se a classe ainda não existir ou estiver desatualizada."""
+    source = os.path.join(CK_SERVER_DIR, f'{CK_SERVER_CLASS}.java')
+    compiled = os.path.join(CK_SERVER_DIR, f'{CK_SERVER_CLASS}.class')
+    with _compile_lock:
+        if not os.path.exists(compiled) or os.path.getmtime(compiled) < os.path.getmtime(source):
+            print("☕ Compilando o worker persistente do CK...")
+            subprocess.run(
+                ['javac', '-cp', os.path.abspath(jar_path), '-d', CK_SERVER_DIR, source],
+                check=True, capture_output=True, text=True, encoding='utf-8'
+            )
+    return CK_SERVER_DIR
+
+
+def _rss_mb(pid):
+    """Memória residente de um processo em MB (Linux, via /proc); None se não der para medir."""
+    try:
+        with open(f'/proc/{pid}/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+class CKServer:
+    """
+    JVM do CK de longa duração, que analisa vários repositórios em sequência.
+
+    Cada análise é uma linha com os argumentos do CK separados por TAB,
+    enviada pela entrada padrão do CKServer (ck_server/CKServer.java); a
+    resposta é uma linha '@@CK\\tOK' ou '@@CK\\tERR\\t<mensagem>'. A JVM é
+    reiniciada depois de max_jobs análises, se a memória residente passar
+    de max_rss_mb (por padrão, heap_mb + JVM_NATIVE_MB), após um
+    OutOfMemoryError ou se o processo morrer. Não é thread-safe: use um
+    CKServer por worker.
+
+    A JVM tem heap fixo (heap_mb, o maior usado por um repositório) e cada
+    análise tem tempo limite: se ele estourar, a JVM é morta e reiniciada na
+    próxima chamada.
+    """
+
+    def __init__(self, jar_path, max_jobs=MAX_JOBS_PER_JVM, max_rss_mb=MAX_JVM_RSS_MB, command=None,
+                 heap_mb=CK_MAX_HEAP_MB):
+        self.jar_path = jar_path
+        self.heap_mb = heap_mb
+        self.max_jobs = max_jobs
+        # Um limite abaixo do heap reiniciaria a JVM a cada repositório grande, anulando a JVM persistente
+        self.max_rss_mb = max_rss_mb or (heap_mb or 0) + JVM_NATIVE_MB
+        self.command = command
+        self.process = None
+        self.jobs_done = 0
+        self.restarts = 0
+
+    def _command(self):
+        if self.command:
+            return self.command
+        if CK_COMMAND:
+            return [*CK_COMMAND, '--server']
+        classes_dir = ensure_server_compiled(self.jar_path)
+        classpath = os.pathsep.join([os.path.abspath(self.jar_path), classes_dir])
+        return ['java', *jvm_options(self.heap_mb), '-cp', classpath, CK_SERVER_CLASS]
+
+    def start(self):
+        # Registrada em limits, para que um Ctrl+C (limits.cancel_all) também mate a JVM persistente
+        self.process = start_process(
+            self._command(), stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            text=True, encoding='utf-8', bufsize=1
+        )
+        self.jobs_done = 0
+
+    def close(self):
+        if self.process and self.process.poll() is None:
+            self.process.stdin.close()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        if self.process:
+            forget_process(self.process)
+        self.process = None
+
+    def restart(self):
+        self.close()
+        self.restarts += 1
+        self.start()
+
+    def _needs_restart(self):
+        if self.process is None or self.process.poll() is not None:
+            return True
+        if self.jobs_done >= self.max_jobs:
+            return True
+        rss = _rss_mb(self.process.pid)
+        return rss is not None and rss > self.max_rss_mb
+
+    def run(self, args, timeout=CK_TIMEOUT_SECONDS):
+        """
+        Analisa um repositório; lança CalledProcessError (como o modo por
+        processo) se o CK falhar, ou JobKilled no tempo limite, em OutOfMemoryError
+        e quando a execução é cancelada (limits.cancel_all).
+        """
+        if self.process is None:
+            self.start()
+        elif self._needs_restart():
+            self.restart()
+
+        process = self.process
+        expired = threading.Event()
+
+        def expire():
+            expired.set()
+            process.kill()
+
+        timer = threading.Timer(timeout, expire) if timeout else None
+        if timer:
+            timer.daemon = True
+            timer.start()
+        try:
+            self.process.stdin.write('\t'.join(args) + '\n')
+            self.process.stdin.flush()
+            line = self.process.stdout.readline()
+            while line and not line.startswith(PROTOCOL_PREFIX):
+                line = self.process.stdout.readline()
+        except (BrokenPipeError, OSError):
+            line = ''
+        finally:
+            if timer:
+                timer.cancel()
+        self.jobs_done += 1
+
+        if not line:
+            # A JVM morreu no meio da análise; a próxima chamada sobe outra
+            self.close()
+            if cancelled():
+                raise JobKilled('cancelled', "CK interrompido: execução cancelada", process.returncode, CK_SERVER_CLASS)
+            if expired.is_set():
+                raise JobKilled('timeout', f"Tempo limite de {timeout}s excedido pelo CK", -9, CK_SERVER_CLASS)
+            if classify_exit(process.returncode or 0, None) == 'oom':
+                raise JobKilled('oom', "O worker do CK foi morto por falta de memória", process.returncode, CK_SERVER_CLASS)
+            raise subprocess.CalledProcessError(1, CK_SERVER_CLASS, stderr="O worker do CK terminou inesperadamente.")
+        response = line.rstrip('\n')[len(PROTOCOL_PREFIX):].split('\t', 1)
+        if response[0] != 'OK':
+            message = response[1] if len(response) > 1 else 'erro desconhecido'
+            if 'OutOfMemoryError' in message:
+                self.close()
+                raise JobKilled('oom', f"Memória esgotada no CK: {message}", 1, CK_SERVER_CLASS, stderr=message)
+            raise subprocess.CalledProcessError(1, CK_SERVER_CLASS, stderr=message)
@@ -0,0 +1,38 @@
+import com.github.mauricioaniche.ck.Runner;
+
+import java.io.BufferedReader;
+import java.io.InputStreamReader;
+import java.io.PrintStream;
+import java.nio.charset.StandardCharsets;
+
+/**
+ * Worker de longa duração do CK: recebe pela entrada padrão uma linha por
+ * repositório, com os argumentos do Runner do CK separados por TAB, e
+ * responde "@@CK\tOK" ou "@@CK\tERR\t<mensagem>" quando a análise termina.
+ *
+ * A saída normal do CK (logs) é desviada para stderr, para não se misturar
+ * com o protocolo. Assim a JVM, o JIT e o classpath são carregados uma
+ * única vez para vários repositórios.
+ */
+public class CKServer {
+
+    public static void main(String[] ignored) throws Exception {
+        PrintStream protocol = new PrintStream(System.out, true, "UTF-8");
+        System.setOut(System.err);
+
+        BufferedReader in = new BufferedReader(new InputStreamReader(System.in, StandardCharsets.UTF_8));
+        String line;
+        while ((line = in.readLine()) != null) {
+            if (line.isEmpty()) {
+                continue;
+            }
+            try {
+                Runner.main(line.split("\t"));
+                protocol.println("@@CK\tOK");
+            } catch (Throwable t) {
+                String message = String.valueOf(t).replace('\n', ' ').replace('\t', ' ');
+                protocol.println("@@CK\tERR\t" + message);
+            }
+        }
+    }
+}
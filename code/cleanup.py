@@ -0,0 +1,113 @@
+import os
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+# --- CONFIGURAÇÕES GLOBAIS ---
+CLEANUP_WORKERS = int(os.getenv('CLEANUP_WORKERS', '2'))  # Diretórios apagados ao mesmo tempo em segundo plano
+CLEANUP_MAX_BACKLOG = int(os.getenv('CLEANUP_MAX_BACKLOG', '32'))  # Acima disso, discard() espera (o disco não enche)
+
+
+class BackgroundCleaner:
+    """
+    Tira a remoção de diretórios do caminho crítico.
+
+    discard() renomeia o diretório para dentro de trash_dir (instantâneo no
+    mesmo sistema de arquivos) e enfileira a remoção, feita por até
+    `workers` threads com a função remove (ex.: o rmtree com novas
+    tentativas). Se a renomeação falhar (outro sistema de arquivos, arquivo
+    bloqueado no Windows), o diretório é apagado no lugar, de forma
+    síncrona: um caminho ainda em uso nunca é apagado em segundo plano.
+    Com mais de max_backlog remoções pendentes, discard() espera uma
+    terminar. Sobras de uma execução interrompida são apagadas por sweep().
+    """
+
+    def __init__(self, trash_dir, remove, workers=CLEANUP_WORKERS, max_backlog=CLEANUP_MAX_BACKLOG, spans=None):
+        self.trash_dir = os.path.abspath(trash_dir)
+        self.remove = remove
+        self.spans = spans
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='cleanup')
+        self._slots = threading.BoundedSemaphore(max_backlog)
+        self._lock = threading.Lock()
+        # Contadores para o relatório
+        self.backlog = 0
+        self.max_backlog_seen = 0
+        self.removed = 0
+        self.renamed = 0
+        self.remove_seconds = 0.0
+        self.max_remove_seconds = 0.0
+        self.wait_seconds = 0.0  # Tempo que o caminho crítico esperou por causa do backlog cheio
+        os.makedirs(self.trash_dir, exist_ok=True)
+
+    def discard(self, path, repository=None):
+        """Tira path do lugar imediatamente e agenda a remoção."""
+        if not os.path.exists(path):
+            return
+        if not self._slots.acquire(blocking=False):
+            start = time.monotonic()
+            self._slots.acquire()
+            with self._lock:
+                self.wait_seconds += time.monotonic() - start
+
+        target = os.path.join(self.trash_dir, f"{uuid.uuid4().hex[:8]}-{os.path.basename(os.path.normpath(path))}")
+        try:
+            os.rename(path, target)
+        except OSError:
+            target = None
+        with self._lock:
+            self.renamed += target is not None
+            self.backlog += 1
+            self.max_backlog_seen = max(self.max_backlog_seen, self.backlog)
+        if target is None:
+            # Apagar path em segundo plano correria contra quem o recria logo em seguida (ex.: CLONE_DIR
+            # na inicialização, ou o diretório de um repositório reaproveitado): remove aqui mesmo
+            start = time.monotonic()
+            self._remove(path, repository)
+            with self._lock:
+                self.wait_seconds += time.monotonic() - start
+            return
+        self._executor.submit(self._remove, target, repository)
+
+    def _remove(self, path, repository):
+        start = time.perf_counter()
+        try:
+            self.remove(path)
+        finally:
+            seconds = time.perf_counter() - start
+            with self._lock:
+                self.backlog -= 1
+                self.removed += 1
+                self.remove_seconds += seconds
+                self.max_remove_seconds = max(self.max_remove_seconds, seconds)
+            self._slots.release()
+            if self.spans and repository:
+                self.spans.record(repository, 'trash_delete', seconds)
+
+    def sweep(self):
+        """Agenda a remoção do que sobrou na lixeira de uma execução anterior."""
+        leftovers = [os.path.join(self.trash_dir, name) for name in os.listdir(self.trash_dir)]
+        for path in leftovers:
+            self._slots.acquire()
+            with self._lock:
+                self.backlog += 1
+                self.max_backlog_seen = max(self.max_backlog_seen, self.backlog)
+            self._executor.submit(self._remove, path, None)
+        return len(leftovers)
+
+    def report(self):
+        with self._lock:
+            print(f"🧹 Limpeza em segundo plano: {self.removed} diretório(s) apagado(s) em {self.remove_seconds:.1f}s "
+                  f"(máx. {self.max_remove_seconds:.1f}s); {self.backlog} pendente(s), backlog máximo "
+                  f"{self.max_backlog_seen}; espera no caminho crítico: {self.wait_seconds:.1f}s")
+
+    def close(self):
+        """Espera as remoções pendentes terminarem."""
+        if self.backlog:
+            print(f"🧹 Aguardando {self.backlog} remoção(ões) pendente(s)...")
+        self._executor.shutdown(wait=True)
+        try:
+            os.rmdir(self.trash_dir)
+        except OSError:
+            pass
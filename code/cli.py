@@ -0,0 +1,77 @@
+"""
+Ponto de entrada único da coleta e da análise.
+
+Uso: python cli.py <comando> [opções do comando]
+
+  collect    coleta as métricas do CK (main_enhanced.py)
+  resume     retoma a coleta, pulando o que já está no diário (collect --resume)
+  summarize  resumo rápido dos resultados, sem correlações nem gráficos (summary.py)
+  plot       análise completa, com as figuras geradas sem janelas (analise_simples.py --headless)
+  bench      benchmarks: pipeline, ck-loader, ck-runner ou imports
+
+As opções depois do comando vão para o script correspondente (ex.:
+python cli.py collect --workers 8, python cli.py plot --help). Cada
+comando importa só o seu módulo, na hora de rodar: o summarize não
+carrega pandas, scipy nem matplotlib, e o GITHUB_TOKEN só é lido quando
+a busca no GitHub é feita.
+"""
+import os
+import sys
+import argparse
+import importlib
+
+
+# Comando -> (módulo, argumentos fixos, descrição); os módulos só são importados por load()
+COMMANDS = {
+    'collect': ('main_enhanced', [], "Coleta as métricas do CK dos repositórios Java mais populares"),
+    'resume': ('main_enhanced', ['--resume'], "Retoma a coleta, pulando os repositórios já registrados no diário"),
+    'summarize': ('summary', [], "Resumo rápido das métricas coletadas, sem correlações nem gráficos"),
+    'plot': ('analise_simples', ['--headless'], "Análise completa, com as figuras geradas sem janelas"),
+    'bench': (None, [], "Benchmarks (o primeiro argumento escolhe qual)"),
+}
+BENCHMARKS = {
+    'pipeline': 'bench_pipeline',
+    'ck-loader': 'bench_ck_loader',
+    'ck-runner': 'bench_ck_runner',
+    'imports': 'bench_imports',
+}
+
+
+def load(command, args=()):
+    """
+    (módulo, argumentos) que executam o comando: importa só o módulo do
+    comando (e o que ele importa). Em 'bench', args[0] escolhe o benchmark.
+    """
+    module_name, fixed_args, _ = COMMANDS[command]
+    args = list(args)
+    if command == 'bench':
+        module_name = BENCHMARKS[args.pop(0)]
+    return importlib.import_module(module_name), fixed_args + args
+
+
+def parse_args(argv=None):
+    commands = '\n'.join(f"  {name:<10} {description}" for name, (_, _, description) in COMMANDS.items())
+    parser = argparse.ArgumentParser(
+        description="Coleta e análise das métricas de qualidade dos repositórios Java mais populares.",
+        epilog=f"comandos:\n{commands}\n\nbenchmarks: {', '.join(BENCHMARKS)}\n\n"
+               "Use 'cli.py <comando> --help' para as opções de cada comando.",
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', choices=list(COMMANDS), metavar='comando')
+    parser.add_argument('args', nargs=argparse.REMAINDER, help="Opções repassadas ao comando")
+    args = parser.parse_args(argv)
+    if args.command == 'bench' and (not args.args or args.args[0] not in BENCHMARKS):
+        parser.error(f"informe o benchmark: {', '.join(BENCHMARKS)}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    module, module_args = load(args.command, args.args)
+    # As mensagens de uso do script mostram o comando (ex.: "usage: cli.py collect [-h] ...")
+    name = args.command if args.command != 'bench' else f"bench {args.args[0]}"
+    sys.argv[0] = f"{os.path.basename(sys.argv[0])} {name}"
+    module.main(module_args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,243 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+
+# --- CONFIGURAÇÕES GLOBAIS ---
+BOOTSTRAP_RESAMPLES = int(os.getenv('BOOTSTRAP_RESAMPLES', '10000'))  # 0 = sem intervalos de confiança
+PERMUTATIONS = int(os.getenv('PERMUTATIONS', '10000'))  # 0 = sem p-valor por permutação
+RESAMPLE_SEED = int(os.getenv('RESAMPLE_SEED', '42'))
+RESAMPLE_CHUNK_MB = int(os.getenv('RESAMPLE_CHUNK_MB', '256'))  # Memória dos arrays de cada bloco de reamostras
+
+
+def _tie_groups(column):
+    """Ordem da coluna e início/fim (na ordem) de cada grupo de valores iguais."""
+    order = np.argsort(column)
+    ordered = column[order]
+    starts = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1]])
+    ends = np.r_[starts[1:], len(column)]
+    return order, starts, ends
+
+
+def _average_ranks(data, ties=None):
+    """Ranks médios (empates recebem a média, como rankdata) de cada coluna, com uma ordenação por coluna."""
+    ranks = np.empty_like(data, dtype=float)
+    for k in range(data.shape[1]):
+        order, starts, ends = ties[k] if ties else _tie_groups(data[:, k])
+        ranks[order, k] = np.repeat((starts + ends + 1) / 2.0, ends - starts)
+    return ranks
+
+
+def _weighted_ranks(weights, ties):
+    """
+    Ranks médios de cada coluna em cada reamostra bootstrap, sem reordenar:
+    weights (reamostras x n) diz quantas vezes cada linha foi sorteada, e o
+    rank de um grupo de empates é o peso acumulado antes dele mais a média
+    das posições que ele ocupa. Linhas com peso 0 recebem um rank qualquer.
+    """
+    ranks = np.empty((len(ties),) + weights.shape)
+    zeros = np.zeros((len(weights), 1))
+    for k, (order, starts, ends) in enumerate(ties):
+        group_of_row = np.empty(len(order), dtype=np.intp)
+        group_of_row[order] = np.repeat(np.arange(len(starts)), ends - starts)
+        cumulative = np.concatenate([zeros, np.cumsum(weights[:, order], axis=1)], axis=1)
+        before = cumulative[:, starts]
+        group_ranks = before + (cumulative[:, ends] - before + 1) / 2.0
+        np.take(group_ranks, group_of_row, axis=1, out=ranks[k])
+    return ranks.transpose(1, 2, 0)  # reamostras x n x colunas
+
+
+def _pearson_block(data):
+    """Matriz de Pearson entre as colunas de data (linhas completas), via um único produto de matrizes."""
+    centered = data - data.mean(axis=0)
+    norms = np.sqrt((centered * centered).sum(axis=0))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        z = centered / norms  # Coluna constante: norma 0 -> NaN, como em pearsonr
+        corr = z.T @ z
+    return np.clip(corr, -1.0, 1.0)
+
+
+def _p_values(r, n):
+    """P-valor bilateral do teste t com n - 2 graus de liberdade (o mesmo de spearmanr e pearsonr)."""
+    from scipy.stats import t as t_dist  # Importado só aqui: scipy.stats leva mais de 1 s para carregar
+    r = np.asarray(r, dtype=float)
+    n = np.asarray(n, dtype=float)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        df = n - 2
+        t = r * np.sqrt(df / ((1.0 - r) * (1.0 + r)))
+        p = 2 * t_dist.sf(np.abs(t), df)
+    p = np.where(np.abs(r) == 1.0, 0.0, p)
+    return np.where((n < 3) | np.isnan(r), np.nan, p)
+
+
+def _weighted_pearson(weights, values):
+    """
+    Matriz de Pearson de cada reamostra (reamostras x k x k) a partir dos
+    pesos; values é (n x k), igual em todas, ou (reamostras x n x k).
+    """
+    n = weights.sum(axis=1)[:, None]
+    weighted = weights[:, :, None] * values
+    means = weighted.sum(axis=1) / n
+    cov = np.matmul(weighted.transpose(0, 2, 1), values) / n[:, :, None] - means[:, :, None] * means[:, None, :]
+    std = np.sqrt(np.diagonal(cov, axis1=1, axis2=2))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        corr = cov / (std[:, :, None] * std[:, None, :])
+    return np.clip(corr, -1.0, 1.0)
+
+
+def _standardize(data):
+    centered = data - data.mean(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return centered / np.sqrt((centered * centered).sum(axis=0))
+
+
+def _chunk_size(rows, cols, chunk_mb, arrays):
+    """Reamostras por bloco para que `arrays` arrays de rows x cols floats caibam em chunk_mb."""
+    return max(1, int(chunk_mb * 1024 * 1024 // (8 * rows * max(cols, 1) * arrays)))
+
+
+def _resample_group(data, pair_index, n_boot, n_perm, rng, chunk_mb):
+    """
+    Correlações bootstrap e por permutação de um grupo de colunas com as
+    mesmas linhas completas. Todos os índices de um bloco são sorteados
+    como um único array e as matrizes de todas as reamostras do bloco saem
+    de produtos de matrizes. Retorna (bootstrap, permutação), cada um um
+    dicionário 'spearman'/'pearson' -> array (reamostras x pares).
+    """
+    rows, cols = data.shape
+    i_idx, j_idx = pair_index
+    ties = [_tie_groups(data[:, k]) for k in range(cols)]
+    centered = data - data.mean(axis=0)  # Reduz o cancelamento nos momentos ponderados
+
+    boot = {'spearman': [], 'pearson': []}
+    chunk = _chunk_size(rows, cols, chunk_mb, arrays=4)
+    for start in range(0, n_boot, chunk):
+        size = min(chunk, n_boot - start)
+        samples = rng.integers(0, rows, (size, rows)) + np.arange(size)[:, None] * rows
+        weights = np.bincount(samples.ravel(), minlength=size * rows).reshape(size, rows).astype(float)
+        boot['pearson'].append(_weighted_pearson(weights, centered)[:, i_idx, j_idx])
+        boot['spearman'].append(_weighted_pearson(weights, _weighted_ranks(weights, ties))[:, i_idx, j_idx])
+
+    # Permutar as linhas de y mantém seus ranks: os z-scores são calculados uma vez
+    perm = {'spearman': [], 'pearson': []}
+    standardized = {'pearson': _standardize(data), 'spearman': _standardize(_average_ranks(data, ties))}
+    chunk = _chunk_size(rows, cols, chunk_mb, arrays=3)
+    for start in range(0, n_perm, chunk):
+        size = min(chunk, n_perm - start)
+        permutations = rng.permuted(np.broadcast_to(np.arange(rows), (size, rows)), axis=1)
+        for name, z in standardized.items():
+            corr = np.matmul(z.T, z[permutations])  # Linha i de x contra a linha permutada de y
+            perm[name].append(corr[:, i_idx, j_idx])
+
+    def stack(results):
+        return {name: np.concatenate(parts) if parts else np.empty((0, len(i_idx)))
+                for name, parts in results.items()}
+
+    return stack(boot), stack(perm)
+
+
+def _pair_groups(df, x_cols, y_cols):
+    """
+    Pares (x, y) agrupados pelo conjunto de linhas completas. Retorna
+    (pares, grupos), onde cada grupo é (índices dos pares, colunas, dados
+    das linhas completas). Colunas com o mesmo padrão de ausentes
+    compartilham a máscara; sem valores ausentes, há um só grupo.
+    """
+    x_cols = [c for c in x_cols if c in df.columns]
+    y_cols = [c for c in y_cols if c in df.columns]
+    columns = list(dict.fromkeys(x_cols + y_cols))
+    pairs = [(x, y) for x in x_cols for y in y_cols if x != y]
+    if not pairs:
+        return pairs, []
+
+    values = df[columns].to_numpy(dtype=float)
+    valid = ~np.isnan(values)
+    index = {col: k for k, col in enumerate(columns)}
+
+    # Um par só precisa de uma máscara nova quando os padrões das duas colunas diferem
+    mask_ids, masks = [], {}
+    for k in range(len(columns)):
+        key = np.packbits(valid[:, k]).tobytes()
+        mask_ids.append(masks.setdefault(key, (len(masks), valid[:, k]))[0])
+    mask_by_id = {mask_id: mask for mask_id, mask in masks.values()}
+
+    members_by_mask = {}
+    for p, (x, y) in enumerate(pairs):
+        a, b = sorted((mask_ids[index[x]], mask_ids[index[y]]))
+        members_by_mask.setdefault((a, b), []).append(p)
+
+    groups = []
+    for (a, b), members in members_by_mask.items():
+        mask = mask_by_id[a] if a == b else mask_by_id[a] & mask_by_id[b]
+        group_cols = list(dict.fromkeys(c for p in members for c in pairs[p]))
+        groups.append((members, group_cols, values[mask][:, [index[c] for c in group_cols]]))
+    return pairs, groups
+
+
+def correlation_table(df, x_cols, y_cols, n_boot=0, n_perm=0, seed=RESAMPLE_SEED, confidence=0.95,
+                      chunk_mb=RESAMPLE_CHUNK_MB):
+    """
+    Spearman e Pearson (com p-valores) de todos os pares (x, y) de uma vez.
+
+    Os valores ausentes são descartados par a par, como em
+    df.dropna(subset=[x, y]). Os pares são agrupados pelo conjunto de
+    linhas completas: em cada grupo, cada coluna é ranqueada uma única vez
+    e as matrizes inteiras de Pearson (dos valores) e de Spearman (dos
+    ranks) saem de um produto de matrizes.
+
+    Com n_boot > 0, acrescenta o intervalo de confiança bootstrap
+    (percentil) de cada correlação: <corr>_ci_low e <corr>_ci_high. Com
+    n_perm > 0, acrescenta o p-valor bilateral por permutação de y:
+    <corr>_perm_p. As reamostras de cada grupo vêm de um gerador novo com
+    a semente seed: o resultado é reprodutível e o de um par não depende
+    de quais outros pares foram calculados junto. Elas são processadas em
+    blocos de até chunk_mb.
+
+    Retorna uma tabela com uma linha por par, na ordem de x_cols e depois y_cols.
+    """
+    pairs, groups = _pair_groups(df, x_cols, y_cols)
+    table = pd.DataFrame(pairs, columns=['x', 'y'])
+    n = np.zeros(len(pairs))
+    corr = {name: np.full(len(pairs), np.nan) for name in ('spearman', 'pearson')}
+    ci = {f'{name}_ci_{bound}': np.full(len(pairs), np.nan) for name in corr for bound in ('low', 'high')}
+    perm_p = {f'{name}_perm_p': np.full(len(pairs), np.nan) for name in corr}
+    alpha = 1.0 - confidence
+
+    for members, group_cols, data in groups:
+        rows = len(data)
+        n[members] = rows
+        if rows < 2:
+            continue
+        local = {col: k for k, col in enumerate(group_cols)}
+        pair_index = (np.array([local[pairs[p][0]] for p in members]),
+                      np.array([local[pairs[p][1]] for p in members]))
+        matrices = {'pearson': _pearson_block(data), 'spearman': _pearson_block(_average_ranks(data))}
+        for name, matrix in matrices.items():
+            corr[name][members] = matrix[pair_index]
+        if rows < 3 or not (n_boot or n_perm):
+            continue
+
+        boot, perm = _resample_group(data, pair_index, n_boot, n_perm, np.random.default_rng(seed),
+                                     chunk_mb)
+        for name in corr:
+            if n_boot:
+                low, high = np.nanquantile(boot[name], [alpha / 2, 1 - alpha / 2], axis=0)
+                ci[f'{name}_ci_low'][members] = low
+                ci[f'{name}_ci_high'][members] = high
+            if n_perm:
+                observed = np.abs(corr[name][members])
+                extreme = (np.abs(perm[name]) >= observed - 1e-12).sum(axis=0)
+                perm_p[f'{name}_perm_p'][members] = np.where(np.isnan(observed), np.nan, (extreme + 1) / (n_perm + 1))
+
+    table['n'] = n.astype(int)
+    for name in ('spearman', 'pearson'):
+        table[name] = corr[name]
+        table[f'{name}_p'] = _p_values(corr[name], n)
+        if n_boot:
+            table[f'{name}_ci_low'] = ci[f'{name}_ci_low']
+            table[f'{name}_ci_high'] = ci[f'{name}_ci_high']
+        if n_perm:
+            table[f'{name}_perm_p'] = perm_p[f'{name}_perm_p']
+    return table
+
@@ -0,0 +1,82 @@
+"""
+Substituto do ck.jar para benchmarks offline: recebe os mesmos argumentos
+do Runner do CK e grava class.csv e method.csv sintéticos, com uma classe
+por arquivo .java do projeto (vezes FAKE_CK_CLASSES_PER_FILE).
+
+Uso: CK_COMMAND="python fake_ck.py" (um processo por repositório) ou
+     python fake_ck.py --server (protocolo do CKServer pela entrada padrão)
+
+Variáveis: FAKE_CK_CLASSES_PER_FILE (1), FAKE_CK_METHODS (8 métodos por
+classe), FAKE_CK_MS_PER_CLASS (0, tempo simulado de análise por classe).
+"""
+import os
+import sys
+import csv
+import time
+import zlib
+
+import numpy as np
+
+from bench_ck_loader import write_synthetic_class_csv
+
+
+CLASSES_PER_FILE = int(os.getenv('FAKE_CK_CLASSES_PER_FILE', '1'))
+METHODS_PER_CLASS = int(os.getenv('FAKE_CK_METHODS', '8'))
+MS_PER_CLASS = float(os.getenv('FAKE_CK_MS_PER_CLASS', '0'))
+METHOD_HEADER = ['file', 'class', 'method', 'constructor', 'line', 'cbo', 'wmc', 'rfc', 'loc', 'returnsQty',
+                 'variablesQty', 'parametersQty', 'loopQty', 'comparisonsQty', 'maxNestedBlocksQty']
+
+
+def count_java_files(project_dir):
+    total = 0
+    for root, dirs, files in os.walk(project_dir):
+        dirs[:] = [d for d in dirs if d != '.git']
+        total += sum(1 for name in files if name.endswith('.java'))
+    return total
+
+
+def write_synthetic_method_csv(path, classes, methods_per_class, seed):
+    rng = np.random.default_rng(seed)
+    rows = classes * methods_per_class
+    data = rng.negative_binomial(1, 0.3, (rows, len(METHOD_HEADER) - 5))
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(METHOD_HEADER)
+        for i in range(rows):
+            c = i // methods_per_class
+            writer.writerow([f'/repo/Class{c}.java', f'pkg.Class{c}', f'method{i % methods_per_class}/1', 'false',
+                             i % 400] + data[i].tolist())
+
+
+def analyze(args):
+    """Mesmo contrato do Runner do CK: <projeto> <usar jars> <arquivos por partição> <variáveis e campos> <saída>."""
+    project_dir, output_prefix = args[0], args[4] if len(args) > 4 else ''
+    classes = count_java_files(project_dir) * CLASSES_PER_FILE
+    if not classes:
+        return  # Como o CK: sem código Java, nenhuma saída
+    seed = zlib.crc32(os.path.basename(os.path.normpath(project_dir)).encode())
+    if MS_PER_CLASS:
+        time.sleep(classes * MS_PER_CLASS / 1000)
+    write_synthetic_class_csv(output_prefix + 'class.csv', classes, seed)
+    write_synthetic_method_csv(output_prefix + 'method.csv', classes, METHODS_PER_CLASS, seed)
+
+
+def serve():
+    protocol = sys.stdout
+    for line in sys.stdin:
+        line = line.rstrip('\n')
+        if not line:
+            continue
+        try:
+            analyze(line.split('\t'))
+            protocol.write('@@CK\tOK\n')
+        except Exception as e:
+            protocol.write(f"@@CK\tERR\t{e!r}".replace('\n', ' ') + '\n')
+        protocol.flush()
+
+
+if __name__ == '__main__':
+    if sys.argv[1:] == ['--server']:
+        serve()
+    else:
+        analyze(sys.argv[1:])
@@ -0,0 +1,135 @@
+import os
+import json
+import hashlib
+import inspect
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+
+# --- CONFIGURAÇÕES GLOBAIS ---
+FIGURE_WORKERS = int(os.getenv('FIGURE_WORKERS', str(os.cpu_count() or 1)))
+MANIFEST_FILE = '.figures.json'  # Chave de conteúdo de cada figura já gerada, no diretório das figuras
+
+
+def _source_of(func):
+    """Código-fonte da função (ou o bytecode e as constantes, se o fonte não estiver disponível)."""
+    try:
+        return inspect.getsource(func).encode()
+    except (OSError, TypeError):
+        code = func.__code__
+        return code.co_code + repr(code.co_consts).encode()
+
+
+def _render_fingerprint(render):
+    """
+    Bytes que identificam o desenho: o fonte de render e o das funções do
+    mesmo módulo que ele chama (ex.: _pyplot), para que mudar o código de
+    uma figura invalide a que está no cache mesmo sem mudar o nome.
+    """
+    parts = [_source_of(render)]
+    for name in sorted(set(render.__code__.co_names)):
+        helper = render.__globals__.get(name)
+        if inspect.isfunction(helper) and helper.__module__ == render.__module__ and helper is not render:
+            parts.append(name.encode() + b':' + _source_of(helper))
+    return b'\0'.join(parts)
+
+
+class FigureJob:
+    """
+    Uma figura a gerar: render(data, params, path) desenha e salva em path.
+
+    render deve ser uma função de módulo (é enviada a outro processo);
+    data é um dicionário de arrays e params, de valores serializáveis em JSON.
+    """
+
+    def __init__(self, filename, render, data, params):
+        self.filename = filename
+        self.render = render
+        self.data = {name: np.asarray(values) for name, values in data.items()}
+        self.params = params
+
+    def key(self):
+        """Hash do desenho (nome e código da função), dos parâmetros e do conteúdo de cada coluna de dados."""
+        digest = hashlib.sha256()
+        # O nome e o código, não o módulo: o mesmo desenho tem a mesma chave rodando o script direto ou importado
+        digest.update(self.render.__qualname__.encode())
+        digest.update(_render_fingerprint(self.render))
+        digest.update(json.dumps(self.params, sort_keys=True, default=str).encode())
+        for name in sorted(self.data):
+            values = np.ascontiguousarray(self.data[name])
+            digest.update(f"{name}:{values.dtype.str}:{values.shape}".encode())
+            digest.update(values.tobytes() if values.dtype != object else repr(values.tolist()).encode())
+        return digest.hexdigest()
+
+
+def _use_agg():
+    import matplotlib
+    matplotlib.use('Agg')
+
+
+def _render(job, path):
+    import matplotlib.pyplot as plt
+    fig = job.render(job.data, job.params, path)
+    plt.close(fig)
+    return path
+
+
+def _load_manifest(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _save_manifest(manifest, path):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def render_figures(jobs, out_dir='.', workers=FIGURE_WORKERS, force=False):
+    """
+    Gera as figuras sem janela (backend Agg), em até `workers` processos.
+
+    Uma figura cujo arquivo existe e cuja chave (FigureJob.key) é igual à
+    registrada em MANIFEST_FILE na última geração é pulada, a menos que
+    force seja True. Retorna (gerados, pulados) com os caminhos.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, MANIFEST_FILE)
+    manifest = _load_manifest(manifest_path)
+
+    pending, skipped = [], []
+    for job in jobs:
+        path = os.path.join(out_dir, job.filename)
+        key = job.key()
+        if not force and manifest.get(job.filename) == key and os.path.exists(path):
+            skipped.append(path)
+        else:
+            pending.append((job, path, key))
+
+    rendered = []
+    try:
+        if workers > 1 and len(pending) > 1:
+            # 'spawn' em todo sistema: nenhum processo herda o backend gráfico do processo principal
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=min(workers, len(pending)), mp_context=context,
+                                     initializer=_use_agg) as pool:
+                futures = [(pool.submit(_render, job, path), job, key) for job, path, key in pending]
+                for future, job, key in futures:
+                    rendered.append(future.result())
+                    manifest[job.filename] = key
+        else:
+            _use_agg()
+            for job, path, key in pending:
+                rendered.append(_render(job, path))
+                manifest[job.filename] = key
+    finally:
+        _save_manifest(manifest, manifest_path)  # O que já foi gerado não é refeito se outra figura falhar
+
+    print(f"🖼️ Figuras em '{out_dir}': {len(rendered)} gerada(s), {len(skipped)} sem mudanças (cache)")
+    return rendered, skipped
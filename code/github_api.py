@@ -0,0 +1,168 @@
+import os
+import time
+import threading
+from email.utils import parsedate_to_datetime
+import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+
+
+# --- CONFIGURAÇÕES GLOBAIS ---
+# A variável GITHUB_API_URL pode apontar para um servidor local que sirva páginas de busca salvas
+DEFAULT_API_URL = 'https://api.github.com'
+SEARCH_QUERY = 'language:java'
+PER_PAGE = 100
+TOTAL_PAGES = 10
+MAX_CONCURRENT_REQUESTS = 4  # O GitHub desaconselha muitas requisições simultâneas (limite secundário)
+MAX_RETRIES = 5
+
+
+def auth_headers(token=None):
+    """
+    Cabeçalhos de autenticação da API. O token só é exigido aqui, quando a
+    API é de fato usada, e não ao importar os scripts (replay offline).
+    """
+    token = token or os.getenv('GITHUB_TOKEN')
+    if not token or token == "SEU_TOKEN_AQUI":
+        raise ValueError(
+            "Token do GitHub não encontrado! Defina a variável de ambiente GITHUB_TOKEN ou substitua no código.")
+    return {'Authorization': f'token {token}'}
+
+
+def create_session(headers, pool_size=MAX_CONCURRENT_REQUESTS):
+    """Cria uma Session com conexões keep-alive reaproveitadas entre as páginas."""
+    session = requests.Session()
+    session.headers.update(headers)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+class _RateLimitGate:
+    """
+    Pausa todas as requisições quando o GitHub sinaliza limite de taxa.
+
+    Se uma página receber 403/429 com Retry-After (limite secundário) ou com
+    X-RateLimit-Remaining igual a 0, as demais threads também esperam até o
+    horário informado, em vez de continuarem insistindo em paralelo.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._resume_at = 0.0
+
+    def wait(self):
+        with self._lock:
+            delay = self._resume_at - time.time()
+        if delay > 0:
+            time.sleep(delay)
+
+    def block_for(self, seconds):
+        with self._lock:
+            self._resume_at = max(self._resume_at, time.time() + seconds)
+
+
+def _parse_retry_after(value):
+    """Segundos do cabeçalho Retry-After (em segundos ou como data HTTP), ou None se for inválido."""
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _retry_delay(response, attempt):
+    """Segundos a esperar antes de repetir uma resposta limitada, ou None se não for limite de taxa."""
+    if response.status_code not in (403, 429):
+        return None
+    retry_after = _parse_retry_after(response.headers.get('Retry-After', ''))
+    if retry_after is not None:
+        return retry_after
+    if response.headers.get('X-RateLimit-Remaining') == '0' and 'X-RateLimit-Reset' in response.headers:
+        return max(float(response.headers['X-RateLimit-Reset']) - time.time(), 0) + 1
+    if response.status_code == 429 or 'rate limit' in response.text.lower():
+        return 2 ** attempt  # Sem cabeçalhos: recuo exponencial
+    return None
+
+
+def fetch_search_page(session, page, gate, base_url=DEFAULT_API_URL, query=SEARCH_QUERY, per_page=PER_PAGE):
+    """Busca uma página da pesquisa de repositórios, repetindo quando atingir o limite de taxa."""
+    url = f'{base_url}/search/repositories'
+    params = {'q': query, 'sort': 'stars', 'order': 'desc', 'per_page': per_page, 'page': page}
+    for attempt in range(MAX_RETRIES + 1):
+        gate.wait()
+        response = session.get(url, params=params, timeout=30)
+        delay = _retry_delay(response, attempt)
+        if delay is None or attempt == MAX_RETRIES:
+            response.raise_for_status()
+            return response.json()['items']
+        print(f"⏳ Limite de taxa do GitHub na página {page}; aguardando {delay:.0f}s...")
+        gate.block_for(delay)
+
+
+def fetch_github_repos(headers, pages=TOTAL_PAGES, base_url=None, max_workers=MAX_CONCURRENT_REQUESTS):
+    """
+    Busca os repositórios Java mais populares, com as páginas requisitadas em paralelo.
+
+    Todas as páginas compartilham uma mesma Session (uma conexão TLS por
+    thread, reaproveitada), e no máximo max_workers requisições ficam em voo
+    ao mesmo tempo. Retorna a lista de repositórios na ordem das páginas, ou
+    uma lista vazia se alguma página falhar.
+    """
+    base_url = (base_url or os.getenv('GITHUB_API_URL', DEFAULT_API_URL)).rstrip('/')
+    print("Buscando repositórios no GitHub...")
+    gate = _RateLimitGate()
+    with create_session(headers, max_workers) as session, \
+            ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='github') as executor:
+        futures = [executor.submit(fetch_search_page, session, page, gate, base_url) for page in range(1, pages + 1)]
+        all_repos = []
+        try:
+            for page, future in enumerate(futures, start=1):
+                all_repos.extend(future.result())
+                print(f"Página {page}/{pages}... {len(all_repos)} repositórios encontrados.")
+        except requests.exceptions.RequestException as e:
+            print(f"Erro ao buscar repositórios: {e}")
+            for future in futures:
+                future.cancel()
+            return []
+    return all_repos
+
+
+def _fetch_languages(session, repo, gate):
+    """Bytes por linguagem de um repositório (endpoint languages_url), com a mesma espera de limite da busca."""
+    for attempt in range(MAX_RETRIES + 1):
+        gate.wait()
+        response = session.get(repo['languages_url'], timeout=30)
+        delay = _retry_delay(response, attempt)
+        if delay is None or attempt == MAX_RETRIES:
+            response.raise_for_status()
+            return response.json()
+        gate.block_for(delay)
+
+
+def fetch_language_bytes(repos, headers, max_workers=MAX_CONCURRENT_REQUESTS):
+    """
+    Preenche repo['java_bytes'] com os bytes de código Java de cada repositório.
+
+    O 'size' da busca inclui o histórico do git e arquivos que o CK não lê;
+    os bytes de Java estimam melhor o custo da análise. Custa uma requisição
+    por repositório; repositórios cuja consulta falhar ficam sem o campo.
+    """
+    print(f"Consultando as linguagens de {len(repos)} repositórios...")
+    gate = _RateLimitGate()
+    with create_session(headers, max_workers) as session, \
+            ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='github') as executor:
+        futures = {executor.submit(_fetch_languages, session, repo, gate): repo
+                   for repo in repos if repo.get('languages_url')}
+        failed = 0
+        for future, repo in futures.items():
+            try:
+                repo['java_bytes'] = future.result().get('Java', 0)
+            except requests.exceptions.RequestException:
+                failed += 1
+    if failed:
+        print(f"⚠️ {failed} repositórios sem dados de linguagem; usando o tamanho da busca para eles.")
@@ -0,0 +1,106 @@
+import os
+import json
+from datetime import datetime
+
+
+# --- CONFIGURAÇÕES GLOBAIS ---
+JOURNAL_PATH = "resultados_journal.jsonl"
+
+
+def _to_json(value):
+    """Converte tipos do NumPy (np.int64, np.bool_...) para tipos nativos do JSON."""
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+class ResultJournal:
+    """
+    Diário append-only (JSONL) com o resultado de cada repositório.
+
+    Cada linha registra um repositório assim que ele termina: o status
+    ('success', 'failed', 'no_metrics', 'skipped', 'timeout' ou 'oom'), o
+    detalhe do erro, estatísticas da execução (ex.: bytes baixados pelo
+    clone) e, em caso de sucesso, a linha completa do
+    resultados_completos.csv. Cada
+    registro é gravado com flush + fsync, então uma queda do processo perde
+    no máximo o repositório que estava em andamento. Uma última linha
+    truncada por uma queda é ignorada na leitura.
+    """
+
+    def __init__(self, path=JOURNAL_PATH):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def open(self):
+        self._file = open(self.path, 'a', encoding='utf-8')
+        # Uma queda no meio de uma gravação deixa a última linha sem '\n'; isola-a
+        if self._file.tell() > 0:
+            with open(self.path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    self._file.write('\n')
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def rotate(self):
+        """Move um diário existente para <path>.bak, para começar uma coleta do zero."""
+        if os.path.exists(self.path):
+            os.replace(self.path, self.path + '.bak')
+            print(f"🗂️ Diário anterior movido para '{self.path}.bak'")
+
+    def append(self, index, repository, status, summary=None, detail=None, stats=None):
+        record = {
+            'index': index,
+            'repository': repository,
+            'status': status,
+            'detail': detail,
+            'stats': stats or {},
+            'finished_at': datetime.now().isoformat(timespec='seconds'),
+            'summary': summary,
+        }
+        self._file.write(json.dumps(record, ensure_ascii=False, default=_to_json) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def records(self):
+        """Lê o diário em uma única passada; o último registro de cada repositório prevalece."""
+        latest = {}
+        if not os.path.exists(self.path):
+            return latest
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Linha incompleta deixada por uma interrupção
+                latest[record['repository']] = record
+        return latest
+
+    def completed(self, exclude_statuses=()):
+        """Nomes dos repositórios que já têm um resultado registrado (exceto com os status em exclude_statuses)."""
+        return {name for name, record in self.records().items() if record['status'] not in exclude_statuses}
+
+    def successful_summaries(self, order=None):
+        """
+        Linhas de resultado dos repositórios bem-sucedidos, na ordem da
+        execução atual (order: nome -> posição na lista de repositórios).
+        O 'index' gravado é a posição na execução que registrou a linha, e
+        uma retomada com uma busca nova muda as posições; repositórios fora
+        de order (de execuções anteriores) vão para o fim, por estrelas.
+        """
+        order = order or {}
+        successes = [r for r in self.records().values() if r['status'] == 'success']
+        successes.sort(key=lambda r: (0, order[r['repository']], 0) if r['repository'] in order
+                       else (1, -(r['summary'] or {}).get('stars', 0), r['index']))
+        return [r['summary'] for r in successes]
@@ -0,0 +1,153 @@
+import os
+import signal
+import threading
+import subprocess
+
+
+# --- CONFIGURAÇÕES GLOBAIS ---
+GIT_TIMEOUT_SECONDS = int(os.getenv('GIT_TIMEOUT_SECONDS', '1800'))  # Tempo máximo de cada comando git
+# Espaço de endereçamento (ulimit -v) de cada processo git, opcional (0 = sem limite): o endereçamento
+# reservado pelo git passa muito da memória que ele usa de fato, e um limite baixo o derruba sem falta de memória
+GIT_AS_LIMIT_MB = int(os.getenv('GIT_AS_LIMIT_MB', '0'))
+CK_TIMEOUT_SECONDS = int(os.getenv('CK_TIMEOUT_SECONDS', '3600'))  # Tempo máximo do CK em um repositório
+CK_CPU_LIMIT_SECONDS = int(os.getenv('CK_CPU_LIMIT_SECONDS', '0'))  # Tempo de CPU do CK (0 = sem limite)
+CK_MIN_HEAP_MB = int(os.getenv('CK_MIN_HEAP_MB', '512'))
+CK_MAX_HEAP_MB = int(os.getenv('CK_MAX_HEAP_MB', '16384'))
+JVM_NATIVE_MB = int(os.getenv('JVM_NATIVE_MB', '4096'))  # Memória da JVM além do heap (metaspace, JIT, pilhas)
+OOM_MARKERS = ('OutOfMemoryError', 'Cannot allocate memory', 'out of memory', 'Could not reserve enough space')
+
+# Subprocessos em andamento: rodam em sessões próprias e não recebem o Ctrl+C, então cancel_all() os mata
+_live_processes = set()
+_live_lock = threading.Lock()
+_cancelled = threading.Event()
+
+
+class JobKilled(subprocess.CalledProcessError):
+    """
+    Subprocesso interrompido por um limite. `outcome` é 'timeout' (tempo
+    de relógio ou de CPU) ou 'oom' (heap da JVM, GIT_AS_LIMIT_MB ou OOM
+    killer), e vira o status do repositório no diário; ou 'cancelled',
+    quando o processo foi morto (ou nem começou) por causa de cancel_all().
+    """
+
+    def __init__(self, outcome, reason, returncode, cmd, output=None, stderr=None):
+        super().__init__(returncode, cmd, output, stderr)
+        self.outcome = outcome
+        self.reason = reason
+
+    def __str__(self):
+        return self.reason
+
+
+def limited_command(cmd, address_space_mb=0, cpu_seconds=0):
+    """
+    Prefixa o comando com `ulimit` (em um sh que faz exec do comando), para
+    que os limites valham desde o primeiro instante do processo. É seguro
+    com threads, ao contrário de preexec_fn. Fora de sistemas POSIX o
+    comando é devolvido sem limites (o tempo limite ainda se aplica).
+    """
+    if os.name != 'posix' or not (address_space_mb or cpu_seconds):
+        return list(cmd)
+    limits = []
+    if address_space_mb:
+        limits.append(f'ulimit -v {int(address_space_mb) * 1024}')
+    if cpu_seconds:
+        limits.append(f'ulimit -t {int(cpu_seconds)}')
+    return ['/bin/sh', '-c', ' && '.join(limits) + ' && exec "$@"', 'sh', *cmd]
+
+
+def kill_process_tree(process):
+    """Mata o processo e os filhos dele (ex.: git-remote-https, index-pack)."""
+    try:
+        if os.name == 'posix':
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def start_process(cmd, **kwargs):
+    """
+    subprocess.Popen em uma sessão própria, registrado para que cancel_all()
+    possa matá-lo; chame forget_process() quando ele terminar. Depois de
+    um cancel_all(), lança JobKilled('cancelled') sem iniciar o processo.
+    """
+    with _live_lock:
+        if _cancelled.is_set():
+            raise JobKilled('cancelled', f"{cmd[0]} não iniciado: execução cancelada", -9, cmd)
+        process = subprocess.Popen(cmd, start_new_session=os.name == 'posix', **kwargs)
+        _live_processes.add(process)
+    return process
+
+
+def forget_process(process):
+    with _live_lock:
+        _live_processes.discard(process)
+
+
+def cancel_all():
+    """
+    Mata todos os subprocessos em andamento (com os filhos) e impede que
+    novos comecem. Usado no Ctrl+C: os subprocessos rodam em sessões
+    próprias e não recebem o SIGINT do terminal.
+    """
+    with _live_lock:
+        _cancelled.set()
+        processes = list(_live_processes)
+    for process in processes:
+        kill_process_tree(process)
+
+
+def cancelled():
+    return _cancelled.is_set()
+
+
+def classify_exit(returncode, stderr, cpu_limited=False):
+    """'timeout', 'oom' ou None (falha comum) para um processo que terminou com erro."""
+    if returncode < 0:
+        if -returncode == getattr(signal, 'SIGXCPU', None) or (cpu_limited and -returncode == signal.SIGKILL):
+            return 'timeout'
+        if -returncode == signal.SIGKILL:
+            return 'oom'  # SIGKILL que não veio de nós: o OOM killer do kernel
+    if stderr and any(marker in stderr for marker in OOM_MARKERS):
+        return 'oom'
+    return None
+
+
+def run_limited(cmd, timeout=None, address_space_mb=0, cpu_seconds=0, cwd=None):
+    """
+    subprocess.run com tempo limite, limites de endereçamento e de CPU.
+
+    O processo roda em uma sessão própria (ver start_process), então no
+    tempo limite ou em um cancel_all() o grupo inteiro é morto, e não só o
+    processo principal. Lança JobKilled quando um limite é atingido ou a
+    execução é cancelada e CalledProcessError nas demais falhas.
+    """
+    process = start_process(
+        limited_command(cmd, address_space_mb, cpu_seconds), cwd=cwd,
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding='utf-8', errors='replace'
+    )
+    try:
+        stdout, stderr = process.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        kill_process_tree(process)
+        stdout, stderr = process.communicate()
+        raise JobKilled('timeout', f"Tempo limite de {timeout}s excedido por {cmd[0]}",
+                        process.returncode, cmd, stdout, stderr)
+    finally:
+        forget_process(process)
+
+    if process.returncode != 0:
+        if cancelled():
+            raise JobKilled('cancelled', f"{cmd[0]} interrompido: execução cancelada",
+                            process.returncode, cmd, stdout, stderr)
+        outcome = classify_exit(process.returncode, stderr, cpu_limited=bool(cpu_seconds))
+        if outcome == 'timeout':
+            raise JobKilled(outcome, f"Limite de {cpu_seconds}s de CPU excedido por {cmd[0]}",
+                            process.returncode, cmd, stdout, stderr)
+        if outcome == 'oom':
+            raise JobKilled(outcome, f"Memória esgotada em {cmd[0]} (código {process.returncode})",
+                            process.returncode, cmd, stdout, stderr)
+        raise subprocess.CalledProcessError(process.returncode, cmd, stdout, stderr)
+    return subprocess.CompletedProcess(cmd, process.returncode, stdout, stderr)
@@ -1,13 +1,19 @@
 import os
-import requests
 import subprocess
 import csv
 import shutil
 import stat
+import tempfile
 import numpy as np
 from datetime import datetime
 from dotenv import load_dotenv
 
+import github_api
+import replay
+import results_table
+from ck_runner import ck_args
+from ck_metrics import load_ck_columns
+
 
 # --- FUNÇÃO DE AJUDA PARA DELEÇÃO DE ARQUIVOS (WINDOWS) ---
 def remove_readonly(func, path, exc_info):
@@ -19,15 +25,8 @@ def remove_readonly(func, path, exc_info):
 
 # --- CONFIGURAÇÕES GLOBAIS ---
 load_dotenv()  # Carrega variáveis de ambiente do arquivo .env, se existir
-GITHUB_TOKEN = os.getenv('GITHUB_TOKEN')
-if not GITHUB_TOKEN:
-    # Substitua pela sua chave caso não queira usar variáveis de ambiente
-    GITHUB_TOKEN = "SEU_TOKEN_AQUI"
-    if GITHUB_TOKEN == "SEU_TOKEN_AQUI":
-        raise ValueError(
-            "Token do GitHub não encontrado! Defina a variável de ambiente GITHUB_TOKEN ou substitua no código.")
-
-headers = {'Authorization': f'token {GITHUB_TOKEN}'}
+# Substitua pela sua chave caso não queira usar variáveis de ambiente; só é exigida ao consultar a API
+GITHUB_TOKEN = os.getenv('GITHUB_TOKEN', "SEU_TOKEN_AQUI")
 CLONE_DIR = "temp_repos"
 RESULTS_DIR = "ck_metrics"
 CK_JAR_PATH = "ck.jar"  # Renomeie o 'primeiro.jar' para 'ck.jar' ou mude esta variável
@@ -35,19 +34,7 @@ CK_JAR_PATH = "ck.jar"  # Renomeie o 'primeiro.jar' para 'ck.jar' ou mude esta v
 
 # --- FUNÇÕES PRINCIPAIS ---
 def fetch_github_repos():
-    print("Buscando repositórios no GitHub...")
-    all_repos = []
-    try:
-        for page in range(1, 11):
-            url = f'https://api.github.com/search/repositories?q=language:java&sort=stars&order=desc&per_page=100&page={page}'
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            all_repos.extend(response.json()['items'])
-            print(f"Página {page}/10... {len(all_repos)} repositórios encontrados.")
-    except requests.exceptions.RequestException as e:
-        print(f"Erro ao buscar repositórios: {e}")
-        return []
-    return all_repos
+    return github_api.fetch_github_repos(github_api.auth_headers(GITHUB_TOKEN))
 
 
 def process_repositories(repos_to_process):
@@ -58,12 +45,12 @@ def process_repositories(repos_to_process):
         repo_full_name = repo['full_name']
         safe_repo_name = repo_full_name.replace('/', '_')
         repo_path = os.path.join(CLONE_DIR, safe_repo_name)
-        metrics_path = os.path.join(RESULTS_DIR, safe_repo_name)
+        # Diretório de job exclusivo: execuções simultâneas nunca gravam nas mesmas saídas do CK
+        metrics_path = tempfile.mkdtemp(prefix=f"{safe_repo_name}-", dir=os.path.abspath(RESULTS_DIR))
 
         print(f"\n--- Processando {i + 1}/{total_to_process}: {repo_full_name} ---")
 
         try:
-            os.makedirs(metrics_path, exist_ok=True)
             print(f"Clonando {repo['clone_url']}...")
             subprocess.run(
                 ['git', 'clone', '--depth', '1', repo['clone_url'], repo_path],
@@ -71,59 +58,46 @@ def process_repositories(repos_to_process):
             )
 
             print("Executando a análise do CK...")
+            # Diretório de saída explícito e cwd no diretório do job: nada é gravado no diretório corrente
             result = subprocess.run(
-                ['java', '-jar', CK_JAR_PATH, repo_path, metrics_path],
-                capture_output=True, text=True, encoding='utf-8'
+                ['java', '-jar', os.path.abspath(CK_JAR_PATH), *ck_args(os.path.abspath(repo_path), metrics_path)],
+                capture_output=True, text=True, encoding='utf-8', cwd=metrics_path
             )
             result.check_returncode()
 
-            # =======================================================================
-            # **** LÓGICA CORRIGIDA PARA ENCONTRAR OS ARQUIVOS CSV ****
-            # Verifica se o CK gerou os arquivos na pasta raiz do projeto.
-            # =======================================================================
-            generated_files_in_root = ['class.csv', 'method.csv', 'field.csv', 'variable.csv']
-            source_csv_path = 'class.csv'
-
-            if os.path.exists(source_csv_path):
-                # Move o arquivo principal para o diretório de resultados correto
-                dest_csv_path = os.path.join(metrics_path, 'class.csv')
-                shutil.move(source_csv_path, dest_csv_path)
-
-                # Limpa outros arquivos CSV gerados na raiz
-                for f in generated_files_in_root:
-                    if f != 'class.csv' and os.path.exists(f):
-                        os.remove(f)
-
-                # Agora, o script vai encontrar o arquivo no local certo
-                with open(dest_csv_path, 'r', encoding='utf-8') as f:
-                    reader = list(csv.DictReader(f))
-                    if reader:
+            dest_csv_path = os.path.join(metrics_path, 'class.csv')
+            if os.path.exists(dest_csv_path):
+                values, invalid = load_ck_columns(dest_csv_path, ('cbo', 'dit', 'lcom'))
+                if invalid:
+                    print(f"⚠️ Valores inválidos descartados: {invalid}")
+                if values:
+                    age_days = None  # Listas de replay (full_name,clone_url) não têm a data de criação
+                    if repo.get('created_at'):
                         created_at = datetime.strptime(repo['created_at'], "%Y-%m-%dT%H:%M:%SZ")
                         age_days = (datetime.now() - created_at).days
 
-                        cbo_values = [float(row['cbo']) for row in reader if row['cbo'].replace('.', '', 1).isdigit()]
-                        dit_values = [float(row['dit']) for row in reader if row['dit'].replace('.', '', 1).isdigit()]
-                        lcom_values = [float(row['lcom']) for row in reader if
-                                       row['lcom'].replace('.', '', 1).isdigit()]
-
-                        if not cbo_values:
-                            print("⚠️ Nenhuma métrica válida encontrada no CSV.")
-                            continue
-
-                        repo_summary = {
-                            'repository': repo_full_name,
-                            'stars': repo.get('stargazers_count', 0),
-                            'age_days': age_days,
-                            'cbo_mean': np.mean(cbo_values), 'dit_mean': np.mean(dit_values),
-                            'lcom_mean': np.mean(lcom_values),
-                            'cbo_median': np.median(cbo_values), 'dit_median': np.median(dit_values),
-                            'lcom_median': np.median(lcom_values),
-                            'cbo_std': np.std(cbo_values), 'dit_std': np.std(dit_values),
-                            'lcom_std': np.std(lcom_values)
-                        }
-                        all_repo_metrics.append(repo_summary)
-                        print(
-                            f"✅ Métricas sumarizadas: CBO Médio={repo_summary['cbo_mean']:.2f}, LCOM Médio={repo_summary['lcom_mean']:.2f}")
+                    cbo_values = values.get('cbo', np.empty(0))
+                    dit_values = values.get('dit', np.empty(0))
+                    lcom_values = values.get('lcom', np.empty(0))
+
+                    if not len(cbo_values):
+                        print("⚠️ Nenhuma métrica válida encontrada no CSV.")
+                        continue
+
+                    repo_summary = {
+                        'repository': repo_full_name,
+                        'stars': repo.get('stargazers_count', 0),
+                        'age_days': age_days,
+                        'cbo_mean': np.mean(cbo_values), 'dit_mean': np.mean(dit_values),
+                        'lcom_mean': np.mean(lcom_values),
+                        'cbo_median': np.median(cbo_values), 'dit_median': np.median(dit_values),
+                        'lcom_median': np.median(lcom_values),
+                        'cbo_std': np.std(cbo_values), 'dit_std': np.std(dit_values),
+                        'lcom_std': np.std(lcom_values)
+                    }
+                    all_repo_metrics.append(repo_summary)
+                    print(
+                        f"✅ Métricas sumarizadas: CBO Médio={repo_summary['cbo_mean']:.2f}, LCOM Médio={repo_summary['lcom_mean']:.2f}")
             else:
                 print("⚠️ Nenhuma métrica gerada (provavelmente não é um projeto de código Java).")
 
@@ -152,6 +126,9 @@ def save_results_to_csv(metrics):
             writer = csv.DictWriter(f, fieldnames=metrics[0].keys())
             writer.writeheader()
             writer.writerows(metrics)
+        typed_path = results_table.write_typed(metrics, final_csv_path)
+        if typed_path:
+            print(f"🗃️ Arquivo tipado salvo em '{typed_path}'")
         print("✨ Processo concluído com sucesso! ✨")
     except Exception as e:
         print(f"Erro ao salvar o arquivo CSV final: {e}")
@@ -162,16 +139,17 @@ def main():
         print(f"ERRO: Arquivo '{CK_JAR_PATH}' não encontrado.")
         return
 
-    # Limpa diretórios de execuções anteriores
+    # Limpa os clones de execuções anteriores; RESULTS_DIR fica, pois outra execução pode estar usando
+    # um diretório de job dentro dele (cada job apaga o seu)
     if os.path.exists(CLONE_DIR):
         shutil.rmtree(CLONE_DIR, onerror=remove_readonly)
-    if os.path.exists(RESULTS_DIR):
-        shutil.rmtree(RESULTS_DIR, onerror=remove_readonly)
 
     os.makedirs(CLONE_DIR, exist_ok=True)
     os.makedirs(RESULTS_DIR, exist_ok=True)
 
-    all_repos = fetch_github_repos()
+    # REPOS_FILE: lista full_name,clone_url ou snapshot JSON da busca, sem consultar a API
+    repos_file = os.getenv('REPOS_FILE')
+    all_repos = replay.load_repos(repos_file) if repos_file else fetch_github_repos()
     if all_repos:
         metrics_data = process_repositories(all_repos[:5])  # Testando com os 5 primeiros
         save_results_to_csv(metrics_data)
@@ -1,14 +1,35 @@
 import os
-import requests
 import subprocess
 import csv
 import shutil
 import stat
-import numpy as np
-import pandas as pd
+import threading
+import queue
+import time
+import tempfile
+import argparse
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import nullcontext
 from datetime import datetime
 from dotenv import load_dotenv
 
+import github_api
+import replay
+from journal import ResultJournal, JOURNAL_PATH
+from metrics_cache import MetricsCache, METRICS_CACHE_PATH, resolve_head_shas
+from ck_metrics import summarize_class_csv
+import warehouse
+import results_table
+import tracing
+from mirror_store import MirrorStore, MIRROR_DIR, MIRROR_BUDGET_MB
+from cleanup import BackgroundCleaner, CLEANUP_WORKERS
+import ck_runner
+from admission import AdmissionController, MIN_FREE_DISK_MB, MIN_FREE_RAM_MB, POLL_SECONDS, ck_heap_mb, server_heap_mb
+import limits
+from limits import JobKilled
+from scheduler import (JobHistory, JOB_HISTORY_PATH, MakespanTracker, cost_feature_kb, estimate_costs,
+                       longest_first)
+
 
 # --- FUNÇÃO DE AJUDA PARA DELEÇÃO DE ARQUIVOS (WINDOWS) ---
 def remove_readonly(func, path, exc_info):
@@ -34,327 +55,781 @@ def remove_readonly(func, path, exc_info):
 
 # --- CONFIGURAÇÕES GLOBAIS ---
 load_dotenv()  # Carrega variáveis de ambiente do arquivo .env, se existir
-GITHUB_TOKEN = os.getenv('GITHUB_TOKEN')
-if not GITHUB_TOKEN:
-    # Substitua pela sua chave caso não queira usar variáveis de ambiente
-    GITHUB_TOKEN = "SEU_TOKEN_AQUI"
-    if GITHUB_TOKEN == "SEU_TOKEN_AQUI":
-        raise ValueError(
-            "Token do GitHub não encontrado! Defina a variável de ambiente GITHUB_TOKEN ou substitua no código.")
-
-headers = {'Authorization': f'token {GITHUB_TOKEN}'}
+# Substitua pela sua chave caso não queira usar variáveis de ambiente; só é exigida ao consultar a API
+GITHUB_TOKEN = os.getenv('GITHUB_TOKEN', "SEU_TOKEN_AQUI")
 CLONE_DIR = "temp_repos"
-RESULTS_DIR = "ck_metrics"
+RESULTS_DIR = "ck_metrics"  # Cada execução do CK usa um subdiretório temporário exclusivo aqui
 CK_JAR_PATH = "ck.jar"  # Renomeie o 'primeiro.jar' para 'ck.jar' ou mude esta variável
+CK_VARIABLES_AND_FIELDS = False  # Métricas de variáveis/campos (field.csv, variable.csv) não são usadas
+CK_OUTPUT_FILES = ('class.csv', 'method.csv', 'field.csv', 'variable.csv')
+CK_MODE = os.getenv('CK_MODE', 'process')  # 'process' (uma JVM por repositório) ou 'server' (JVM persistente por worker)
+CK_SERVER_HEAP_MB = limits.CK_MAX_HEAP_MB  # Heap fixo de cada JVM persistente (ver admission.server_heap_mb)
+_ck_servers = threading.local()  # CKServer de cada worker (CK_MODE='server')
+_ck_servers_lock = threading.Lock()
+_all_ck_servers = []
+MAX_WORKERS = int(os.getenv('MAX_WORKERS', '1'))  # Repositórios processados em paralelo (1 = serial)
+PREFETCH_BUDGET_MB = int(os.getenv('PREFETCH_BUDGET_MB', '0'))  # Espaço máximo para clones adiantados (0 = sem pipeline)
+PREFETCH_MAX_REPOS = int(os.getenv('PREFETCH_MAX_REPOS', '8'))  # Máximo de clones adiantados aguardando o CK
+METRICS_VERSION = 3  # Incrementar sempre que calculate_additional_metrics mudar (invalida o cache)
+MEDIAN_MODE = os.getenv('MEDIAN_MODE', 'exact')  # 'exact' ou 'sketch' (mediana aproximada por amostragem)
+CLONE_STRATEGY = os.getenv('CLONE_STRATEGY', 'full')  # 'full' ou 'sparse' (clone parcial só com Java e build)
+SPARSE_PATTERNS = ['*.java', 'pom.xml', '*.gradle', '*.gradle.kts', 'gradle.properties', 'build.xml']
+CK_TIMEOUT = limits.CK_TIMEOUT_SECONDS  # Tempo limite do CK por repositório (s)
+GIT_TIMEOUT = limits.GIT_TIMEOUT_SECONDS  # Tempo limite de cada comando git (s)
+CK_HEAP_SCALE = float(os.getenv('CK_HEAP_SCALE', '1.0'))  # Multiplicador do heap estimado para o CK
+KILLED_STATUSES = ('timeout', 'oom')  # Jobs interrompidos por um limite; podem ser repetidos com --retry
+MIRRORS = None  # MirrorStore com os espelhos bare persistentes (None = clona direto do GitHub)
+SPANS = None  # tracing.SpanRecorder com a duração de cada estágio de cada repositório (None = desativado)
+CLEANER = None  # BackgroundCleaner que apaga clones e jobs fora do caminho crítico (None = remoção imediata)
+TRASH_DIR = CLONE_DIR + '.trash'  # Mesmo sistema de arquivos de CLONE_DIR, para a renomeação ser instantânea
+WAREHOUSE_DIR = os.getenv('WAREHOUSE_DIR', warehouse.WAREHOUSE_DIR)  # Armazém do class.csv de cada repo (None = desativado)
 
 
 # --- FUNÇÕES PRINCIPAIS ---
-def should_skip_repo(repo):
-    """Verifica se um repositório deve ser pulado devido a problemas conhecidos"""
-    repo_name = repo['full_name'].lower()
-    
-    # Repositórios conhecidos por terem problemas no Windows
-    problematic_repos = {
-        'spring-projects/spring-boot': 'Filename too long (Windows limitation)',
-        'elastic/elasticsearch': 'Muito grande + filename issues',
-        'apache/hadoop': 'Muito grande (>500MB)',
-        'apache/kafka': 'Muito grande (>200MB)',
-        'apache/spark': 'Muito grande (>300MB)',
+def fetch_github_repos():
+    return github_api.fetch_github_repos(github_api.auth_headers(GITHUB_TOKEN))
+
+
+def calculate_additional_metrics(class_csv_path, median_mode=MEDIAN_MODE, timings=None, table=None):
+    """
+    Calcula métricas adicionais para análise de qualidade a partir do class.csv do CK.
+
+    O arquivo é lido uma única vez, em blocos e só com as colunas usadas
+    (ver ck_metrics.summarize_class_csv); se a tabela Arrow do armazém já
+    foi lida (table), as métricas vêm dela, sem ler o arquivo de novo.
+    Células que não são números são descartadas e contadas no aviso
+    impresso. Com um dict em timings, grava nele o tempo de leitura
+    ('parse') e de agregação ('aggregate').
+    """
+    if table is not None:
+        metrics, invalid = warehouse.summarize_table(table, median_mode, timings)
+    else:
+        metrics, invalid = summarize_class_csv(class_csv_path, median_mode=median_mode, timings=timings)
+    if invalid:
+        details = ', '.join(f"{column}: {count}" for column, count in invalid.items())
+        print(f"⚠️ Valores inválidos descartados em {class_csv_path} ({details})")
+    return metrics
+
+
+def _worker_name():
+    """Nome do worker atual (threads do pool são nomeadas 'worker_N')."""
+    name = threading.current_thread().name
+    return name if name.startswith('worker') else 'worker_0'
+
+
+def repo_metadata(repo):
+    """Campos da linha de resultado que vêm da API do GitHub (atualizados a cada coleta)."""
+    age_days = age_years = None  # Listas de replay (full_name,clone_url) não têm a data de criação
+    if repo.get('created_at'):
+        created_at = datetime.strptime(repo['created_at'], "%Y-%m-%dT%H:%M:%SZ")
+        age_days = (datetime.now() - created_at).days
+        age_years = age_days / 365.25
+
+    # Dados do repositório
+    return {
+        'repository': repo['full_name'],
+        'stars': repo.get('stargazers_count', 0),
+        'forks': repo.get('forks_count', 0),
+        'watchers': repo.get('watchers_count', 0),
+        'open_issues': repo.get('open_issues_count', 0),
+        'size_kb': repo.get('size', 0),
+        'language': repo.get('language', 'Java'),
+        'created_at': repo.get('created_at', ''),
+        'updated_at': repo.get('updated_at', ''),
+        'pushed_at': repo.get('pushed_at', ''),
+        'age_days': age_days,
+        'age_years': age_years,
+        'has_wiki': repo.get('has_wiki', False),
+        'has_pages': repo.get('has_pages', False),
+        'has_downloads': repo.get('has_downloads', False),
+        'has_issues': repo.get('has_issues', True),
+        'has_projects': repo.get('has_projects', False),
+        'archived': repo.get('archived', False),
+        'disabled': repo.get('disabled', False),
+        'fork': repo.get('fork', False),
+        'private': repo.get('private', False),
+        'license': repo.get('license', {}).get('name', '') if repo.get('license') else '',
+        'topics': ', '.join(repo.get('topics', [])),
+        'default_branch': repo.get('default_branch', 'main'),
     }
-    
-    if repo_name in problematic_repos:
-        return True, problematic_repos[repo_name]
-    
-    # Filtros por tamanho (se disponível) - mais conservador
-    if 'size' in repo:
-        size_mb = repo['size'] / 1024  # Converter para MB
-        if size_mb > 500:  # Apenas repositórios > 500MB
-            return True, f"Repositório muito grande ({size_mb:.1f}MB)"
-        elif size_mb > 200:  # Aviso para repositórios grandes
-            return False, f"Repositório grande ({size_mb:.1f}MB) - processando com cuidado"
-    
-    # Filtros por número de arquivos (se disponível)
-    if 'size' in repo and repo['size'] > 50000:  # Muitos arquivos
-        return False, f"Muitos arquivos ({repo['size']} arquivos) - processando com cuidado"
-        
-    return False, "Repositório OK para processamento"
 
 
-def fetch_github_repos():
-    print("Buscando repositórios no GitHub...")
-    all_repos = []
+def build_repo_summary(repo, basic_metrics):
+    """Monta a linha de resultado de um repositório (metadados do GitHub + métricas do CK)."""
+    repo_summary = repo_metadata(repo)
+
+    # Adiciona todas as métricas calculadas
+    repo_summary.update(basic_metrics)
+    return repo_summary
+
+
+def _with_cached(cached_outcomes, runner):
+    """Entrega primeiro os resultados vindos do cache e depois os do executor."""
     try:
-        for page in range(1, 11):
-            url = f'https://api.github.com/search/repositories?q=language:java&sort=stars&order=desc&per_page=100&page={page}'
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            all_repos.extend(response.json()['items'])
-            print(f"Página {page}/10... {len(all_repos)} repositórios encontrados.")
-    except requests.exceptions.RequestException as e:
-        print(f"Erro ao buscar repositórios: {e}")
-        return []
-    return all_repos
-
-
-def calculate_additional_metrics(csv_data):
-    """Calcula métricas adicionais para análise de qualidade"""
-    if not csv_data:
-        return {}
-    
-    # Converte para DataFrame para facilitar cálculos
-    df = pd.DataFrame(csv_data)
-    
-    # Métricas de complexidade
-    wmc_values = [float(row['wmc']) for row in csv_data if row['wmc'].replace('.', '', 1).isdigit()]
-    rfc_values = [float(row['rfc']) for row in csv_data if row['rfc'].replace('.', '', 1).isdigit()]
-    cbo_values = [float(row['cbo']) for row in csv_data if row['cbo'].replace('.', '', 1).isdigit()]
-    dit_values = [float(row['dit']) for row in csv_data if row['dit'].replace('.', '', 1).isdigit()]
-    lcom_values = [float(row['lcom']) for row in csv_data if row['lcom'].replace('.', '', 1).isdigit()]
-    noc_values = [float(row['noc']) for row in csv_data if row['noc'].replace('.', '', 1).isdigit()]
-    
-    metrics = {}
-    
-    if wmc_values:
-        metrics.update({
-            'wmc_mean': np.mean(wmc_values),
-            'wmc_median': np.median(wmc_values),
-            'wmc_std': np.std(wmc_values),
-            'wmc_max': np.max(wmc_values),
-            'wmc_min': np.min(wmc_values)
-        })
-    
-    if rfc_values:
-        metrics.update({
-            'rfc_mean': np.mean(rfc_values),
-            'rfc_median': np.median(rfc_values),
-            'rfc_std': np.std(rfc_values),
-            'rfc_max': np.max(rfc_values),
-            'rfc_min': np.min(rfc_values)
-        })
-    
-    if cbo_values:
-        metrics.update({
-            'cbo_mean': np.mean(cbo_values),
-            'cbo_median': np.median(cbo_values),
-            'cbo_std': np.std(cbo_values),
-            'cbo_max': np.max(cbo_values),
-            'cbo_min': np.min(cbo_values)
-        })
-    
-    if dit_values:
-        metrics.update({
-            'dit_mean': np.mean(dit_values),
-            'dit_median': np.median(dit_values),
-            'dit_std': np.std(dit_values),
-            'dit_max': np.max(dit_values),
-            'dit_min': np.min(dit_values)
-        })
-    
-    if lcom_values:
-        metrics.update({
-            'lcom_mean': np.mean(lcom_values),
-            'lcom_median': np.median(lcom_values),
-            'lcom_std': np.std(lcom_values),
-            'lcom_max': np.max(lcom_values),
-            'lcom_min': np.min(lcom_values)
-        })
-    
-    if noc_values:
-        metrics.update({
-            'noc_mean': np.mean(noc_values),
-            'noc_median': np.median(noc_values),
-            'noc_std': np.std(noc_values),
-            'noc_max': np.max(noc_values),
-            'noc_min': np.min(noc_values)
-        })
-    
-    # Métricas de qualidade calculadas
-    if wmc_values and cbo_values:
-        # Complexidade média ponderada
-        complexity_scores = [w + c for w, c in zip(wmc_values, cbo_values)]
-        metrics['complexity_mean'] = np.mean(complexity_scores)
-        metrics['complexity_std'] = np.std(complexity_scores)
-    
-    if lcom_values:
-        # Coesão média (inverso do LCOM)
-        cohesion_scores = [1.0 / (l + 1) for l in lcom_values]
-        metrics['cohesion_mean'] = np.mean(cohesion_scores)
-        metrics['cohesion_std'] = np.std(cohesion_scores)
-    
-    # Contagem de classes
-    metrics['total_classes'] = len(csv_data)
-    
-    return metrics
+        yield from cached_outcomes
+        yield from runner
+    finally:
+        runner.close()
+
+
+def _span(repository, stage, **attrs):
+    """Mede um estágio de um repositório em SPANS (sem efeito se os spans estiverem desativados)."""
+    return SPANS.span(repository, stage, **attrs) if SPANS else nullcontext(attrs)
+
+
+def _remove_tree(path):
+    """
+    Remove um diretório de trabalho, tentando novamente em caso de arquivos bloqueados.
+    Retorna True se foi preciso recorrer à nova tentativa.
+    """
+    try:
+        if os.path.exists(path):
+            shutil.rmtree(path, onerror=remove_readonly)
+        return False
+    except Exception as e:
+        print(f"⚠️ Aviso: Não foi possível limpar {path}: {e}")
+        # Tenta forçar a limpeza
+        try:
+            time.sleep(0.5)
+            shutil.rmtree(path, ignore_errors=True)
+        except:
+            pass
+        return True
+
+
+def _cleanup_dir(path, repository=None):
+    """
+    Tira um diretório de trabalho do caminho: com CLEANER, ele é movido para
+    a lixeira e apagado em segundo plano; sem, é removido na hora
+    (_remove_tree). Retorna True se a remoção imediata precisou de nova tentativa.
+    """
+    if CLEANER:
+        CLEANER.discard(path, repository)
+        return False
+    return _remove_tree(path)
+
+
+def _cleanup_clone(repo, repo_path):
+    """
+    Apaga o clone de um repositório, registrando o tempo gasto como o estágio
+    'cleanup' (com CLEANER, só a renomeação; a remoção vira 'trash_delete').
+    """
+    with _span(repo['full_name'], 'cleanup', background=bool(CLEANER)) as span:
+        span['retried'] = _cleanup_dir(repo_path, repo['full_name'])
+    if MIRRORS:
+        MIRRORS.release(repo['full_name'])
+
+
+# No Windows, caminhos com mais de 260 caracteres (ex.: spring-boot) só funcionam com core.longpaths
+_LONGPATHS = ('-c', 'core.longpaths=true') if os.name == 'nt' else ()
+
+
+def _git(*args):
+    return limits.run_limited(['git', *_LONGPATHS, *args],
+                              timeout=GIT_TIMEOUT or None, address_space_mb=limits.GIT_AS_LIMIT_MB)
+
+
+def clone_repository(repo, repo_path, strategy=None):
+    """
+    Clona o repositório (apenas o último commit) em repo_path.
+
+    Estratégias (CLONE_STRATEGY):
+    - 'full': git clone --depth 1 tradicional, com todos os arquivos;
+    - 'sparse': clone parcial (--filter=blob:none, --single-branch,
+      --no-tags) com sparse checkout limitado a SPARSE_PATTERNS, de modo que
+      só os blobs de código Java e arquivos de build são baixados.
+
+    Com MIRRORS, o espelho bare local do repositório é atualizado (fetch
+    incremental) e a árvore de trabalho é extraída dele (ver MirrorStore);
+    no modo 'sparse', o espelho não guarda blobs e só os de SPARSE_PATTERNS
+    são baixados, no checkout.
+
+    Retorna os bytes baixados (tamanho de .git/objects após o checkout, ou
+    o crescimento do espelho).
+    """
+    strategy = strategy or CLONE_STRATEGY
+    if strategy not in ('full', 'sparse'):
+        raise ValueError(f"Estratégia de clone desconhecida: {strategy}")
+    with _span(repo['full_name'], 'clone', strategy=strategy, mirror=bool(MIRRORS)) as span:
+        if MIRRORS:
+            span['bytes'] = MIRRORS.checkout(repo, repo_path, SPARSE_PATTERNS if strategy == 'sparse' else None)
+            return span['bytes']
+        if strategy == 'sparse':
+            _git('clone', '--depth', '1', '--filter=blob:none', '--single-branch', '--no-tags',
+                 '--no-checkout', repo['clone_url'], repo_path)
+            _git('-C', repo_path, 'sparse-checkout', 'set', '--no-cone', *SPARSE_PATTERNS)
+            _git('-C', repo_path, 'checkout')  # Baixa sob demanda apenas os blobs que casam com os padrões
+        else:
+            _git('clone', '--depth', '1', repo['clone_url'], repo_path)
+        span['bytes'] = _dir_size(os.path.join(repo_path, '.git', 'objects'))
+    return span['bytes']
+
+
+def _thread_ck_server():
+    """CKServer do worker atual (um JVM persistente por thread), criado na primeira chamada."""
+    server = getattr(_ck_servers, 'server', None)
+    if server is None:
+        server = _ck_servers.server = ck_runner.CKServer(CK_JAR_PATH, heap_mb=CK_SERVER_HEAP_MB)
+        with _ck_servers_lock:
+            _all_ck_servers.append(server)
+    return server
+
+
+def close_ck_servers():
+    """Encerra todas as JVMs persistentes do CK abertas pelos workers."""
+    with _ck_servers_lock:
+        for server in _all_ck_servers:
+            server.close()
+        _all_ck_servers.clear()
+    _ck_servers.__dict__.clear()
+
+
+def run_ck(repo_path, job_dir, heap_mb=None):
+    """
+    Executa o CK sobre repo_path, gravando as saídas em job_dir.
+
+    O diretório de saída é passado explicitamente ao CK e, no modo por
+    processo, o CK também roda com cwd=job_dir, então mesmo versões que
+    ignoram o diretório de saída gravam dentro do diretório do job, e nunca
+    no diretório corrente compartilhado pelos demais jobs. Com
+    CK_MODE='server', o worker reaproveita uma JVM persistente
+    (ck_runner.CKServer) em vez de iniciar uma JVM por repositório.
+
+    O CK roda com heap de heap_mb MB (no modo 'server', o heap fixo da JVM
+    persistente) e com o tempo limite CK_TIMEOUT; lança limits.JobKilled se
+    algum limite for atingido.
+
+    Retorna um dict nome do arquivo -> caminho, só com as saídas geradas.
+    """
+    args = ck_runner.ck_args(repo_path, job_dir, CK_VARIABLES_AND_FIELDS)
+    if CK_MODE == 'server':
+        _thread_ck_server().run(args, timeout=CK_TIMEOUT or None)
+    else:
+        ck_runner.run_ck_process(CK_JAR_PATH, args, cwd=job_dir, heap_mb=heap_mb, timeout=CK_TIMEOUT or None)
+    outputs = {}
+    for name in CK_OUTPUT_FILES:
+        path = os.path.join(job_dir, name)
+        if os.path.exists(path):
+            outputs[name] = path
+    return outputs
+
+
+def analyze_clone(repo, repo_path):
+    """
+    Executa o CK sobre um clone já existente e sumariza o class.csv gerado.
+
+    Cada execução usa um diretório de job exclusivo (tempfile.mkdtemp dentro
+    de RESULTS_DIR), apagado ao final, então qualquer número de análises
+    pode rodar ao mesmo tempo no mesmo host, inclusive em processos
+    diferentes, sem que uma sobrescreva a saída da outra.
+
+    O heap do CK é estimado pelo tamanho do repositório (ck_heap_mb).
+
+    Retorna uma tupla (status, repo_summary, detalhe), com status
+    'success', 'failed', 'no_metrics', 'timeout' ou 'oom'.
+    """
+    repo_full_name = repo['full_name']
+    heap_mb = ck_heap_mb(repo, CK_HEAP_SCALE)
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    job_dir = tempfile.mkdtemp(prefix=f"{repo_full_name.replace('/', '_')}-", dir=os.path.abspath(RESULTS_DIR))
+    try:
+        print(f"[{_worker_name()}] Executando a análise do CK em {repo_full_name}...")
+        with _span(repo_full_name, 'ck', mode=CK_MODE, heap_mb=heap_mb):
+            outputs = run_ck(repo_path, job_dir, heap_mb)
+
+        dest_csv_path = outputs.get('class.csv')
+        if not dest_csv_path:
+            return 'no_metrics', None, "Nenhuma métrica gerada (provavelmente não é um projeto de código Java)."
+
+        # Guarda as métricas por classe antes que o diretório seja apagado; a tabela lida para o armazém
+        # também gera o resumo, para que o class.csv seja lido uma única vez
+        table, read_seconds = None, 0.0
+        if WAREHOUSE_DIR and warehouse.is_available():
+            try:
+                start = time.perf_counter()
+                table = warehouse.read_class_csv(dest_csv_path, repo_path)
+                read_seconds = time.perf_counter() - start
+                with _span(repo_full_name, 'archive') as span:
+                    stored_bytes = span['bytes'] = warehouse.write_partition(table, repo_full_name, WAREHOUSE_DIR)
+                print(f"[{_worker_name()}] 🗄️ class.csv de {repo_full_name} arquivado ({stored_bytes / 1024:.0f} KB)")
+            except Exception as e:
+                print(f"⚠️ Aviso: Não foi possível arquivar o class.csv de {repo_full_name}: {e}")
+
+        # Lê e processa os dados do CSV (ou da tabela já lida)
+        timings = {}
+        basic_metrics = calculate_additional_metrics(dest_csv_path, timings=timings, table=table)
+        timings['parse'] = timings.get('parse', 0.0) + read_seconds
+        if SPANS:
+            classes = basic_metrics.get('total_classes', 0)
+            csv_bytes = os.path.getsize(dest_csv_path)
+            SPANS.record(repo_full_name, 'parse', timings.get('parse', 0.0), classes=classes, bytes=csv_bytes)
+            SPANS.record(repo_full_name, 'aggregate', timings.get('aggregate', 0.0), classes=classes)
+        if not basic_metrics:
+            return 'no_metrics', None, "Nenhuma métrica válida encontrada no CSV."
+
+        return 'success', build_repo_summary(repo, basic_metrics), None
+
+    except JobKilled as e:
+        return e.outcome, None, f"CK interrompido em {repo_full_name}: {e} (heap {heap_mb}MB, limite {CK_TIMEOUT}s)"
+    except subprocess.CalledProcessError as e:
+        return 'failed', None, f"O processo CK falhou para {repo_full_name}. Detalhes: {e.stderr}"
+    except Exception as e:
+        return 'failed', None, f"Ocorreu um erro inesperado com {repo_full_name}: {e}"
+    finally:
+        _cleanup_dir(job_dir)
+
 
+def analyze_repository(repo):
+    """
+    Clona, executa o CK e sumariza um único repositório.
 
-def process_repositories(repos_to_process):
-    all_repo_metrics = []
+    Cada worker clona em seu próprio diretório (CLONE_DIR/worker_N) e o CK
+    roda em um diretório de job exclusivo (ver analyze_clone), então vários
+    repositórios podem ser analisados ao mesmo tempo.
+
+    Retorna (status, repo_summary, detalhe, estatísticas), onde as
+    estatísticas incluem a estratégia de clone e os bytes baixados.
+    """
+    safe_repo_name = repo['full_name'].replace('/', '_')
+    worker = _worker_name()
+    repo_path = os.path.abspath(os.path.join(CLONE_DIR, worker, safe_repo_name))
+
+    stats = {'clone_strategy': CLONE_STRATEGY}
+    try:
+        print(f"[{worker}] Clonando {repo['clone_url']}...")
+        clone_start = time.monotonic()
+        stats['clone_bytes'] = clone_repository(repo, repo_path)
+        stats['clone_seconds'] = time.monotonic() - clone_start
+    except JobKilled as e:
+        _cleanup_dir(repo_path)
+        return e.outcome, None, f"Clone interrompido para {repo['full_name']}: {e}", stats
+    except subprocess.CalledProcessError as e:
+        _cleanup_dir(repo_path)
+        return 'failed', None, f"O clone falhou para {repo['full_name']}. Detalhes: {e.stderr}", stats
+    except Exception as e:
+        _cleanup_dir(repo_path)
+        return 'failed', None, f"Ocorreu um erro inesperado ao clonar {repo['full_name']}: {e}", stats
+
+    try:
+        ck_start = time.monotonic()
+        outcome = analyze_clone(repo, repo_path)
+        stats['ck_seconds'] = time.monotonic() - ck_start
+        return outcome + (stats,)
+    finally:
+        # Limpeza mais robusta dos diretórios
+        if os.path.exists(repo_path):
+            print(f"[{worker}] Limpeza de {repo_path}...")
+        _cleanup_clone(repo, repo_path)
+
+
+def _dir_size(path):
+    """Tamanho total (em bytes) dos arquivos sob path."""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+class ClonePrefetcher:
+    """
+    Estágio de clone do pipeline: clona os próximos repositórios em segundo
+    plano enquanto o estágio do CK consome os clones já prontos.
+
+    A quantidade de clones à frente é limitada tanto por contagem
+    (max_repos) quanto pelo espaço em disco ocupado (budget_bytes) e, com
+    um AdmissionController, pelos recursos livres da máquina (reservados
+    do início do clone até o fim do CK). Antes de
+    clonar, reserva-se o tamanho informado pela API (campo 'size', em KB);
+    depois do clone a reserva é ajustada para o tamanho real no disco e só
+    é liberada quando o estágio do CK termina e apaga o clone. Um único
+    repositório maior que o orçamento ainda é clonado quando não há nenhum
+    outro em disco, para não travar o pipeline.
+    """
+
+    def __init__(self, items, budget_bytes, max_repos, consumers, admission=None):
+        self.items = items
+        self.admission = admission
+        self.budget_bytes = budget_bytes
+        self.max_repos = max_repos
+        self.consumers = consumers
+        self.queue = queue.Queue()
+        self.bytes_in_use = 0
+        self.repos_in_use = 0
+        self.stopped = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name='clone_stage', daemon=True)
+        # Contadores de paradas de cada estágio
+        self.clone_stalls = 0
+        self.clone_stall_seconds = 0.0
+        self.ck_stalls = 0
+        self.ck_stall_seconds = 0.0
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self.stopped = True
+            self._cond.notify_all()
+
+    def _fits(self, estimated):
+        if self.repos_in_use == 0:
+            return True
+        return (self.repos_in_use < self.max_repos
+                and self.bytes_in_use + estimated <= self.budget_bytes)
+
+    def _admit(self, estimated, repo):
+        # A reserva na admissão só é feita depois que o orçamento do prefetch já foi atendido
+        return self._fits(estimated) and (self.admission is None or self.admission.try_acquire(repo))
+
+    def _run(self):
+        for i, repo in self.items:
+            estimated = repo.get('size', 0) * 1024
+            with self._cond:
+                if not self.stopped and not self._admit(estimated, repo):
+                    self.clone_stalls += 1
+                    stall_start = time.monotonic()
+                    timeout = POLL_SECONDS if self.admission else None
+                    while not self.stopped and not self._admit(estimated, repo):
+                        self._cond.wait(timeout)
+                    self.clone_stall_seconds += time.monotonic() - stall_start
+                if self.stopped:
+                    break
+                self.bytes_in_use += estimated
+                self.repos_in_use += 1
+
+            repo_path = os.path.abspath(os.path.join(CLONE_DIR, 'prefetch', repo['full_name'].replace('/', '_')))
+            error = None  # (status, detalhe) se o clone falhar
+            clone_bytes = 0
+            clone_start = time.monotonic()
+            try:
+                print(f"[clone] Clonando {repo['clone_url']}...")
+                clone_bytes = clone_repository(repo, repo_path)
+            except JobKilled as e:
+                error = (e.outcome, f"Clone interrompido para {repo['full_name']}: {e}")
+            except subprocess.CalledProcessError as e:
+                error = ('failed', f"O clone falhou para {repo['full_name']}. Detalhes: {e.stderr}")
+            except Exception as e:
+                error = ('failed', f"Ocorreu um erro inesperado ao clonar {repo['full_name']}: {e}")
+
+            clone_seconds = time.monotonic() - clone_start
+
+            # Troca a estimativa pelo tamanho real ocupado no disco
+            actual = _dir_size(repo_path)
+            with self._cond:
+                self.bytes_in_use += actual - estimated
+            self.queue.put((i, repo, repo_path, actual, error, clone_bytes, clone_seconds))
+
+        for _ in range(self.consumers):
+            self.queue.put(None)
+
+    def get(self):
+        """Próximo clone pronto (ou None quando o estágio de clone terminou)."""
+        try:
+            return self.queue.get_nowait()
+        except queue.Empty:
+            self.ck_stalls += 1
+            stall_start = time.monotonic()
+            item = self.queue.get()
+            self.ck_stall_seconds += time.monotonic() - stall_start
+            return item
+
+    def release(self, nbytes, repo):
+        """Libera o espaço de um clone já analisado e apagado."""
+        if self.admission:
+            self.admission.release(repo)
+        with self._cond:
+            self.bytes_in_use -= nbytes
+            self.repos_in_use -= 1
+            self._cond.notify_all()
+
+    def report(self):
+        print(f"🚰 Estágio de clone: {self.clone_stalls} parada(s) aguardando espaço "
+              f"({self.clone_stall_seconds:.1f}s)")
+        print(f"🚰 Estágio do CK: {self.ck_stalls} parada(s) aguardando clones "
+              f"({self.ck_stall_seconds:.1f}s)")
+
+
+def _run_pool(admitted, workers, admission=None):
+    """
+    Executa clone + CK de cada repositório em um pool de threads.
+
+    Os jobs são despachados um a um, conforme os workers ficam livres; com
+    um AdmissionController, cada job só começa quando os recursos
+    estimados para ele estão livres (ver AdmissionController.pick).
+
+    Depois de um limits.cancel_all() (Ctrl+C), nenhum job novo é despachado
+    e os que estão rodando terminam logo, com os subprocessos mortos; os
+    resultados de todos eles ainda são entregues. Um Ctrl+C recebido aqui
+    cancela a execução do mesmo jeito e é relançado no fim.
+    """
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='worker')
+    pending = list(admitted)
+    running = {}
+    interrupted = False
+    try:
+        while pending or running:
+            try:
+                if limits.cancelled():
+                    pending.clear()
+                while pending and len(running) < workers:
+                    k = admission.pick(pending) if admission else 0
+                    if k is None:
+                        break
+                    i, repo = pending.pop(k)
+                    running[executor.submit(analyze_repository, repo)] = (i, repo)
+                if not running:
+                    admission.wait()  # Nada começou: a máquina está abaixo das margens por causa de outros processos
+                    continue
+                # Com jobs adiados, os recursos livres são reavaliados periodicamente
+                done, _ = wait(running, timeout=POLL_SECONDS if pending else None, return_when=FIRST_COMPLETED)
+            except KeyboardInterrupt:
+                interrupted = True
+                limits.cancel_all()
+                continue
+            for future in done:
+                i, repo = running.pop(future)
+                if admission:
+                    admission.release(repo)
+                yield (i,) + future.result()
+        if interrupted:
+            raise KeyboardInterrupt
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _run_pipeline(admitted, workers, prefetch_mb, prefetch_max, admission=None):
+    """Executa o pipeline em estágios: um clonador à frente e `workers` threads do CK."""
+    prefetcher = ClonePrefetcher(admitted, prefetch_mb * 1024 * 1024, prefetch_max, workers, admission)
+    results = queue.Queue()
+
+    def consume():
+        while True:
+            item = prefetcher.get()
+            if item is None:
+                results.put(None)
+                return
+            i, repo, repo_path, nbytes, error, clone_bytes, clone_seconds = item
+            stats = {'clone_strategy': CLONE_STRATEGY, 'clone_bytes': clone_bytes, 'clone_seconds': clone_seconds}
+            try:
+                if error:
+                    outcome = (error[0], None, error[1])
+                elif prefetcher.stopped or limits.cancelled():
+                    outcome = ('cancelled', None, "Cancelado pelo usuário.")
+                else:
+                    ck_start = time.monotonic()
+                    outcome = analyze_clone(repo, repo_path)
+                    stats['ck_seconds'] = time.monotonic() - ck_start
+            finally:
+                _cleanup_clone(repo, repo_path)
+                prefetcher.release(nbytes, repo)
+            results.put((i,) + outcome + (stats,))
+
+    threads = [threading.Thread(target=consume, name=f'worker_{n}', daemon=True) for n in range(workers)]
+    prefetcher.start()
+    for t in threads:
+        t.start()
+
+    # Como em _run_pool: depois de um cancelamento (ou de um Ctrl+C recebido aqui), o clonador para e os
+    # workers terminam logo, mas os resultados de todos eles ainda são entregues
+    finished = 0
+    interrupted = False
+    try:
+        while finished < workers:
+            try:
+                if limits.cancelled():
+                    prefetcher.stop()
+                item = results.get(timeout=POLL_SECONDS)
+            except queue.Empty:
+                continue
+            except KeyboardInterrupt:
+                interrupted = True
+                limits.cancel_all()
+                continue
+            if item is None:
+                finished += 1
+            else:
+                yield item
+        if interrupted:
+            raise KeyboardInterrupt
+    finally:
+        prefetcher.stop()
+        prefetcher.report()
+
+
+def process_repositories(repos_to_process, workers=MAX_WORKERS, prefetch_mb=PREFETCH_BUDGET_MB,
+                         prefetch_max=PREFETCH_MAX_REPOS, journal=None, cache=None, history=None, admission=None,
+                         retry_statuses=()):
+    """
+    Processa os repositórios com um pool limitado de `workers` threads.
+
+    Cada thread apenas dirige subprocessos (git e java), então o paralelismo
+    real fica por conta do sistema operacional. Os resultados são reunidos
+    pelo índice original do repositório, de modo que a lista retornada (e o
+    resultados_completos.csv) é idêntica à de uma execução serial.
+
+    Com prefetch_mb > 0 o clone vira um estágio separado (ver
+    ClonePrefetcher), que adianta até prefetch_max repositórios, limitados
+    a prefetch_mb MB em disco, enquanto os workers rodam o CK.
+
+    Com um ResultJournal, o resultado de cada repositório é gravado no
+    diário assim que termina, e repositórios que já constam nele são
+    ignorados (retomada após uma interrupção), exceto os cujo último status
+    está em retry_statuses (ex.: 'timeout' e 'oom', para repetir os jobs
+    interrompidos com outros limites) ou 'skipped': o que não coube na
+    máquina é reavaliado a cada retomada.
+
+    Com um MetricsCache, o SHA do branch padrão de cada repositório é
+    consultado antes (git ls-remote); se o cache já tem métricas para esse
+    SHA, o clone e o CK são pulados e apenas os metadados do GitHub são
+    atualizados.
+
+    Com um JobHistory, os repositórios são despachados do mais caro para o
+    mais barato (longest job first), com o custo estimado pela duração da
+    coleta anterior ou por um modelo de custo por tamanho ajustado ao
+    histórico, para que um repositório enorme não fique para o final. A
+    previsão de término e o relatório final usam esse modelo.
+
+    Com um AdmissionController, repositórios grandes esperam até haver
+    disco e RAM livres em vez de serem descartados; só é pulado o que não
+    caberia nem com a máquina ociosa.
+    """
+    results_by_index = {}
     total_to_process = len(repos_to_process)
     successful_repos = 0
     failed_repos = 0
     skipped_repos = 0
+    resumed_repos = 0
+    killed = {status: 0 for status in KILLED_STATUSES}
+    cloned_bytes = 0
+    completed = 0
     start_time = datetime.now()
+    already_done = journal.completed(exclude_statuses=tuple(retry_statuses) + ('skipped',)) if journal else set()
 
-    print(f"\n📊 Processando {total_to_process} repositórios...")
+    mode = f"pipeline com prefetch de {prefetch_mb}MB" if prefetch_mb > 0 else "pool"
+    print(f"\n📊 Processando {total_to_process} repositórios com {workers} worker(s) ({mode})...")
     print("=" * 60)
 
+    admitted = []
     for i, repo in enumerate(repos_to_process):
-        repo_full_name = repo['full_name']
-        safe_repo_name = repo_full_name.replace('/', '_')
-        repo_path = os.path.join(CLONE_DIR, safe_repo_name)
-        metrics_path = os.path.join(RESULTS_DIR, safe_repo_name)
-        
-        # Filtros para repositórios problemáticos
-        should_skip, reason = should_skip_repo(repo)
-        if should_skip:
+        if repo['full_name'] in already_done:
+            resumed_repos += 1
+            continue
+
+        # Pula apenas o que não cabe na máquina nem sem nenhum outro job rodando
+        reason = admission.rejection(repo) if admission else None
+        if reason:
             skipped_repos += 1
-            print(f"\n--- Pulando {i + 1}/{total_to_process}: {repo_full_name} ---")
+            print(f"\n--- Pulando {i + 1}/{total_to_process}: {repo['full_name']} ---")
             print(f"⚠️ Motivo: {reason}")
+            if journal:
+                journal.append(i, repo['full_name'], 'skipped', detail=reason)
             continue
-        elif "cuidado" in reason.lower():
-            print(f"\n--- Processando {i + 1}/{total_to_process}: {repo_full_name} ---")
-            print(f"⚠️ Aviso: {reason}")
-        else:
-            print(f"\n--- Processando {i + 1}/{total_to_process}: {repo_full_name} ---")
-            print(f"✅ {reason}")
-
-        # Cálculo de progresso e tempo estimado
-        elapsed_time = datetime.now() - start_time
-        if i > 0:
-            avg_time_per_repo = elapsed_time.total_seconds() / i
-            remaining_repos = total_to_process - i
-            estimated_remaining_time = avg_time_per_repo * remaining_repos
-            estimated_completion = datetime.now().timestamp() + estimated_remaining_time
-            estimated_completion_str = datetime.fromtimestamp(estimated_completion).strftime("%H:%M:%S")
-        else:
-            estimated_completion_str = "Calculando..."
-        
-        progress_percent = ((i + 1) / total_to_process) * 100
-        
-        print(f"⏱️  Tempo decorrido: {elapsed_time}")
-        print(f"📈 Sucessos: {successful_repos} | ❌ Falhas: {failed_repos} | ⏭️ Pulados: {skipped_repos}")
-        if i > 0:
-            print(f"🕐 Previsão de conclusão: {estimated_completion_str}")
+        admitted.append((i, repo))
 
-        try:
-            os.makedirs(metrics_path, exist_ok=True)
-            print(f"Clonando {repo['clone_url']}...")
-            subprocess.run(
-                ['git', 'clone', '--depth', '1', repo['clone_url'], repo_path],
-                check=True, capture_output=True, text=True, encoding='utf-8'
-            )
-
-            print("Executando a análise do CK...")
-            result = subprocess.run(
-                ['java', '-jar', CK_JAR_PATH, repo_path, metrics_path],
-                capture_output=True, text=True, encoding='utf-8'
-            )
-            result.check_returncode()
-
-            # Verifica se o CK gerou os arquivos na pasta raiz do projeto
-            generated_files_in_root = ['class.csv', 'method.csv', 'field.csv', 'variable.csv']
-            source_csv_path = 'class.csv'
-
-            if os.path.exists(source_csv_path):
-                # Move o arquivo principal para o diretório de resultados correto
-                dest_csv_path = os.path.join(metrics_path, 'class.csv')
-                shutil.move(source_csv_path, dest_csv_path)
-
-                # Limpa outros arquivos CSV gerados na raiz
-                for f in generated_files_in_root:
-                    if f != 'class.csv' and os.path.exists(f):
-                        os.remove(f)
-
-                # Lê e processa os dados do CSV
-                with open(dest_csv_path, 'r', encoding='utf-8') as f:
-                    reader = list(csv.DictReader(f))
-                    if reader:
-                        created_at = datetime.strptime(repo['created_at'], "%Y-%m-%dT%H:%M:%SZ")
-                        age_days = (datetime.now() - created_at).days
-                        age_years = age_days / 365.25
-
-                        # Calcula métricas básicas
-                        basic_metrics = calculate_additional_metrics(reader)
-                        
-                        if not basic_metrics:
-                            print("⚠️ Nenhuma métrica válida encontrada no CSV.")
-                            continue
-
-                        # Dados do repositório
-                        repo_summary = {
-                            'repository': repo_full_name,
-                            'stars': repo.get('stargazers_count', 0),
-                            'forks': repo.get('forks_count', 0),
-                            'watchers': repo.get('watchers_count', 0),
-                            'open_issues': repo.get('open_issues_count', 0),
-                            'size_kb': repo.get('size', 0),
-                            'language': repo.get('language', 'Java'),
-                            'created_at': repo['created_at'],
-                            'updated_at': repo.get('updated_at', ''),
-                            'pushed_at': repo.get('pushed_at', ''),
-                            'age_days': age_days,
-                            'age_years': age_years,
-                            'has_wiki': repo.get('has_wiki', False),
-                            'has_pages': repo.get('has_pages', False),
-                            'has_downloads': repo.get('has_downloads', False),
-                            'has_issues': repo.get('has_issues', True),
-                            'has_projects': repo.get('has_projects', False),
-                            'archived': repo.get('archived', False),
-                            'disabled': repo.get('disabled', False),
-                            'fork': repo.get('fork', False),
-                            'private': repo.get('private', False),
-                            'license': repo.get('license', {}).get('name', '') if repo.get('license') else '',
-                            'topics': ', '.join(repo.get('topics', [])),
-                            'default_branch': repo.get('default_branch', 'main'),
-                        }
-                        
-                        # Adiciona todas as métricas calculadas
-                        repo_summary.update(basic_metrics)
-                        
-                        all_repo_metrics.append(repo_summary)
-                        successful_repos += 1
-                        print(f"✅ Métricas sumarizadas: CBO Médio={basic_metrics.get('cbo_mean', 0):.2f}, LCOM Médio={basic_metrics.get('lcom_mean', 0):.2f}")
-                        
-                        # Salva progresso a cada 50 repositórios
-                        if len(all_repo_metrics) % 50 == 0:
-                            save_results_to_csv(all_repo_metrics, is_final=False)
+    if resumed_repos:
+        print(f"🔁 {resumed_repos} repositório(s) já registrados no diário serão ignorados.")
+
+    cached_outcomes = []
+    head_shas = {}
+    if cache:
+        print("🔎 Consultando o HEAD dos repositórios para reaproveitar o cache...")
+        shas = resolve_head_shas([repo for _, repo in admitted])
+        head_shas = {i: sha for (i, _), sha in zip(admitted, shas)}
+        to_run = []
+        for i, repo in admitted:
+            cached_metrics = cache.get(repo['full_name'], head_shas[i])
+            if cached_metrics:
+                cached_outcomes.append((i, 'success', build_repo_summary(repo, cached_metrics), None, {'cached': True}))
             else:
-                print("⚠️ Nenhuma métrica gerada (provavelmente não é um projeto de código Java).")
-
-        except subprocess.CalledProcessError as e:
-            failed_repos += 1
-            print(f"❌ ERRO: O processo CK falhou para {repo_full_name}. Detalhes: {e.stderr}")
-        except Exception as e:
-            failed_repos += 1
-            print(f"❌ Ocorreu um erro inesperado com {repo_full_name}: {e}")
-        finally:
-            # Limpeza mais robusta dos diretórios
-            try:
-                if os.path.exists(repo_path):
-                    print(f"Limpeza de {repo_path}...")
-                    shutil.rmtree(repo_path, onerror=remove_readonly)
-            except Exception as e:
-                print(f"⚠️ Aviso: Não foi possível limpar {repo_path}: {e}")
-                # Tenta forçar a limpeza
-                try:
-                    import time
-                    time.sleep(0.5)
-                    shutil.rmtree(repo_path, ignore_errors=True)
-                except:
-                    pass
-            
+                to_run.append((i, repo))
+        print(f"💾 {len(cached_outcomes)} repositório(s) sem mudanças no cache; {len(to_run)} para analisar.")
+        admitted = to_run
+    cached_repos = len(cached_outcomes)
+
+    tracker = None
+    if history:
+        costs = estimate_costs([repo for _, repo in admitted], history.all())
+        admitted, costs = longest_first(admitted, costs)
+        tracker = MakespanTracker([(i, cost) for (i, _), cost in zip(admitted, costs)], workers)
+        print(f"📐 Ordem por custo estimado (maior primeiro); makespan previsto: {tracker.predicted_makespan:.0f}s")
+
+    runner_start = time.monotonic()
+    if prefetch_mb > 0:
+        runner = _run_pipeline(admitted, workers, prefetch_mb, prefetch_max, admission)
+    else:
+        runner = _run_pool(admitted, workers, admission)
+    outcomes = _with_cached(cached_outcomes, runner)
+
+    interrupted = False
+    try:
+        while True:
             try:
-                if os.path.exists(metrics_path):
-                    shutil.rmtree(metrics_path, onerror=remove_readonly)
-            except Exception as e:
-                print(f"⚠️ Aviso: Não foi possível limpar {metrics_path}: {e}")
-                # Tenta forçar a limpeza
-                try:
-                    import time
-                    time.sleep(0.5)
-                    shutil.rmtree(metrics_path, ignore_errors=True)
-                except:
-                    pass
+                for i, status, repo_summary, detail, stats in outcomes:
+                    repo_full_name = repos_to_process[i]['full_name']
+                    if status == 'cancelled':
+                        # Fora do diário: o repositório é refeito na retomada
+                        print(f"\n⏹️ Cancelado {i + 1}/{total_to_process}: {repo_full_name}")
+                        continue
+                    completed += 1
+                    cloned_bytes += stats.get('clone_bytes', 0)
+                    duration = stats.get('clone_seconds', 0) + stats.get('ck_seconds', 0) if 'ck_seconds' in stats else None
+                    if tracker:
+                        tracker.finish(i, duration)
+                    if history and duration is not None and status in ('success', 'no_metrics'):
+                        history.record(repo_full_name, duration, cost_feature_kb(repos_to_process[i]))
+                    if journal:
+                        journal.append(i, repo_full_name, status, repo_summary, detail, stats)
+
+                    print(f"\n--- Concluído {i + 1}/{total_to_process}: {repo_full_name} ---")
+                    if status == 'success':
+                        results_by_index[i] = repo_summary
+                        successful_repos += 1
+                        if cache and i in head_shas:
+                            metadata_fields = repo_metadata(repos_to_process[i])
+                            cache.put(repo_full_name, head_shas[i],
+                                      {k: v for k, v in repo_summary.items() if k not in metadata_fields})
+                        print(f"✅ Métricas sumarizadas: CBO Médio={repo_summary.get('cbo_mean', 0):.2f}, LCOM Médio={repo_summary.get('lcom_mean', 0):.2f}")
+                    elif status == 'failed' or status in killed:
+                        failed_repos += 1
+                        if status in killed:
+                            killed[status] += 1
+                        print(f"❌ ERRO: {detail}")
+                    else:
+                        print(f"⚠️ {detail}")
+
+                    # Cálculo de progresso e tempo estimado
+                    elapsed_time = datetime.now() - start_time
+                    remaining_repos = len(admitted) + cached_repos - completed
+                    if remaining_repos > 0:
+                        if tracker:
+                            remaining_seconds = tracker.remaining_seconds()
+                        else:
+                            remaining_seconds = elapsed_time.total_seconds() / completed * remaining_repos
+                        estimated_completion = datetime.now().timestamp() + remaining_seconds
+                        estimated_completion_str = datetime.fromtimestamp(estimated_completion).strftime("%H:%M:%S")
+                        print(f"🕐 Previsão de conclusão: {estimated_completion_str}")
+
+                    print(f"⏱️  Tempo decorrido: {elapsed_time}")
+                    print(f"📈 Sucessos: {successful_repos} | ❌ Falhas: {failed_repos} | ⏭️ Pulados: {skipped_repos}")
+                break
+            except KeyboardInterrupt:
+                if not interrupted:
+                    print("\n❌ Interrompido pelo usuário. Cancelando repositórios pendentes...")
+                interrupted = True
+                # Mata git e CK (em sessões próprias, eles não recebem o Ctrl+C) e volta ao laço: os resultados
+                # que terminaram antes da interrupção ainda são gravados no diário; os cancelados, não
+                limits.cancel_all()
+    finally:
+        outcomes.close()
+        close_ck_servers()
+    actual_makespan = time.monotonic() - runner_start
+
+    all_repo_metrics = [results_by_index[k] for k in sorted(results_by_index)]
 
     # Resumo final
     total_time = datetime.now() - start_time
@@ -363,9 +838,25 @@ def process_repositories(repos_to_process):
     print("📊 RESUMO FINAL:")
     print(f"✅ Repositórios processados com sucesso: {successful_repos}")
     print(f"❌ Repositórios com falha: {failed_repos}")
-    print(f"⏭️  Repositórios pulados (muito grandes): {skipped_repos}")
+    if any(killed.values()):
+        print(f"   ⏱️ por tempo limite: {killed['timeout']} | 💥 por falta de memória: {killed['oom']} "
+              f"(repita com --retry timeout oom e limites maiores)")
+    print(f"⏭️  Repositórios pulados (não cabem nesta máquina): {skipped_repos}")
+    if resumed_repos:
+        print(f"🔁 Repositórios retomados do diário: {resumed_repos}")
+    if cached_repos:
+        print(f"💾 Repositórios reaproveitados do cache: {cached_repos}")
     print(f"📈 Taxa de sucesso: {(successful_repos / processed_repos * 100):.1f}%" if processed_repos > 0 else "N/A")
     print(f"⏱️  Tempo total: {total_time}")
+    print(f"📦 Baixado pelo git ({CLONE_STRATEGY}): {cloned_bytes / 1024 / 1024:.1f} MB")
+    if MIRRORS:
+        MIRRORS.report()
+    if CLEANER:
+        CLEANER.report()
+    if admission:
+        admission.report()
+    if tracker:
+        tracker.report(actual_makespan, [repo['full_name'] for repo in repos_to_process])
     print(f"⚡ Tempo médio por repositório: {total_time.total_seconds() / processed_repos:.1f}s" if processed_repos > 0 else "N/A")
     print("=" * 60)
 
@@ -390,6 +881,9 @@ def save_results_to_csv(metrics, is_final=True):
             writer = csv.DictWriter(f, fieldnames=metrics[0].keys())
             writer.writeheader()
             writer.writerows(metrics)
+        typed_path = results_table.write_typed(metrics, final_csv_path)
+        if typed_path:
+            print(f"🗃️ Arquivo tipado salvo em '{typed_path}'")
         
         if is_final:
             print("✨ Processo concluído com sucesso! ✨")
@@ -399,21 +893,116 @@ def save_results_to_csv(metrics, is_final=True):
         print(f"Erro ao salvar o arquivo CSV: {e}")
 
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Coleta métricas do CK para os repositórios Java mais populares.")
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS,
+                        help=f"Número de repositórios processados em paralelo (padrão: {MAX_WORKERS})")
+    parser.add_argument('--prefetch-mb', type=int, default=PREFETCH_BUDGET_MB,
+                        help="Ativa o pipeline clone/CK, limitando os clones adiantados a este espaço em disco (MB)")
+    parser.add_argument('--prefetch-max', type=int, default=PREFETCH_MAX_REPOS,
+                        help=f"Número máximo de clones adiantados (padrão: {PREFETCH_MAX_REPOS})")
+    parser.add_argument('--ck-mode', choices=['process', 'server'], default=CK_MODE,
+                        help="'server' mantém uma JVM do CK por worker em vez de iniciar uma por repositório")
+    parser.add_argument('--clone-strategy', choices=['full', 'sparse'], default=CLONE_STRATEGY,
+                        help="'sparse' baixa apenas arquivos .java e de build (clone parcial + sparse checkout)")
+    parser.add_argument('--repos-file',
+                        help="Replay offline: lista full_name,clone_url (ex.: top_1000_java_repos.txt) ou snapshot "
+                             "JSON da busca (arquivo .json ou diretório), em vez de consultar a API do GitHub")
+    parser.add_argument('--mirror',
+                        help="Clona de um espelho local: diretório base ou modelo como 'file:///srv/{owner}/{name}.git'")
+    parser.add_argument('--save-snapshot', help="Salva os repositórios retornados pela busca neste JSON, para replay")
+    parser.add_argument('--limit', type=int, help="Processa apenas os N primeiros repositórios")
+    parser.add_argument('-y', '--yes', action='store_true', help="Não pede confirmação antes de começar")
+    parser.add_argument('--mirror-store', default=MIRROR_DIR,
+                        help=f"Diretório dos espelhos bare persistentes, atualizados com fetch incremental (padrão: {MIRROR_DIR})")
+    parser.add_argument('--mirror-budget-mb', type=int, default=MIRROR_BUDGET_MB,
+                        help=f"Espaço máximo dos espelhos; os usados há mais tempo são apagados (padrão: {MIRROR_BUDGET_MB}, 0 = sem limite)")
+    parser.add_argument('--no-mirror-store', action='store_true', help="Clona direto do remoto, sem espelhos locais")
+    parser.add_argument('--cleanup-workers', type=int, default=CLEANUP_WORKERS,
+                        help=f"Threads que apagam clones em segundo plano; 0 = apaga na hora (padrão: {CLEANUP_WORKERS})")
+    parser.add_argument('--resume', action='store_true',
+                        help="Retoma uma coleta interrompida, ignorando os repositórios já registrados no diário")
+    parser.add_argument('--journal', default=JOURNAL_PATH,
+                        help=f"Arquivo do diário de resultados (padrão: {JOURNAL_PATH})")
+    parser.add_argument('--cache', default=METRICS_CACHE_PATH,
+                        help=f"Cache de métricas por SHA do HEAD (padrão: {METRICS_CACHE_PATH})")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Ignora o cache e analisa todos os repositórios novamente")
+    parser.add_argument('--history', default=JOB_HISTORY_PATH,
+                        help=f"Histórico de durações usado para agendar os maiores repositórios primeiro (padrão: {JOB_HISTORY_PATH})")
+    parser.add_argument('--star-order', action='store_true',
+                        help="Processa na ordem de estrelas, sem o agendamento por custo estimado")
+    parser.add_argument('--language-bytes', action='store_true',
+                        help="Consulta os bytes de Java de cada repositório na API (1 requisição por repo) para estimar o custo")
+    parser.add_argument('--ck-timeout', type=int, default=CK_TIMEOUT,
+                        help=f"Tempo limite do CK por repositório, em segundos; 0 = sem limite (padrão: {CK_TIMEOUT})")
+    parser.add_argument('--git-timeout', type=int, default=GIT_TIMEOUT,
+                        help=f"Tempo limite de cada comando git, em segundos; 0 = sem limite (padrão: {GIT_TIMEOUT})")
+    parser.add_argument('--heap-scale', type=float, default=CK_HEAP_SCALE,
+                        help="Multiplica o heap (-Xmx) estimado para o CK pelo tamanho de cada repositório")
+    parser.add_argument('--retry', nargs='+', choices=['failed', *KILLED_STATUSES], default=[],
+                        help="Retoma a coleta repetindo os repositórios cujo último resultado no diário foi um destes")
+    parser.add_argument('--spans', default=tracing.SPANS_PATH,
+                        help=f"Arquivo JSONL com a duração de cada estágio de cada repositório (padrão: {tracing.SPANS_PATH})")
+    parser.add_argument('--no-spans', action='store_true', help="Não grava os spans de tempo por estágio")
+    parser.add_argument('--min-free-disk-mb', type=int, default=MIN_FREE_DISK_MB,
+                        help=f"Disco livre mínimo mantido em {CLONE_DIR} (padrão: {MIN_FREE_DISK_MB})")
+    parser.add_argument('--min-free-ram-mb', type=int, default=MIN_FREE_RAM_MB,
+                        help=f"RAM disponível mínima mantida durante a coleta (padrão: {MIN_FREE_RAM_MB})")
+    parser.add_argument('--warehouse-dir', default=WAREHOUSE_DIR,
+                        help=f"Armazém Arrow com o class.csv de cada repositório (padrão: {WAREHOUSE_DIR})")
+    parser.add_argument('--no-warehouse', action='store_true',
+                        help="Não guarda as métricas por classe após a sumarização")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    global WAREHOUSE_DIR, CLONE_STRATEGY, CK_MODE, CK_TIMEOUT, GIT_TIMEOUT, CK_HEAP_SCALE, SPANS, MIRRORS, CLEANER
+    global CK_SERVER_HEAP_MB
+    args = parse_args(argv)
+    CK_TIMEOUT = args.ck_timeout
+    GIT_TIMEOUT = args.git_timeout
+    CK_HEAP_SCALE = args.heap_scale
+    CLONE_STRATEGY = args.clone_strategy
+    CK_MODE = args.ck_mode
+    WAREHOUSE_DIR = None if args.no_warehouse else args.warehouse_dir
+    if WAREHOUSE_DIR and not warehouse.is_available():
+        print("⚠️ pyarrow não instalado: as métricas por classe não serão arquivadas.")
+    if args.workers < 1:
+        print("ERRO: --workers deve ser pelo menos 1.")
+        return
+
     if not os.path.exists(CK_JAR_PATH):
         print(f"ERRO: Arquivo '{CK_JAR_PATH}' não encontrado.")
         return
 
-    # Limpa diretórios de execuções anteriores
-    if os.path.exists(CLONE_DIR):
+    # Limpa diretórios de execuções anteriores (clones pela metade não são reaproveitados,
+    # mesmo no --resume: o que já terminou está no diário)
+    # RESULTS_DIR não é apagado: cada job do CK tem seu próprio subdiretório, que ele mesmo remove,
+    # e outra coleta rodando no mesmo host pode estar usando o diretório neste momento
+    if args.cleanup_workers > 0:
+        # Clones antigos e sobras da lixeira são apagados em segundo plano enquanto a coleta começa
+        CLEANER = BackgroundCleaner(TRASH_DIR, _remove_tree, workers=args.cleanup_workers)
+        CLEANER.sweep()
+        CLEANER.discard(CLONE_DIR)
+    elif os.path.exists(CLONE_DIR):
         shutil.rmtree(CLONE_DIR, onerror=remove_readonly)
-    if os.path.exists(RESULTS_DIR):
-        shutil.rmtree(RESULTS_DIR, onerror=remove_readonly)
 
     os.makedirs(CLONE_DIR, exist_ok=True)
     os.makedirs(RESULTS_DIR, exist_ok=True)
 
-    all_repos = fetch_github_repos()
+    if args.repos_file:
+        all_repos = replay.load_repos(args.repos_file)
+        print(f"📼 Replay: {len(all_repos)} repositórios lidos de '{args.repos_file}' (sem consultar a API)")
+    else:
+        all_repos = fetch_github_repos()
+        if all_repos and args.save_snapshot:
+            replay.save_search_snapshot(all_repos, args.save_snapshot)
+            print(f"📼 Resultado da busca salvo em '{args.save_snapshot}'")
+    if args.limit:
+        all_repos = all_repos[:args.limit]
+    if args.mirror:
+        replay.use_mirror(all_repos, args.mirror)
     if all_repos:
         print(f"\n🚀 Iniciando análise de {len(all_repos)} repositórios...")
         print("⚠️  ATENÇÃO: Este processo pode levar várias horas para completar!")
@@ -421,16 +1010,52 @@ def main():
         
         # Pergunta ao usuário se quer continuar
         try:
-            resposta = input("\nDeseja continuar com a análise de todos os 1000 repositórios? (s/n): ").lower().strip()
-            if resposta not in ['s', 'sim', 'y', 'yes']:
-                print("❌ Processo cancelado pelo usuário.")
-                return
+            if not args.yes:
+                resposta = input(f"\nDeseja continuar com a análise de todos os {len(all_repos)} repositórios? (s/n): ").lower().strip()
+                if resposta not in ['s', 'sim', 'y', 'yes']:
+                    print("❌ Processo cancelado pelo usuário.")
+                    return
         except KeyboardInterrupt:
             print("\n❌ Processo cancelado pelo usuário.")
             return
         
-        metrics_data = process_repositories(all_repos)  # Processando todos os repositórios
-        save_results_to_csv(metrics_data)
+        # O modo da mediana muda os valores: métricas 'exact' e 'sketch' não se misturam no cache
+        cache = None if args.no_cache else MetricsCache(args.cache, version=f"{METRICS_VERSION}-{MEDIAN_MODE}")
+        history = None if args.star_order else JobHistory(args.history)
+        MIRRORS = None if args.no_mirror_store else MirrorStore(args.mirror_store, args.mirror_budget_mb, git=_git)
+        if CK_MODE == 'server':
+            # A admissão reserva o heap real de cada JVM persistente, que precisa caber na RAM com as dos outros workers
+            CK_SERVER_HEAP_MB = server_heap_mb(args.workers, args.min_free_ram_mb)
+            print(f"☕ JVM persistente do CK com heap de {CK_SERVER_HEAP_MB}MB por worker")
+        # A lixeira ainda sendo apagada e os espelhos (despejáveis) também contam como disco disponível
+        reclaimable = _dir_size(TRASH_DIR) + (MIRRORS.total_bytes() if MIRRORS else 0)
+        admission = AdmissionController(CLONE_DIR, args.min_free_disk_mb, args.min_free_ram_mb, CK_HEAP_SCALE,
+                                        reclaimable_bytes=reclaimable,
+                                        server_heap_mb=CK_SERVER_HEAP_MB if CK_MODE == 'server' else None)
+        if history and args.language_bytes:
+            if args.repos_file:
+                print("⚠️ --language-bytes ignorado no replay (exigiria consultar a API).")
+            else:
+                github_api.fetch_language_bytes(all_repos, github_api.auth_headers(GITHUB_TOKEN))
+        journal = ResultJournal(args.journal)
+        if not (args.resume or args.retry):
+            journal.rotate()
+        SPANS = None if args.no_spans else tracing.SpanRecorder(args.spans)
+        if CLEANER:
+            CLEANER.spans = SPANS
+        with journal, SPANS or nullcontext():
+            try:
+                process_repositories(all_repos, workers=args.workers, prefetch_mb=args.prefetch_mb,
+                                     prefetch_max=args.prefetch_max, journal=journal, cache=cache, history=history,
+                                     admission=admission, retry_statuses=tuple(args.retry))  # Processando todos os repositórios
+            finally:
+                if CLEANER:
+                    CLEANER.close()  # Os spans 'trash_delete' pendentes ainda são gravados
+        if SPANS:
+            print(f"⏱️ Tempos por estágio em '{args.spans}' (relatório: python tracing.py {args.spans})")
+
+        # O CSV final é montado a partir do diário, incluindo o que foi coletado antes de uma retomada
+        save_results_to_csv(journal.successful_summaries({repo['full_name']: i for i, repo in enumerate(all_repos)}))
     else:
         print("Nenhum repositório foi encontrado. O script será encerrado.")
 
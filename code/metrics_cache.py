@@ -0,0 +1,82 @@
+import json
+import sqlite3
+import subprocess
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+
+# --- CONFIGURAÇÕES GLOBAIS ---
+METRICS_CACHE_PATH = "metrics_cache.sqlite"
+LS_REMOTE_WORKERS = 16  # git ls-remote é só uma ida e volta na rede; dá para fazer muitos em paralelo
+
+
+def resolve_head_sha(repo):
+    """SHA do último commit do branch padrão, via git ls-remote (sem clonar). None se não resolver."""
+    branch = repo.get('default_branch') or 'HEAD'
+    ref = 'HEAD' if branch == 'HEAD' else f'refs/heads/{branch}'
+    try:
+        result = subprocess.run(
+            ['git', 'ls-remote', repo['clone_url'], ref],
+            check=True, capture_output=True, text=True, encoding='utf-8', timeout=60
+        )
+    except (subprocess.SubprocessError, OSError):
+        return None
+    line = result.stdout.split('\n', 1)[0]
+    return line.split('\t', 1)[0] or None
+
+
+def resolve_head_shas(repos, workers=LS_REMOTE_WORKERS):
+    """Resolve o SHA de vários repositórios em paralelo, na mesma ordem da entrada."""
+    if not repos:
+        return []
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ls-remote') as executor:
+        return list(executor.map(resolve_head_sha, repos))
+
+
+class MetricsCache:
+    """
+    Cache persistente (SQLite) das métricas do CK por repositório.
+
+    A chave é (full_name, SHA do HEAD do branch padrão, versão do cálculo):
+    se o branch padrão não mudou desde a última coleta, as métricas
+    guardadas continuam válidas e o clone + CK podem ser evitados. A versão
+    (número ou texto, ex.: '3-exact') identifica o cálculo das métricas:
+    mudá-la invalida tudo o que foi guardado com outra.
+    """
+
+    def __init__(self, path=METRICS_CACHE_PATH, version=1):
+        self.path = path
+        self.version = version
+        self._execute(
+            "CREATE TABLE IF NOT EXISTS metrics ("
+            " full_name TEXT NOT NULL, head_sha TEXT NOT NULL, version TEXT NOT NULL,"
+            " metrics TEXT NOT NULL, cached_at TEXT NOT NULL,"
+            " PRIMARY KEY (full_name, head_sha, version))"
+        )
+
+    def _execute(self, sql, params=()):
+        # Uma conexão por operação: o cache é usado a partir de várias threads
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                return conn.execute(sql, params).fetchone()
+        finally:
+            conn.close()
+
+    def get(self, full_name, head_sha):
+        if not head_sha:
+            return None
+        row = self._execute(
+            "SELECT metrics FROM metrics WHERE full_name = ? AND head_sha = ? AND version = ?",
+            (full_name, head_sha, self.version)
+        )
+        return json.loads(row[0]) if row else None
+
+    def put(self, full_name, head_sha, metrics):
+        if not head_sha:
+            return
+        payload = json.dumps(metrics, default=lambda v: v.item() if hasattr(v, 'item') else str(v))
+        self._execute(
+            "INSERT OR REPLACE INTO metrics VALUES (?, ?, ?, ?, ?)",
+            (full_name, head_sha, self.version, payload, datetime.now().isoformat(timespec='seconds'))
+        )
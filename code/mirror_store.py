@@ -0,0 +1,192 @@
+import os
+import shutil
+import subprocess
+import sqlite3
+import threading
+from datetime import datetime
+
+from limits import run_limited, GIT_TIMEOUT_SECONDS, GIT_AS_LIMIT_MB
+
+
+# --- CONFIGURAÇÕES GLOBAIS ---
+MIRROR_DIR = os.getenv('MIRROR_DIR', 'git_mirrors')
+MIRROR_BUDGET_MB = int(os.getenv('MIRROR_BUDGET_MB', '51200'))  # Espaço máximo dos espelhos (0 = sem limite)
+INDEX_FILE = 'index.sqlite'
+
+
+def _default_git(*args):
+    return run_limited(['git', *args], timeout=GIT_TIMEOUT_SECONDS or None, address_space_mb=GIT_AS_LIMIT_MB)
+
+
+def _dir_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+class MirrorStore:
+    """
+    Espelhos git bare persistentes, um por repositório, reaproveitados entre coletas.
+
+    Cada espelho guarda só a ponta do branch padrão (clone bare com
+    --depth 1 --single-branch). Na coleta seguinte, ele é atualizado com um
+    git fetch incremental (só os objetos novos) e a árvore de trabalho é um
+    clone --shared do espelho: os objetos não são copiados, a árvore é
+    extraída direto deles. No modo sparse, o espelho é um clone parcial
+    (--filter=blob:none) e a árvore é um worktree dele, que baixa sob
+    demanda só os blobs necessários (ver checkout). Tamanho e último uso de cada espelho ficam em um
+    índice SQLite; quando o total passa de budget_bytes, os espelhos usados
+    há mais tempo são apagados (LRU), exceto os que estão em uso.
+    """
+
+    def __init__(self, root=MIRROR_DIR, budget_mb=MIRROR_BUDGET_MB, git=None):
+        self.root = os.path.abspath(root)
+        self.budget_bytes = budget_mb * 1024 * 1024
+        self.git = git or _default_git
+        self._lock = threading.Lock()
+        self._repo_locks = {}
+        self._in_use = {}
+        # Contadores para o relatório final
+        self.hits = 0
+        self.misses = 0
+        self.fetched_bytes = 0
+        self.evicted = 0
+        os.makedirs(self.root, exist_ok=True)
+        self._execute(
+            "CREATE TABLE IF NOT EXISTS mirrors ("
+            " full_name TEXT PRIMARY KEY, bytes INTEGER NOT NULL, last_used TEXT NOT NULL)"
+        )
+
+    def _execute(self, sql, params=()):
+        conn = sqlite3.connect(os.path.join(self.root, INDEX_FILE), timeout=30)
+        try:
+            with conn:
+                return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    def mirror_path(self, full_name):
+        owner, _, name = full_name.partition('/')
+        return os.path.join(self.root, owner, name + '.git')
+
+    def _repo_lock(self, full_name):
+        with self._lock:
+            return self._repo_locks.setdefault(full_name, threading.Lock())
+
+    def _is_partial(self, path):
+        """O espelho é um clone parcial (sem blobs, que são baixados sob demanda do remoto de origem)."""
+        try:
+            return self.git('-C', path, 'config', '--get', 'remote.origin.promisor').stdout.strip() == 'true'
+        except subprocess.CalledProcessError:  # Chave ausente: espelho completo
+            return False
+
+    def _update(self, repo, path, partial):
+        """Cria ou atualiza o espelho; partial cria um espelho sem blobs (--filter=blob:none)."""
+        if os.path.isdir(path):
+            head_ref = self.git('-C', path, 'symbolic-ref', 'HEAD').stdout.strip()
+            self.git('-C', path, 'worktree', 'prune')  # Árvores de trabalho de coletas anteriores já apagadas
+            filter_args = ['--filter=blob:none'] if self._is_partial(path) else []
+            self.git('-C', path, 'fetch', '--depth', '1', *filter_args, '--no-tags', '--prune', 'origin',
+                     f'+HEAD:{head_ref}')
+            self.hits += 1
+            return
+        tmp_path = path + '.tmp'
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        filter_args = ['--filter=blob:none'] if partial else []
+        self.git('clone', '--bare', '--depth', '1', *filter_args, '--single-branch', '--no-tags', repo['clone_url'],
+                 tmp_path)
+        os.replace(tmp_path, path)  # Um clone interrompido nunca fica no lugar do espelho
+        self.misses += 1
+
+    def checkout(self, repo, repo_path, sparse_patterns=None):
+        """
+        Atualiza o espelho do repositório e cria a árvore de trabalho em
+        repo_path (só com sparse_patterns, se informados). O espelho fica
+        marcado como em uso até release(). Retorna os bytes baixados.
+
+        Com sparse_patterns, um espelho novo é criado sem blobs e a árvore
+        de trabalho é um worktree do próprio espelho: o checkout baixa sob
+        demanda, do remoto de origem, só os blobs que casam com os padrões,
+        e eles ficam no espelho para as próximas coletas.
+        """
+        full_name = repo['full_name']
+        path = self.mirror_path(full_name)
+        with self._lock:
+            self._in_use[full_name] = self._in_use.get(full_name, 0) + 1
+        try:
+            with self._repo_lock(full_name):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                before = _dir_size(path) if os.path.isdir(path) else 0
+                self._update(repo, path, partial=bool(sparse_patterns))
+                partial = self._is_partial(path)
+                if partial:
+                    # clone --shared não funciona com um espelho parcial (o upload-pack não busca os blobs que faltam)
+                    self.git('-C', path, 'worktree', 'add', '--detach', '--no-checkout', os.path.abspath(repo_path),
+                             'HEAD')
+                    if sparse_patterns:
+                        self.git('-C', repo_path, 'sparse-checkout', 'set', '--no-cone', *sparse_patterns)
+                    self.git('-C', repo_path, 'checkout')  # Blobs que faltam vêm do remoto de origem do espelho
+                size = _dir_size(path)
+                fetched = max(size - before, 0)
+                self._execute("INSERT OR REPLACE INTO mirrors VALUES (?, ?, ?)",
+                              (full_name, size, datetime.now().isoformat(timespec='microseconds')))
+            if partial:
+                pass  # A árvore de trabalho já foi extraída acima
+            elif sparse_patterns:
+                self.git('clone', '--shared', '--no-checkout', path, repo_path)
+                self.git('-C', repo_path, 'sparse-checkout', 'set', '--no-cone', *sparse_patterns)
+                self.git('-C', repo_path, 'checkout')
+            else:
+                self.git('clone', '--shared', path, repo_path)
+        except BaseException:
+            self.release(full_name)
+            raise
+        with self._lock:
+            self.fetched_bytes += fetched
+        self.evict()
+        return fetched
+
+    def release(self, full_name):
+        """Marca que a árvore de trabalho do repositório foi apagada (o espelho pode ser despejado)."""
+        with self._lock:
+            if self._in_use.get(full_name, 0) > 1:
+                self._in_use[full_name] -= 1
+            else:
+                self._in_use.pop(full_name, None)
+
+    def total_bytes(self):
+        return self._execute("SELECT COALESCE(SUM(bytes), 0) FROM mirrors")[0][0]
+
+    def evict(self):
+        """Apaga os espelhos usados há mais tempo até o total caber no orçamento."""
+        if not self.budget_bytes:
+            return
+        total = self.total_bytes()
+        if total <= self.budget_bytes:
+            return
+        for full_name, size in self._execute("SELECT full_name, bytes FROM mirrors ORDER BY last_used"):
+            if total <= self.budget_bytes:
+                break
+            with self._lock:
+                if full_name in self._in_use:
+                    continue
+                lock = self._repo_locks.setdefault(full_name, threading.Lock())
+            if not lock.acquire(blocking=False):
+                continue  # Sendo atualizado por outro worker
+            try:
+                shutil.rmtree(self.mirror_path(full_name), ignore_errors=True)
+                self._execute("DELETE FROM mirrors WHERE full_name = ?", (full_name,))
+            finally:
+                lock.release()
+            total -= size
+            self.evicted += 1
+            print(f"🗑️ Espelho de {full_name} despejado ({size / 1024 / 1024:.0f}MB, LRU)")
+
+    def report(self):
+        print(f"🪞 Espelhos: {self.hits} atualizados, {self.misses} novos, {self.evicted} despejados; "
+              f"{self.fetched_bytes / 1024 / 1024:.1f}MB baixados, {self.total_bytes() / 1024 / 1024:.0f}MB em '{self.root}'")
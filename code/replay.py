@@ -0,0 +1,92 @@
+import os
+import json
+
+
+# --- CONFIGURAÇÕES GLOBAIS ---
+REPO_LIST_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'top_1000_java_repos.txt')
+
+
+def load_repo_list(path=REPO_LIST_PATH):
+    """
+    Lê uma lista 'full_name,clone_url' por linha (como top_1000_java_repos.txt)
+    e devolve repositórios no formato da API de busca, só com esses campos.
+    A ordem do arquivo é mantida (é a ordem por estrelas da coleta original).
+    """
+    repos = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            full_name, _, clone_url = line.partition(',')
+            repos.append({
+                'full_name': full_name.strip(),
+                'clone_url': clone_url.strip() or f'https://github.com/{full_name.strip()}.git',
+            })
+    return repos
+
+
+def load_search_snapshot(path):
+    """
+    Lê respostas salvas da busca do GitHub: um arquivo JSON com a lista de
+    repositórios (save_search_snapshot), com uma página ({"items": [...]})
+    ou com uma lista de páginas, ou um diretório com um JSON por página
+    (lidos em ordem de nome).
+    """
+    if os.path.isdir(path):
+        repos = []
+        for name in sorted(os.listdir(path)):
+            if name.endswith('.json'):
+                repos.extend(load_search_snapshot(os.path.join(path, name)))
+        return repos
+
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        return data['items']
+    repos = []
+    for entry in data:
+        repos.extend(entry['items'] if isinstance(entry, dict) and 'items' in entry else [entry])
+    return repos
+
+
+def save_search_snapshot(repos, path):
+    """Salva os repositórios retornados pela busca para coletas futuras sem a API."""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(repos, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def load_repos(path):
+    """Repositórios de um snapshot JSON (.json ou diretório) ou de uma lista full_name,clone_url."""
+    if os.path.isdir(path) or path.endswith('.json'):
+        return load_search_snapshot(path)
+    return load_repo_list(path)
+
+
+def mirror_url(full_name, mirror):
+    """
+    URL de clone de um repositório em um espelho local.
+
+    mirror pode ser um modelo com {full_name}, {owner} e {name} (ex.:
+    'file:///srv/mirrors/{owner}/{name}.git') ou um diretório base, onde
+    são procurados <owner>/<name>.git, <owner>/<name> e <owner>_<name>.
+    """
+    owner, _, name = full_name.partition('/')
+    if '{' in mirror:
+        return mirror.format(full_name=full_name, owner=owner, name=name)
+    base = os.path.abspath(mirror)
+    candidates = [os.path.join(base, owner, name + '.git'), os.path.join(base, owner, name),
+                  os.path.join(base, f'{owner}_{name}')]
+    for candidate in candidates:
+        if os.path.isdir(candidate):
+            return 'file://' + candidate
+    return 'file://' + candidates[0]  # Inexistente: o clone falha e o repositório é registrado como falha
+
+
+def use_mirror(repos, mirror):
+    """Troca a clone_url de cada repositório pela do espelho local."""
+    for repo in repos:
+        repo['clone_url'] = mirror_url(repo['full_name'], mirror)
+    return repos
@@ -0,0 +1,190 @@
+import os
+import csv
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow é opcional: sem ele só o CSV é gravado e lido
+    pa = None
+
+# O pandas é importado dentro das funções que o usam: load_arrays (resumo rápido do cli.py) não precisa dele
+
+
+# --- CONFIGURAÇÕES GLOBAIS ---
+TEXT_COLUMNS = ('repository',)
+TIMESTAMP_COLUMNS = ('created_at', 'updated_at', 'pushed_at')
+BOOL_COLUMNS = ('has_wiki', 'has_pages', 'has_downloads', 'has_issues', 'has_projects', 'archived', 'disabled',
+                'fork', 'private')
+CATEGORY_COLUMNS = ('language', 'license', 'default_branch')
+LIST_COLUMNS = ('topics',)
+INT_COLUMNS = ('stars', 'forks', 'watchers', 'open_issues', 'size_kb', 'age_days')
+# As demais colunas (métricas do CK, age_years) são float64
+
+
+def is_available():
+    return pa is not None
+
+
+def typed_path(csv_path):
+    """Caminho do arquivo tipado que acompanha um CSV de resultados (mesmo nome, extensão .parquet)."""
+    return os.path.splitext(csv_path)[0] + '.parquet'
+
+
+def _to_bool(column):
+    if column.dtype == bool:
+        return column
+    text = column.astype(str).str.strip().str.lower()
+    return text.map({'true': True, 'false': False, '1': True, '0': False}).astype('boolean')
+
+
+def _to_list(column):
+    if column.map(lambda v: isinstance(v, (list, tuple))).all():
+        return column.map(list)
+    return column.fillna('').astype(str).map(lambda text: [t.strip() for t in text.split(',') if t.strip()])
+
+
+def coerce_types(df):
+    """
+    Converte as colunas dos resultados para os tipos do esquema: datas em
+    UTC, booleanos, categorias, listas (topics) e números. Serve tanto
+    para as linhas de save_results_to_csv quanto para um CSV lido como texto.
+    """
+    import pandas as pd
+    df = df.copy()
+    for name in df.columns:
+        column = df[name]
+        if name in TEXT_COLUMNS:
+            df[name] = column.astype('string')
+        elif name in TIMESTAMP_COLUMNS:
+            df[name] = pd.to_datetime(column.replace('', None), utc=True, errors='coerce')
+        elif name in BOOL_COLUMNS:
+            df[name] = _to_bool(column)
+        elif name in CATEGORY_COLUMNS:
+            df[name] = column.fillna('').astype(str).astype('category')
+        elif name in LIST_COLUMNS:
+            df[name] = _to_list(column)
+        elif name in INT_COLUMNS:
+            df[name] = pd.to_numeric(column, errors='coerce').astype('Int64')
+        else:
+            df[name] = pd.to_numeric(column, errors='coerce').astype('float64')
+    return df
+
+
+def schema_for(df):
+    """Esquema Arrow das colunas presentes em df (já convertidas por coerce_types)."""
+    fields = []
+    for name in df.columns:
+        if name in TEXT_COLUMNS:
+            field_type = pa.string()
+        elif name in TIMESTAMP_COLUMNS:
+            field_type = pa.timestamp('s', tz='UTC')
+        elif name in BOOL_COLUMNS:
+            field_type = pa.bool_()
+        elif name in CATEGORY_COLUMNS:
+            field_type = pa.dictionary(pa.int32(), pa.string())
+        elif name in LIST_COLUMNS:
+            field_type = pa.list_(pa.string())
+        elif name in INT_COLUMNS:
+            field_type = pa.int64()
+        else:
+            field_type = pa.float64()
+        fields.append(pa.field(name, field_type))
+    return pa.schema(fields)
+
+
+def write_typed(metrics, csv_path):
+    """
+    Grava as linhas de resultado no arquivo tipado ao lado de csv_path,
+    com gravação atômica (arquivo temporário + os.replace). Retorna o
+    caminho, ou None sem o pyarrow.
+    """
+    import pandas as pd
+    if not is_available() or not metrics:
+        return None
+    df = coerce_types(pd.DataFrame(metrics))
+    table = pa.Table.from_pandas(df, schema=schema_for(df), preserve_index=False, safe=False)
+    # Sem os metadados do pandas, read_parquet devolve dtypes do NumPy (int64, bool, category), não Int64/boolean
+    table = table.replace_schema_metadata(None)
+    path = typed_path(csv_path)
+    tmp_path = path + '.tmp'
+    pq.write_table(table, tmp_path, compression='zstd')
+    os.replace(tmp_path, path)
+    return path
+
+
+def _typed_is_fresh(csv_path):
+    """O arquivo tipado existe e não é mais antigo que o CSV (que pode ter sido editado à mão)."""
+    path = typed_path(csv_path)
+    return os.path.exists(path) and (not os.path.exists(csv_path)
+                                     or os.path.getmtime(path) >= os.path.getmtime(csv_path))
+
+
+def load_results(csv_path, columns=None):
+    """
+    Lê os resultados de preferência do arquivo tipado (só as colunas
+    pedidas, se columns for informado); usa o CSV, convertido pelos mesmos
+    tipos, se o arquivo tipado não existir, for mais antigo que o CSV ou
+    o pyarrow não estiver instalado. Colunas pedidas que não existem são
+    ignoradas. Levanta FileNotFoundError se nenhum dos dois existir.
+    """
+    import pandas as pd
+    path = typed_path(csv_path)
+    if is_available() and _typed_is_fresh(csv_path):
+        if columns is not None:
+            available = set(pq.read_schema(path).names)
+            columns = [c for c in columns if c in available]
+        return pd.read_parquet(path, columns=columns)
+
+    wanted = None if columns is None else set(columns)
+    df = coerce_types(pd.read_csv(csv_path, usecols=None if wanted is None else (lambda c: c in wanted)))
+    # Mesmos dtypes que read_parquet devolve: inteiros com ausentes viram float64 (NaN)
+    for name in df.columns:
+        if isinstance(df[name].dtype, (pd.Int64Dtype, pd.BooleanDtype)):
+            has_na = df[name].isna().any()
+            if isinstance(df[name].dtype, pd.Int64Dtype):
+                df[name] = df[name].astype('float64' if has_na else 'int64')
+            else:
+                df[name] = df[name].astype(object if has_na else bool)
+    return df
+
+
+def load_arrays(csv_path, columns):
+    """
+    {coluna: array float64} das colunas numéricas pedidas que existirem,
+    sem o pandas (ausentes viram NaN). Lê o arquivo tipado nas mesmas
+    condições de load_results, senão o CSV com o leitor do pyarrow; sem o
+    pyarrow, usa load_results. Levanta FileNotFoundError se nenhum existir.
+    """
+    if not is_available():
+        df = load_results(csv_path, columns)
+        return {name: df[name].to_numpy(dtype=float) for name in df.columns}
+
+    path = typed_path(csv_path)
+    if _typed_is_fresh(csv_path):
+        available = set(pq.read_schema(path).names)
+        # ParquetFile.read, diferente de pq.read_table, não importa o pandas
+        table = pq.ParquetFile(path).read(columns=[c for c in columns if c in available], use_pandas_metadata=False)
+    else:
+        with open(csv_path, newline='', encoding='utf-8') as f:
+            header = next(csv.reader(f), [])
+        names = [c for c in columns if c in header]
+        options = pa_csv.ConvertOptions(include_columns=names, column_types={name: pa.float64() for name in names})
+        table = pa_csv.read_csv(csv_path, convert_options=options)
+    return {name: _float_values(table.column(name)) for name in table.column_names}
+
+
+def _float_values(column):
+    """
+    Coluna do Arrow como array float64 (nulos viram NaN), lida direto dos
+    buffers: o to_numpy do pyarrow importa o pandas (~0,5 s).
+    """
+    array = column.cast(pa.float64()).combine_chunks()
+    validity, data = array.buffers()
+    values = np.frombuffer(data, dtype=np.float64, count=len(array), offset=array.offset * 8).copy()
+    if validity is not None and array.null_count:
+        valid = np.unpackbits(np.frombuffer(validity, dtype=np.uint8), bitorder='little').astype(bool)
+        values[~valid[array.offset:array.offset + len(array)]] = np.nan
+    return values
@@ -0,0 +1,144 @@
+import heapq
+import sqlite3
+from datetime import datetime
+
+import numpy as np
+
+
+# --- CONFIGURAÇÕES GLOBAIS ---
+JOB_HISTORY_PATH = "job_history.sqlite"
+DEFAULT_BASE_SECONDS = 5.0  # Custo fixo estimado por repositório (clone + JVM) sem histórico
+DEFAULT_SECONDS_PER_MB = 0.5  # Custo estimado por MB de código sem histórico
+MIN_HISTORY_FOR_FIT = 5  # Execuções anteriores necessárias para ajustar o modelo de custo
+
+
+def cost_feature_kb(repo):
+    """
+    Tamanho usado para estimar o custo de um repositório, em KB.
+
+    Se os bytes de Java do repositório forem conhecidos (campo 'java_bytes',
+    vindo da API de linguagens), usa-os; senão usa o 'size' da busca, que
+    inclui histórico e arquivos que o CK não analisa.
+    """
+    if repo.get('java_bytes') is not None:
+        return repo['java_bytes'] / 1024
+    return repo.get('size', 0)
+
+
+class JobHistory:
+    """Duração real (clone + CK) de cada repositório nas coletas anteriores, em SQLite."""
+
+    def __init__(self, path=JOB_HISTORY_PATH):
+        self.path = path
+        self._execute(
+            "CREATE TABLE IF NOT EXISTS durations ("
+            " full_name TEXT PRIMARY KEY, seconds REAL NOT NULL, feature_kb REAL NOT NULL,"
+            " recorded_at TEXT NOT NULL)"
+        )
+
+    def _execute(self, sql, params=()):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    def record(self, full_name, seconds, feature_kb):
+        self._execute(
+            "INSERT OR REPLACE INTO durations VALUES (?, ?, ?, ?)",
+            (full_name, seconds, feature_kb, datetime.now().isoformat(timespec='seconds'))
+        )
+
+    def all(self):
+        """Dict full_name -> (segundos, tamanho em KB)."""
+        return {name: (seconds, feature_kb)
+                for name, seconds, feature_kb in self._execute("SELECT full_name, seconds, feature_kb FROM durations")}
+
+
+def fit_cost_model(history):
+    """
+    Ajusta segundos = base + taxa * MB por mínimos quadrados sobre o histórico.
+    Sem histórico suficiente (ou com um ajuste sem sentido), usa os padrões.
+    """
+    points = list(history.values())
+    if len(points) >= MIN_HISTORY_FOR_FIT:
+        seconds = np.array([p[0] for p in points])
+        size_mb = np.array([p[1] for p in points]) / 1024
+        if np.ptp(size_mb) > 0:
+            rate, base = np.polyfit(size_mb, seconds, 1)
+            if rate > 0:
+                return max(base, 0.0), rate
+    return DEFAULT_BASE_SECONDS, DEFAULT_SECONDS_PER_MB
+
+
+def estimate_costs(repos, history):
+    """Custo estimado (segundos) de cada repositório: a duração anterior, se houver, ou o modelo ajustado."""
+    base, rate = fit_cost_model(history)
+    costs = []
+    for repo in repos:
+        past = history.get(repo['full_name'])
+        costs.append(past[0] if past else base + rate * cost_feature_kb(repo) / 1024)
+    return costs
+
+
+def longest_first(items, costs):
+    """Ordena os itens do maior para o menor custo (empates mantêm a ordem original)."""
+    order = sorted(range(len(items)), key=lambda k: -costs[k])
+    return [items[k] for k in order], [costs[k] for k in order]
+
+
+def predict_makespan(costs, workers):
+    """
+    Tempo total previsto para executar os jobs, nessa ordem, em `workers`
+    workers: cada job vai para o worker que ficar livre primeiro, como faz o
+    pool de threads. Com os custos em ordem decrescente isso é o LPT
+    (longest processing time first).
+    """
+    loads = [0.0] * max(workers, 1)
+    for cost in costs:
+        heapq.heapreplace(loads, loads[0] + cost)
+    return max(loads)
+
+
+class MakespanTracker:
+    """
+    Acompanha o previsto vs. o real durante a execução.
+
+    A previsão de término corrige o trabalho restante previsto pela razão
+    real/previsto dos repositórios já concluídos, em vez de usar a média
+    simples por repositório.
+    """
+
+    def __init__(self, predicted_costs, workers):
+        self.predicted = dict(predicted_costs)  # índice -> segundos previstos
+        self.workers = max(workers, 1)
+        self.predicted_makespan = predict_makespan(list(self.predicted.values()), self.workers)
+        self.pending = set(self.predicted)
+        self.predicted_done = 0.0
+        self.actual_done = 0.0
+        self.errors = []  # (erro absoluto, índice, previsto, real)
+
+    def finish(self, index, actual_seconds):
+        if index not in self.pending:
+            return
+        self.pending.discard(index)
+        if actual_seconds is None:
+            return
+        predicted = self.predicted[index]
+        self.predicted_done += predicted
+        self.actual_done += actual_seconds
+        self.errors.append((abs(actual_seconds - predicted), index, predicted, actual_seconds))
+
+    def correction(self):
+        return self.actual_done / self.predicted_done if self.predicted_done > 0 else 1.0
+
+    def remaining_seconds(self):
+        remaining = [self.predicted[i] * self.correction() for i in self.pending]
+        return predict_makespan(sorted(remaining, reverse=True), self.workers) if remaining else 0.0
+
+    def report(self, actual_makespan, names):
+        print(f"📐 Makespan previsto: {self.predicted_makespan:.0f}s | real: {actual_makespan:.0f}s "
+              f"(fator de correção {self.correction():.2f})")
+        for error, index, predicted, actual in sorted(self.errors, reverse=True)[:5]:
+            print(f"   {names[index]}: previsto {predicted:.0f}s, real {actual:.0f}s")
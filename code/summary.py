@@ -0,0 +1,121 @@
+"""
+Resumo rápido dos resultados da coleta: estatísticas das métricas de
+qualidade, das estrelas e da idade, sem correlações nem gráficos.
+
+Uso: python summary.py  (ou python cli.py summarize)
+
+Só usa numpy e, se instalado, pyarrow: não importa pandas, scipy nem
+matplotlib, para responder em uma fração de segundo.
+"""
+import argparse
+
+import numpy as np
+
+from results_table import load_arrays
+
+
+# --- CONFIGURAÇÕES GLOBAIS ---
+RESULTS_FILES = ('resultados_completos.csv', 'resultados_finais.csv')  # Em ordem de preferência
+REQUIRED_METRICS = ['cbo_mean', 'dit_mean', 'lcom_mean']  # Repositórios sem estas métricas são descartados
+QUALITY_METRICS = ['cbo_mean', 'dit_mean', 'lcom_mean', 'wmc_mean', 'rfc_mean', 'noc_mean']
+REPORT_COLUMNS = ['stars', 'age_years', 'cbo_mean', 'dit_mean', 'lcom_mean']
+
+
+def column_stats(arrays, columns):
+    """
+    {coluna: {'count', 'mean', 'std', 'min', 'max', 'median'}} das colunas
+    presentes em arrays (coluna -> array float), ignorando os NaN. O
+    desvio padrão usa ddof=1, como o pandas.
+    """
+    stats = {}
+    for col in columns:
+        if col not in arrays:
+            continue
+        values = arrays[col][~np.isnan(arrays[col])]
+        count = len(values)
+        stats[col] = {
+            'count': count,
+            'mean': values.mean() if count else np.nan,
+            'std': values.std(ddof=1) if count > 1 else np.nan,
+            'min': values.min() if count else np.nan,
+            'max': values.max() if count else np.nan,
+            'median': np.median(values) if count else np.nan,
+        }
+    return stats
+
+
+def print_metric_stats(stats, metrics):
+    """Bloco de estatísticas de cada métrica de qualidade (ver analise_simples.analyze_quality_metrics)."""
+    for metric in metrics:
+        if metric in stats:
+            values = stats[metric]
+            if values['count'] > 0:
+                print(f"\n{metric.upper()}:")
+                print(f"  Média: {values['mean']:.2f}")
+                print(f"  Mediana: {values['median']:.2f}")
+                print(f"  Desvio Padrão: {values['std']:.2f}")
+                print(f"  Min: {values['min']:.2f}")
+                print(f"  Max: {values['max']:.2f}")
+
+
+def print_overview(total, valid, stats):
+    """Totais de repositórios e estrelas/idade médias e medianas (ver analise_simples.generate_summary_report)."""
+    print(f"\n📊 Dados coletados:")
+    print(f"  Total de repositórios: {total}")
+    print(f"  Repositórios com métricas válidas: {valid}")
+
+    if 'stars' in stats:
+        print(f"  Estrelas médias: {stats['stars']['mean']:.0f}")
+        print(f"  Estrelas mediana: {stats['stars']['median']:.0f}")
+
+    if 'age_years' in stats:
+        print(f"  Idade média: {stats['age_years']['mean']:.1f} anos")
+        print(f"  Idade mediana: {stats['age_years']['median']:.1f} anos")
+
+
+def load_first(paths, columns):
+    """(caminho, arrays) do primeiro arquivo de resultados que existir; FileNotFoundError se nenhum existir."""
+    for path in paths:
+        try:
+            return path, load_arrays(path, columns)
+        except FileNotFoundError:
+            continue
+    raise FileNotFoundError(paths[0])
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Resumo rápido das métricas de qualidade coletadas pelo CK.")
+    parser.add_argument('--results', action='append',
+                        help="Arquivo de resultados (CSV; o .parquet ao lado é lido se estiver atualizado). "
+                             f"Padrão: o primeiro que existir entre {', '.join(RESULTS_FILES)}")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    columns = list(dict.fromkeys(QUALITY_METRICS + REPORT_COLUMNS))
+    try:
+        path, arrays = load_first(args.results or RESULTS_FILES, columns)
+    except FileNotFoundError:
+        print("❌ ERRO: Nenhum arquivo de resultados encontrado!")
+        print("Execute primeiro o script de coleta de dados (main.py ou main_enhanced.py)")
+        return
+
+    total = len(next(iter(arrays.values()))) if arrays else 0
+    print(f"📊 Dados carregados de '{path}': {total} repositórios")
+    # Mesma limpeza de analise_simples.py: só repositórios com CBO, DIT e LCOM
+    valid = np.ones(total, dtype=bool)
+    for metric in REQUIRED_METRICS:
+        if metric in arrays:
+            valid &= ~np.isnan(arrays[metric])
+    arrays = {name: values[valid] for name, values in arrays.items()}
+    print(f"📊 Após limpeza: {int(valid.sum())} repositórios com métricas válidas")
+
+    stats = column_stats(arrays, columns)
+    print("\n📈 Estatísticas das métricas de qualidade:")
+    print_metric_stats(stats, QUALITY_METRICS)
+    print_overview(total, int(valid.sum()), stats)
+
+
+if __name__ == '__main__':
+    main()
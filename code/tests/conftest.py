@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Os scripts ficam em code/, sem pacote: os testes os importam pelo nome, como os próprios scripts fazem
+CODE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, CODE_DIR)
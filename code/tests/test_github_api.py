@@ -0,0 +1,96 @@
+"""
+fetch_github_repos contra um servidor local (http.server) que serve páginas
+de busca prontas, no lugar da API do GitHub (ver GITHUB_API_URL).
+"""
+import json
+import time
+import threading
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import pytest
+
+import github_api
+
+PAGES = {page: [{'full_name': f'owner/repo{page}{n}', 'stargazers_count': 1000 - 10 * page - n} for n in range(2)]
+         for page in (1, 2, 3)}
+
+
+class SearchHandler(BaseHTTPRequestHandler):
+    """Serve PAGES; a primeira requisição da página 2 (e da 3) recebe 403 com Retry-After em segundos (e em data)."""
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {name: values[0] for name, values in parse_qs(url.query).items()}
+        page = int(query['page'])
+        server = self.server
+        with server.lock:
+            attempt = sum(1 for request in server.requests if request['page'] == page)
+            server.requests.append({'page': page, 'path': url.path, 'query': query, 'time': time.time(),
+                                    'authorization': self.headers.get('Authorization')})
+
+        if attempt == 0 and page == 2:
+            self._reply(403, {'message': 'secondary rate limit'}, {'Retry-After': '1'})
+        elif attempt == 0 and page == 3:
+            self._reply(403, {'message': 'secondary rate limit'},
+                        {'Retry-After': formatdate(time.time() + 2, usegmt=True)})
+        else:
+            self._reply(200, {'items': PAGES[page]})
+
+    def _reply(self, status, body, headers=None):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def search_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), SearchHandler)
+    server.lock = threading.Lock()
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_fetch_github_repos_paginates_and_waits_for_retry_after(search_server, monkeypatch):
+    monkeypatch.setenv('GITHUB_API_URL', f'http://127.0.0.1:{search_server.server_address[1]}/')
+    # Um worker: as páginas são pedidas em ordem e as esperas não se sobrepõem
+    repos = github_api.fetch_github_repos({'Authorization': 'token test'}, pages=3, max_workers=1)
+
+    assert repos == PAGES[1] + PAGES[2] + PAGES[3]
+
+    requests = search_server.requests
+    assert [request['page'] for request in requests] == [1, 2, 2, 3, 3]
+    for request in requests:
+        assert request['path'] == '/search/repositories'
+        assert request['query']['q'] == github_api.SEARCH_QUERY
+        assert request['query']['sort'] == 'stars'
+        assert request['query']['per_page'] == str(github_api.PER_PAGE)
+        assert request['authorization'] == 'token test'
+
+    # Retry-After: 1 (segundos) e uma data HTTP ~2s à frente (resolução de 1s, então a espera passa de 1s)
+    assert requests[2]['time'] - requests[1]['time'] >= 0.95
+    assert requests[4]['time'] - requests[3]['time'] >= 0.95
+
+
+@pytest.mark.parametrize('value, expected', [('120', 120.0), ('0', 0.0), ('-5', 0.0), ('garbage', None), ('', None)])
+def test_parse_retry_after_seconds(value, expected):
+    assert github_api._parse_retry_after(value) == expected
+
+
+def test_parse_retry_after_http_date():
+    delay = github_api._parse_retry_after(formatdate(time.time() + 30, usegmt=True))
+    assert 28 <= delay <= 30
+    assert github_api._parse_retry_after(formatdate(0, usegmt=True)) == 0
@@ -0,0 +1,34 @@
+"""
+Os comandos leves do cli.py não podem importar as bibliotecas pesadas que
+não usam (ver bench_imports.py, que também mede o tempo de importação).
+"""
+import os
+import sys
+import json
+import subprocess
+
+import pytest
+
+from bench_pipeline import CODE_DIR
+from bench_imports import FORBIDDEN
+
+HEAVY_MODULES = ('pandas', 'scipy', 'matplotlib', 'pyarrow', 'seaborn')
+
+
+def imported_packages(code):
+    """Pacotes de primeiro nível em sys.modules depois de executar code em um interpretador novo."""
+    script = f"import sys, json\n{code}\nprint(json.dumps(sorted({{m.split('.')[0] for m in sys.modules}})))"
+    env = {name: value for name, value in os.environ.items() if name != 'GITHUB_TOKEN'}
+    result = subprocess.run([sys.executable, '-c', script], cwd=CODE_DIR, env=env,
+                            capture_output=True, text=True, check=True)
+    return set(json.loads(result.stdout.splitlines()[-1]))
+
+
+def test_cli_imports_no_heavy_module():
+    assert not set(HEAVY_MODULES) & imported_packages("import cli")
+
+
+@pytest.mark.parametrize('command', sorted(FORBIDDEN))
+def test_command_skips_forbidden_modules(command):
+    loaded = imported_packages(f"import cli; cli.load({command!r})")
+    assert not set(FORBIDDEN[command]) & loaded
@@ -0,0 +1,156 @@
+"""
+Spans de tempo por estágio de cada repositório (clone, CK, arquivamento,
+leitura e agregação do class.csv, limpeza e remoção em segundo plano),
+gravados em JSONL.
+
+Relatório: python tracing.py [spans.jsonl] [--run ID | --all] [--top N]
+"""
+import os
+import json
+import time
+import argparse
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+
+# --- CONFIGURAÇÕES GLOBAIS ---
+SPANS_PATH = "spans.jsonl"
+STAGES = ('clone', 'ck', 'archive', 'parse', 'aggregate', 'cleanup', 'trash_delete')
+
+
+class SpanRecorder:
+    """
+    Grava uma linha JSON por estágio concluído: execução, repositório,
+    estágio, início (epoch), duração em segundos, worker e atributos do
+    estágio (ex.: bytes baixados no clone, classes no parse). Pode ser usado
+    por vários workers ao mesmo tempo; cada linha é gravada inteira, com
+    flush, então um relatório pode ser gerado com a coleta em andamento.
+    """
+
+    def __init__(self, path=SPANS_PATH, run_id=None):
+        self.path = path
+        self.run_id = run_id or datetime.now().isoformat(timespec='seconds')
+        self._lock = threading.Lock()
+        self._file = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def open(self):
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def record(self, repository, stage, seconds, start=None, **attrs):
+        span = {
+            'run': self.run_id,
+            'repository': repository,
+            'stage': stage,
+            'start': round(start if start is not None else time.time() - seconds, 3),
+            'seconds': round(seconds, 6),
+            'worker': threading.current_thread().name,
+            **attrs,
+        }
+        line = json.dumps(span, ensure_ascii=False, default=str) + '\n'
+        with self._lock:
+            if self._file:
+                self._file.write(line)
+                self._file.flush()
+
+    @contextmanager
+    def span(self, repository, stage, **attrs):
+        """Mede o bloco como um estágio; o dict entregue recebe atributos extras (ex.: span['bytes'] = ...)."""
+        start_wall = time.time()
+        start = time.perf_counter()
+        try:
+            yield attrs
+        except BaseException as e:
+            attrs['error'] = type(e).__name__
+            raise
+        finally:
+            self.record(repository, stage, time.perf_counter() - start, start_wall, **attrs)
+
+
+def read_spans(path=SPANS_PATH, run=None):
+    """DataFrame com os spans de uma execução (padrão: a mais recente; run='all' para todas)."""
+    rows = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                rows.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue  # Linha incompleta de uma coleta interrompida
+    df = pd.DataFrame(rows)
+    if df.empty or run == 'all':
+        return df
+    return df[df['run'] == (run or df['run'].iloc[-1])]
+
+
+def stage_summary(df):
+    """Contagem, total, p50, p95 e máximo (s) por estágio, na ordem do pipeline."""
+    grouped = df.groupby('stage')['seconds']
+    summary = pd.DataFrame({
+        'spans': grouped.size(),
+        'total_s': grouped.sum(),
+        'p50_s': grouped.quantile(0.50),
+        'p95_s': grouped.quantile(0.95),
+        'max_s': grouped.max(),
+    })
+    order = [stage for stage in STAGES if stage in summary.index]
+    order += [stage for stage in summary.index if stage not in order]
+    return summary.loc[order]
+
+
+def slowest_repositories(df, top=10):
+    """Repositórios com mais tempo somado, com o tempo de cada estágio em colunas."""
+    by_stage = df.pivot_table(index='repository', columns='stage', values='seconds', aggfunc='sum', fill_value=0.0)
+    by_stage['total_s'] = by_stage.sum(axis=1)
+    return by_stage.sort_values('total_s', ascending=False).head(top)
+
+
+def report(path=SPANS_PATH, run=None, top=10):
+    df = read_spans(path, run)
+    if df.empty:
+        print(f"Nenhum span encontrado em '{path}'.")
+        return
+    runs = df['run'].unique()
+    print(f"📊 {len(df)} spans de {df['repository'].nunique()} repositórios "
+          f"(execução {runs[0] if len(runs) == 1 else f'{len(runs)} execuções'})")
+
+    with pd.option_context('display.float_format', '{:.2f}'.format, 'display.width', 160):
+        print("\n⏱️ Por estágio:")
+        print(stage_summary(df).to_string())
+
+        print(f"\n🐢 {top} estágios mais lentos:")
+        columns = [c for c in ('repository', 'stage', 'seconds', 'worker', 'bytes', 'classes', 'error') if c in df]
+        print(df.nlargest(top, 'seconds')[columns].to_string(index=False))
+
+        print(f"\n🐢 {top} repositórios mais lentos:")
+        print(slowest_repositories(df, top).to_string())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Relatório dos spans de tempo por estágio da coleta.")
+    parser.add_argument('path', nargs='?', default=SPANS_PATH)
+    parser.add_argument('--run', help="Execução a analisar (padrão: a mais recente)")
+    parser.add_argument('--all', action='store_true', help="Considera todas as execuções do arquivo")
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+    if not os.path.exists(args.path):
+        print(f"ERRO: Arquivo '{args.path}' não encontrado.")
+        return
+    report(args.path, 'all' if args.all else args.run, args.top)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from ck_metrics import CK_METRICS, summarize_ck_chunks
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+    import pyarrow.ipc as ipc
+except ImportError:  # pyarrow é opcional: sem ele o armazém fica desativado
+    pa = None
+
+
+# --- CONFIGURAÇÕES GLOBAIS ---
+WAREHOUSE_DIR = "ck_warehouse"
+WAREHOUSE_COMPRESSION = os.getenv('WAREHOUSE_COMPRESSION', 'zstd')  # 'none' permite leitura sem cópia (zero-copy)
+PARTITION_FILE = "class.arrow"
+
+
+def is_available():
+    return pa is not None
+
+
+def partition_path(repository, warehouse_dir=WAREHOUSE_DIR):
+    """Diretório da partição de um repositório (uma partição por repositório)."""
+    return os.path.join(warehouse_dir, f"repository={repository.replace('/', '_')}")
+
+
+def _coerce_metric(column):
+    """Garante float64 para as métricas do CK, mesmo se o CSV tiver texto inválido na coluna."""
+    if pa.types.is_floating(column.type) or pa.types.is_integer(column.type) or pa.types.is_null(column.type):
+        return column.cast(pa.float64())
+    values = pd.to_numeric(column.to_pandas(), errors='coerce')
+    return pa.chunked_array([pa.array(values, type=pa.float64())])
+
+
+def read_class_csv(class_csv_path, repo_path=None):
+    """
+    Lê o class.csv do CK como a tabela Arrow do armazém: colunas de texto
+    (file, class, type...) codificadas por dicionário, métricas do CK em
+    float64 e o prefixo do clone temporário (repo_path) removido dos
+    caminhos em 'file'.
+    """
+    table = pa_csv.read_csv(class_csv_path)
+
+    columns = []
+    for name in table.column_names:
+        column = table.column(name)
+        if name in CK_METRICS:
+            column = _coerce_metric(column)
+        elif pa.types.is_string(column.type) or pa.types.is_large_string(column.type):
+            if name == 'file' and repo_path:
+                prefix = os.path.abspath(repo_path) + os.sep
+                column = pc.if_else(pc.starts_with(column, prefix),
+                                    pc.utf8_slice_codeunits(column, len(prefix)), column)
+            column = column.dictionary_encode()
+        columns.append(column)
+    return pa.table(columns, names=table.column_names)
+
+
+def write_partition(table, repository, warehouse_dir=WAREHOUSE_DIR):
+    """
+    Grava a tabela de classes de um repositório (ver read_class_csv) no
+    armazém, em Arrow IPC comprimido. A gravação é atômica (arquivo
+    temporário + os.replace), então workers diferentes podem gravar
+    partições ao mesmo tempo. Retorna o número de bytes gravados.
+    """
+    table = table.replace_schema_metadata({'repository': repository})
+
+    partition = partition_path(repository, warehouse_dir)
+    os.makedirs(partition, exist_ok=True)
+    final_path = os.path.join(partition, PARTITION_FILE)
+    tmp_path = final_path + '.tmp'
+    compression = None if WAREHOUSE_COMPRESSION == 'none' else WAREHOUSE_COMPRESSION
+    options = ipc.IpcWriteOptions(compression=compression)
+    with pa.OSFile(tmp_path, 'wb') as sink, ipc.new_file(sink, table.schema, options=options) as writer:
+        writer.write_table(table)
+    os.replace(tmp_path, final_path)
+    return os.path.getsize(final_path)
+
+
+def store_class_csv(class_csv_path, repository, repo_path=None, warehouse_dir=WAREHOUSE_DIR):
+    """Guarda o class.csv de um repositório no armazém; retorna o número de bytes gravados."""
+    return write_partition(read_class_csv(class_csv_path, repo_path), repository, warehouse_dir)
+
+
+def read_repository(repository, columns=None, warehouse_dir=WAREHOUSE_DIR):
+    """Lê (memory-mapped) a tabela de classes de um repositório, opcionalmente só algumas colunas."""
+    path = os.path.join(partition_path(repository, warehouse_dir), PARTITION_FILE)
+    with pa.memory_map(path, 'r') as source:
+        table = ipc.open_file(source).read_all()
+    return table.select(columns) if columns else table
+
+
+def list_repositories(warehouse_dir=WAREHOUSE_DIR):
+    """Nomes (owner/repo) de todos os repositórios guardados no armazém."""
+    if not os.path.isdir(warehouse_dir):
+        return []
+    repositories = []
+    for entry in sorted(os.listdir(warehouse_dir)):
+        path = os.path.join(warehouse_dir, entry, PARTITION_FILE)
+        if entry.startswith('repository=') and os.path.exists(path):
+            with pa.memory_map(path, 'r') as source:
+                metadata = ipc.open_file(source).schema.metadata or {}
+            repositories.append(metadata.get(b'repository', entry[len('repository='):].encode()).decode())
+    return repositories
+
+
+def _iter_table_chunks(table):
+    """Converte os lotes da tabela Arrow no formato de blocos de ck_metrics (NaN nos inválidos)."""
+    metrics = [name for name in CK_METRICS if name in table.column_names]
+    for batch in table.select(metrics).to_batches():
+        chunk = {}
+        for name in metrics:
+            values = batch.column(name).to_numpy(zero_copy_only=False)
+            chunk[name] = np.where(np.isfinite(values), values, np.nan)
+        yield chunk
+
+
+def summarize_table(table, median_mode='exact', timings=None):
+    """Métricas agregadas de uma tabela de classes, como ck_metrics.summarize_class_csv: (métricas, inválidos)."""
+    return summarize_ck_chunks(_iter_table_chunks(table), median_mode, timings)
+
+
+def summarize_repository(repository, median_mode='exact', warehouse_dir=WAREHOUSE_DIR):
+    """Recalcula as métricas agregadas de um repositório a partir do armazém, sem git nem CK."""
+    return summarize_table(read_repository(repository, warehouse_dir=warehouse_dir), median_mode)
+
+
+def summarize_warehouse(warehouse_dir=WAREHOUSE_DIR, median_mode='exact'):
+    """DataFrame com as métricas agregadas de todos os repositórios do armazém."""
+    rows = []
+    for repository in list_repositories(warehouse_dir):
+        metrics, _ = summarize_repository(repository, median_mode, warehouse_dir)
+        rows.append({'repository': repository, **metrics})
+    return pd.DataFrame(rows)
+
+
+def main():
+    if not is_available():
+        print("❌ O armazém de métricas precisa do pyarrow (pip install pyarrow).")
+        return
+    warehouse_dir = sys.argv[1] if len(sys.argv) > 1 else WAREHOUSE_DIR
+    output_path = 'resumo_warehouse.csv'
+
+    start = time.perf_counter()
+    df = summarize_warehouse(warehouse_dir)
+    elapsed = time.perf_counter() - start
+    if df.empty:
+        print(f"Nenhum repositório encontrado em '{warehouse_dir}'.")
+        return
+    df.to_csv(output_path, index=False)
+    print(f"✅ {len(df)} repositórios sumarizados a partir de '{warehouse_dir}' em {elapsed:.1f}s")
+    print(f"📄 Resumo salvo em '{output_path}'")
+
+
+if __name__ == '__main__':
+    main()